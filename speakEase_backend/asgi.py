@@ -13,4 +13,20 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'speakEase_backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# imported after the django setup done by get_asgi_application
+from django.conf import settings  # noqa: E402
+from speakEase_backend_app.websocket import websocket_application  # noqa: E402
+
+# same warm up as wsgi.py, GET /api/health/ready/ only sees the models of its own process
+if settings.WARMUP_MODELS_ON_START:
+    from speakEase_backend_app.ai_modules import registry
+    registry.warm_up(settings.READINESS_RESOURCES or None)
+
+
+# http goes to django, websockets (live voice training, /ws/voice/) to the app's handler
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        return await websocket_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -61,6 +61,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'speakEase_backend_app.middleware.ServerTimingMiddleware',
 ]
 
 # for CORS allow urls
@@ -168,4 +169,95 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-}
\ No newline at end of file
+}
+
+# voice analysis jobs (POST /api/training/voice/?async=1), run with: python manage.py run_analysis_workers
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "2"))
+
+# whisper micro batching: wait up to WHISPER_BATCH_MAX_WAIT_MS for up to WHISPER_BATCH_MAX_SIZE clips (1 = no batching)
+WHISPER_BATCH_MAX_SIZE = int(os.getenv("WHISPER_BATCH_MAX_SIZE", "8"))
+WHISPER_BATCH_MAX_WAIT_MS = int(os.getenv("WHISPER_BATCH_MAX_WAIT_MS", "30"))
+# seconds a request waits for its transcription (queue + model) before it fails, a batch running
+# longer than this marks the scheduler as stalled in GET /api/health/ready/
+WHISPER_RESULT_TIMEOUT = float(os.getenv("WHISPER_RESULT_TIMEOUT", "300"))
+
+# models that must be loaded before GET /api/health/ready/ returns 200
+READINESS_RESOURCES = [name for name in os.getenv("READINESS_RESOURCES", "whisper").split(",") if name]
+# opt in: every server process loads the readiness resources while it starts (readiness is per
+# process, warmup_models in its own process does not warm the workers). Off by default so no
+# process pays for whisper by accident, with it off ready stays 503 until a request loads them
+WARMUP_MODELS_ON_START = os.getenv("WARMUP_MODELS_ON_START", "False") == "True"
+
+# memory mapped CMUdict shared by all the workers, build it with: python manage.py build_lexicon
+PRONUNCIATION_LEXICON_PATH = os.getenv("PRONUNCIATION_LEXICON_PATH", str(BASE_DIR / 'data' / 'cmudict.lex'))
+# words whose CMUdict lookups are memoized per process for the transcript metrics
+LEXICON_CACHE_SIZE = int(os.getenv("LEXICON_CACHE_SIZE", "50000"))
+# timestamps from the whisper generate call: "" (off), segment or word. When on, the speech rate
+# and the pauses come from the timestamps and the measured duration (not the client duration)
+WHISPER_TIMESTAMPS = os.getenv("WHISPER_TIMESTAMPS", "")
+# recordings longer than this are split at the pauses and transcribed in chunks (whisper max is 30)
+WHISPER_CHUNK_SECONDS = int(os.getenv("WHISPER_CHUNK_SECONDS", "30"))
+
+# speech recognition backend: hf (fp32), int8 (dynamic quantized, CPU) or onnx (ONNX Runtime, needs optimum[onnxruntime]),
+# stub (no model, deterministic text) for benchmarks and load tests, ASR_STUB_LATENCY_MS fakes the model time per batch,
+# remote (the shared inference server below)
+ASR_BACKEND = os.getenv("ASR_BACKEND", "hf")
+ASR_STUB_LATENCY_MS = int(os.getenv("ASR_STUB_LATENCY_MS", "0"))
+ASR_ONNX_DIR = os.getenv("ASR_ONNX_DIR", str(BASE_DIR / 'data' / 'whisper-onnx'))
+
+# shared inference server, one per node (python manage.py run_inference_server): with ASR_BACKEND=remote the
+# web and analysis workers send it the audio instead of loading whisper. unix:/path/to/socket or host:port
+INFERENCE_SERVER_ADDRESS = os.getenv("INFERENCE_SERVER_ADDRESS", "unix:" + str(BASE_DIR / 'data' / 'inference.sock'))
+# backend the server loads (hf, int8, onnx or stub)
+INFERENCE_SERVER_BACKEND = os.getenv("INFERENCE_SERVER_BACKEND", "hf")
+# seconds a worker waits for the server, queueing and model time included
+INFERENCE_SERVER_TIMEOUT = float(os.getenv("INFERENCE_SERVER_TIMEOUT", "60"))
+# backend a worker loads itself when the server can not be reached ("" fails the request instead)
+INFERENCE_SERVER_FALLBACK = os.getenv("INFERENCE_SERVER_FALLBACK", "")
+
+# cache of transcripts and scores by audio hash: disk, db or none
+ANALYSIS_CACHE_BACKEND = os.getenv("ANALYSIS_CACHE_BACKEND", "disk")
+ANALYSIS_CACHE_DIR = os.getenv("ANALYSIS_CACHE_DIR", str(BASE_DIR / 'data' / 'analysis_cache'))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "10000"))
+ANALYSIS_CACHE_MAX_BYTES = int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# bump when the scoring changes so the old cached results are not used
+ANALYSIS_CACHE_VERSION = 3
+
+# longest start..end range of GET /api/progress/series/ (in days)
+PROGRESS_SERIES_MAX_DAYS = int(os.getenv("PROGRESS_SERIES_MAX_DAYS", "731"))
+
+# random vocabulary/tip: the id index is per process, its version and the last CONTENT_NO_REPEAT
+# items of a user are kept in the default cache, which is per process with locmem: with several
+# workers use CACHE_BACKEND=db (run manage.py createcachetable) or file (one node) so they see the
+# content changes at once and no worker repeats them, with locmem after CONTENT_INDEX_TTL seconds
+CONTENT_INDEX_TTL = int(os.getenv("CONTENT_INDEX_TTL", "300"))
+CONTENT_NO_REPEAT = int(os.getenv("CONTENT_NO_REPEAT", "5"))
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem")
+CACHES = {
+    'default': {
+        'locmem': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'db': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'speakease_cache'},
+        'file': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                 'LOCATION': str(BASE_DIR / 'data' / 'cache')},
+    }[CACHE_BACKEND]
+}
+# seconds a CDN/browser can reuse the public random vocabulary/tip responses
+PUBLIC_CONTENT_MAX_AGE = int(os.getenv("PUBLIC_CONTENT_MAX_AGE", "60"))
+
+# uploads are decoded by piping them to ffmpeg; uploads up to this size stay in memory,
+# bigger ones are spooled by django to a temp file that ffmpeg reads in place
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+AUDIO_DECODE_TIMEOUT = int(os.getenv("AUDIO_DECODE_TIMEOUT", "120"))
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv("FILE_UPLOAD_MAX_MEMORY_SIZE", str(10 * 1024 * 1024)))
+
+# live voice training websocket (ws/voice/, run with an ASGI server: uvicorn speakEase_backend.asgi:application)
+# text of the segment being spoken every STREAM_PARTIAL_SECONDS (0 = only after the pauses)
+STREAM_PARTIAL_SECONDS = float(os.getenv("STREAM_PARTIAL_SECONDS", "2"))
+STREAM_METRICS_INTERVAL_MS = int(os.getenv("STREAM_METRICS_INTERVAL_MS", "250"))
+STREAM_MAX_SECONDS = int(os.getenv("STREAM_MAX_SECONDS", "600"))
+
+# per stage timings: Server-Timing response header and GET /metrics (prometheus, per worker
+# process with a pid label, scrape every worker and aggregate the buckets),
+# /metrics needs "Authorization: Bearer <METRICS_TOKEN>" and returns 404 while METRICS_TOKEN is not set
+SERVER_TIMING = os.getenv("SERVER_TIMING", "True") == "True"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
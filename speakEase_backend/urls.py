@@ -18,10 +18,12 @@ from django.contrib import admin
 from django.conf import settings
 from django.conf.urls.static import static
 from django.urls import path, include
+from speakEase_backend_app.views import MetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/', include('speakEase_backend_app.urls'))
+    path('api/', include('speakEase_backend_app.urls')),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
 
 
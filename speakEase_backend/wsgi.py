@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'speakEase_backend.settings')
 
 application = get_wsgi_application()
+
+
+# with WARMUP_MODELS_ON_START=True load the models the readiness check needs while the server
+# starts (with gunicorn --preload the workers share them), all of them when READINESS_RESOURCES is empty
+from django.conf import settings
+
+if settings.WARMUP_MODELS_ON_START:
+    from speakEase_backend_app.ai_modules import registry
+    registry.warm_up(settings.READINESS_RESOURCES or None)
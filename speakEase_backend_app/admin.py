@@ -1,9 +1,11 @@
 from django.contrib import admin
-from .models import TrainingSession, ProgressAnalytics, Tip, VocabularyWord
+from .models import TrainingSession, ProgressAnalytics, Tip, VocabularyWord, AnalysisJob, DailyProgress
 
 # Register your models here.
 admin.site.register(TrainingSession)
 admin.site.register(ProgressAnalytics)
 admin.site.register(Tip)
 # to add vocably
-admin.site.register(VocabularyWord)
\ No newline at end of file
+admin.site.register(VocabularyWord)
+admin.site.register(AnalysisJob)
+admin.site.register(DailyProgress)
@@ -1,3 +1,4 @@
-from .audio_analysis import audio_analyzer  
+from .audio_analysis import audio_analyzer, AudioBuffer
+from .resources import registry
 
-__all__ = ['audio_analyzer']
\ No newline at end of file
+__all__ = ['audio_analyzer', 'AudioBuffer', 'registry']
\ No newline at end of file
@@ -0,0 +1,239 @@
+import os
+import random
+import threading
+import time
+from ..instrumentation import record_stage, stage
+from .inference_server import transcribe_remote, request
+
+# speech recognition backends, chosen with settings.ASR_BACKEND
+#   hf    the transformers whisper model (fp32)
+#   int8  the same model with torch dynamic int8 quantization of the Linear layers (CPU)
+#   onnx  the model exported to ONNX Runtime with optimum
+#   stub  no model: deterministic text from the audio, for benchmarks and load tests
+#   remote  no model in this process: the audio is sent to the shared inference server
+
+
+class ASRBackend:
+    name = 'base'
+
+    def __init__(self, model_name, language="english"):
+        self.model_name = model_name
+        self.language = language
+        self.model = None
+        self.processor = None
+        self.load_seconds = None
+        self.clips = 0
+        self.total_seconds = 0.0
+        self.last_clip_seconds = None
+
+    def load(self):
+        start = time.perf_counter()
+        self._load()
+        self.load_seconds = round(time.perf_counter() - start, 3)
+        return self
+
+    # word timestamps need the cross attentions of the decoder
+    supports_word_timestamps = True
+
+    # audios: list of AudioBuffer, returns one text per audio in the same order, or with
+    # timestamps ('segment' or 'word') one {'text', 'segments', 'words'} dict per audio
+    def transcribe_batch(self, audios, timestamps=None):
+        start = time.perf_counter()
+        texts = self._transcribe_batch(audios, timestamps)
+        self._record(audios, time.perf_counter() - start)
+        return texts
+
+    # the per clip latency of stats(), kept here so every backend counts the same way
+    def _record(self, audios, elapsed):
+        self.clips += len(audios)
+        self.total_seconds += elapsed
+        self.last_clip_seconds = round(elapsed / max(1, len(audios)), 4)
+
+    # the whisper generate call, the same for the transformers and the onnx models
+    def _transcribe_batch(self, audios, timestamps):
+        from .audio_analysis import get_transcriptions_whisper_batch
+        if timestamps == 'word' and not self.supports_word_timestamps:
+            timestamps = 'segment'
+        return get_transcriptions_whisper_batch(audios, self.model, self.processor, self.language, timestamps=timestamps)
+
+    def stats(self):
+        return {
+            'backend': self.name,
+            'model': self.model_name,
+            'load_seconds': self.load_seconds,
+            'clips': self.clips,
+            'average_clip_seconds': round(self.total_seconds / self.clips, 4) if self.clips else None,
+            'last_clip_seconds': self.last_clip_seconds,
+        }
+
+    def _load(self):
+        raise NotImplementedError
+
+
+class HFWhisperBackend(ASRBackend):
+    name = 'hf'
+
+    def _device(self):
+        import torch
+        return "cuda:0" if torch.cuda.is_available() else "cpu"
+
+    def _load(self):
+        from transformers import WhisperProcessor, WhisperForConditionalGeneration
+        self.processor = WhisperProcessor.from_pretrained(self.model_name)
+        self.model = WhisperForConditionalGeneration.from_pretrained(self.model_name).to(self._device())
+        self.model.eval()
+
+
+# Source helper: https://pytorch.org/docs/stable/generated/torch.ao.quantization.quantize_dynamic.html
+class QuantizedWhisperBackend(HFWhisperBackend):
+    name = 'int8'
+
+    # dynamic quantization only runs on the CPU
+    def _device(self):
+        return "cpu"
+
+    def _load(self):
+        import torch
+        super()._load()
+        self.model = torch.ao.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+# Source helper: https://huggingface.co/docs/optimum/onnxruntime/usage_guides/models
+class ONNXWhisperBackend(ASRBackend):
+    name = 'onnx'
+    # the exported decoder does not return the cross attentions
+    supports_word_timestamps = False
+
+    def __init__(self, model_name, language="english", export_dir=None):
+        super().__init__(model_name, language)
+        self.export_dir = export_dir
+
+    def _load(self):
+        from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+        from transformers import WhisperProcessor
+        self.processor = WhisperProcessor.from_pretrained(self.model_name)
+        # export once and reuse the exported model on the next start
+        if self.export_dir and os.path.isdir(self.export_dir):
+            self.model = ORTModelForSpeechSeq2Seq.from_pretrained(self.export_dir)
+        else:
+            self.model = ORTModelForSpeechSeq2Seq.from_pretrained(self.model_name, export=True)
+            if self.export_dir:
+                self.model.save_pretrained(self.export_dir)
+
+
+# the words the stub "hears", a few repeats so the repetition metric has work to do
+STUB_WORDS = (
+    "the quick brown fox jumps over the lazy dog while we practice speaking clearly "
+    "every day and keep a steady pace with short natural pauses between the ideas"
+).split()
+
+
+class StubBackend(ASRBackend):
+    name = 'stub'
+
+    def __init__(self, model_name, language="english", words_per_second=2.2, latency_ms=0):
+        super().__init__(model_name, language)
+        self.words_per_second = words_per_second
+        # fake model time per batch, to load test the queueing without a model
+        self.latency_ms = latency_ms
+
+    def _load(self):
+        pass
+
+    def _transcribe_batch(self, audios, timestamps):
+        from .audio_analysis import as_audio_buffer
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        texts = []
+        for audio in audios:
+            audio = as_audio_buffer(audio)
+            # the same audio always gives the same text
+            rng = random.Random(audio.digest)
+            count = max(1, round(audio.duration * self.words_per_second))
+            words = [rng.choice(STUB_WORDS) for _ in range(count)]
+            text = " ".join(words)
+            if not timestamps:
+                texts.append(text)
+                continue
+            # the words spread evenly over the clip
+            step = audio.duration / count
+            timed = [
+                {'word': word, 'start': round(i * step, 2), 'end': round((i + 0.8) * step, 2)}
+                for i, word in enumerate(words)
+            ]
+            texts.append({
+                'text': text,
+                'segments': [{'text': text, 'start': 0.0, 'end': round(audio.duration, 2)}],
+                'words': timed if timestamps == 'word' else None,
+            })
+        return texts
+
+
+# Source helper: https://docs.python.org/3/library/socketserver.html
+class RemoteBackend(ASRBackend):
+    name = 'remote'
+
+    def __init__(self, model_name, language="english", address=None, timeout=60, fallback=None):
+        super().__init__(model_name, language)
+        self.address = address
+        self.timeout = timeout
+        # loader of a local backend used when the server can not be reached, None raises instead
+        self.fallback = fallback
+        self._fallback_backend = None
+        self._fallback_lock = threading.Lock()
+        self.fallbacks = 0
+
+    # the model lives in the server, loading only checks that it answers
+    def _load(self):
+        try:
+            request(self.address, {'op': 'stats'}, timeout=self.timeout)
+        except OSError as e:
+            if self.fallback is None:
+                raise
+            print(f"Inference server {self.address} is not reachable: {e}")
+
+    def _transcribe_batch(self, audios, timestamps):
+        try:
+            with stage('inference_server'):
+                texts, stages = transcribe_remote(self.address, audios, timestamps, self.timeout)
+        except OSError as e:
+            # connection refused, socket missing or timed out
+            if self.fallback is None:
+                raise
+            print(f"Inference server {self.address} failed ({e}), transcribing locally")
+            self.fallbacks += 1
+            return self.local_backend().transcribe_batch(audios, timestamps)
+        # the model timings of the server show up in this request's Server-Timing
+        for name, seconds in stages:
+            record_stage(name, seconds)
+        return texts
+
+    def local_backend(self):
+        if self._fallback_backend is None:
+            with self._fallback_lock:
+                if self._fallback_backend is None:
+                    self._fallback_backend = self.fallback()
+        return self._fallback_backend
+
+    def stats(self):
+        return {
+            **super().stats(),
+            'address': self.address,
+            'fallbacks': self.fallbacks,
+            'fallback_loaded': self._fallback_backend is not None,
+        }
+
+
+ASR_BACKENDS = {
+    HFWhisperBackend.name: HFWhisperBackend,
+    QuantizedWhisperBackend.name: QuantizedWhisperBackend,
+    ONNXWhisperBackend.name: ONNXWhisperBackend,
+    StubBackend.name: StubBackend,
+    RemoteBackend.name: RemoteBackend,
+}
+
+
+def create_backend(name, model_name, **kwargs):
+    if name not in ASR_BACKENDS:
+        raise ValueError(f"Unknown ASR backend '{name}', choose from {', '.join(ASR_BACKENDS)}")
+    return ASR_BACKENDS[name](model_name, **kwargs)
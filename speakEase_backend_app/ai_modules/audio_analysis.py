@@ -4,33 +4,87 @@
 
 import speech_recognition as sr
 import os 
-from pydub import AudioSegment
-from pydub.silence import split_on_silence
+import hashlib
 import numpy as np
-import pronouncing
+import librosa
 
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import partial
+from types import SimpleNamespace
+from django.conf import settings
+from .batching import BatchScheduler
+from ..instrumentation import stage
+from .resources import registry
+from .lexicon import Lexicon, build_lexicon
+from .asr_backends import create_backend
+from .text_metrics import as_token_stream
 
-from transformers import WhisperProcessor, WhisperForConditionalGeneration
-import torch
-import librosa
-import torch
 
-import mutagen
-from mutagen.wave import WAVE
-from collections import Counter
+# make sure an nltk package is on disk, download it only the first time
+def ensure_nltk_data(resource_path, package):
+    import nltk
+    try:
+        nltk.data.find(resource_path)
+    except LookupError:
+        nltk.download(package)
 
+# Carnegie Mellon University Pronouncing Dictionary as a memory mapped lexicon file
+# (built once with `python manage.py build_lexicon`, or here on first use if missing)
+# the cmudict package comes with pronouncing, so no download is needed
+def build_pronouncing_lexicon(path):
+    import cmudict
+    return build_lexicon(cmudict.entries(), path)
 
-# Carnegie Mellon University Pronouncing Dictionary
-import nltk
-nltk.download('cmudict')
-nltk.download('averaged_perceptron_tagger_eng')
-from nltk.corpus import cmudict
-pronouncing_dict = cmudict.dict()
-from difflib import SequenceMatcher
+def load_lexicon():
+    path = str(settings.PRONUNCIATION_LEXICON_PATH)
+    if not os.path.exists(path):
+        build_pronouncing_lexicon(path)
+    return Lexicon(path)
 
 # phoneme generator fallback for unknown words
-from g2p_en import G2p
-g2p = G2p()
+def load_g2p():
+    ensure_nltk_data('taggers/averaged_perceptron_tagger_eng', 'averaged_perceptron_tagger_eng')
+    ensure_nltk_data('corpora/cmudict', 'cmudict')
+    import g2p_en.g2p as g2p_module
+    # G2p.__init__ builds its own dict of the whole cmudict with cmudict.dict(), hand it the
+    # shared memory mapped lexicon instead so that copy is never allocated
+    nltk_cmudict = g2p_module.cmudict
+    g2p_module.cmudict = SimpleNamespace(dict=get_lexicon)
+    try:
+        return g2p_module.G2p()
+    finally:
+        g2p_module.cmudict = nltk_cmudict
+
+whisper_model_name = "openai/whisper-small" 
+
+# load the model and the processor with the backend from settings.ASR_BACKEND (or backend_name)
+def load_whisper(backend_name=None):
+    backend_name = backend_name or getattr(settings, 'ASR_BACKEND', 'hf')
+    options = {}
+    if backend_name == 'onnx':
+        options['export_dir'] = getattr(settings, 'ASR_ONNX_DIR', None)
+    elif backend_name == 'stub':
+        options['latency_ms'] = getattr(settings, 'ASR_STUB_LATENCY_MS', 0)
+    elif backend_name == 'remote':
+        options['address'] = settings.INFERENCE_SERVER_ADDRESS
+        options['timeout'] = getattr(settings, 'INFERENCE_SERVER_TIMEOUT', 60)
+        fallback = getattr(settings, 'INFERENCE_SERVER_FALLBACK', '')
+        if fallback and fallback != 'remote':
+            options['fallback'] = partial(load_whisper, fallback)
+    return create_backend(backend_name, whisper_model_name, **options).load()
+
+registry.register('lexicon', load_lexicon)
+registry.register('g2p', load_g2p)
+registry.register('whisper', load_whisper)
+
+def get_lexicon():
+    return registry.get('lexicon')
+
+def get_g2p():
+    return registry.get('g2p')
+
+def get_whisper():
+    return registry.get('whisper')
 
 # Creating a Recognizer instance
 r = sr.Recognizer()
@@ -43,60 +97,208 @@ def transcribe_audio(path):
         # try converting it to text
         text = r.recognize_google(audio_listened)
     return text
-device = "cuda:0" if torch.cuda.is_available() else "cpu"
-whisper_model_name = "openai/whisper-small" 
 
-# load the model and the processor
-whisper_processor = WhisperProcessor.from_pretrained(whisper_model_name)
-whisper_model = WhisperForConditionalGeneration.from_pretrained(whisper_model_name).to(device)
-
-def load_audio(audio_path):
-  # load our wav file
-  speech, sr = librosa.load(audio_path, sr=16000)
-  speech = librosa.util.normalize(speech) 
-  return torch.tensor(speech)
-
-def get_transcription_whisper(audio_path, model, processor, language="english", skip_special_tokens=True):
-  # resample from whatever the audio sampling rate to 16000
-  speech = load_audio(audio_path)
-  # get the input features from the audio file
-  input_features = processor(speech, return_tensors="pt", sampling_rate=16000).input_features.to(device)
+# whisper and every other step of the analysis work on 16kHz mono audio
+TARGET_SAMPLE_RATE = 16000
+# librosa default frames for the energy analysis
+FRAME_LENGTH = 2048
+HOP_LENGTH = 512
+
+# start and end (exclusive) indexes of every run of True values, without a python loop
+def find_runs(mask):
+    padded = np.concatenate(([False], np.asarray(mask, dtype=bool), [False]))
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    return changes[0::2], changes[1::2]
+
+# decoded audio shared by the whole analysis pipeline, so one upload is decoded
+# and resampled only once instead of once per analysis function
+class AudioBuffer:
+    def __init__(self, samples, sample_rate=TARGET_SAMPLE_RATE, offset=0.0):
+        self.samples = np.asarray(samples, dtype=np.float32)
+        self.sample_rate = sample_rate
+        # start in seconds in the original recording (chunks)
+        self.offset = offset
+        self._normalized = None
+        self._digest = None
+        self._rms = {}
+
+    # load any audio file straight to 16kHz mono
+    @classmethod
+    def from_file(cls, audio_path):
+        samples, sr_val = librosa.load(audio_path, sr=TARGET_SAMPLE_RATE)
+        return cls(samples, sr_val)
+
+    @property
+    def duration(self):
+        # in seconds
+        return len(self.samples) / self.sample_rate
+
+    # peak normalized copy for whisper, computed once on first use
+    @property
+    def normalized(self):
+        if self._normalized is None:
+            self._normalized = librosa.util.normalize(self.samples)
+        return self._normalized
+
+    # rms energy per frame, computed once and shared by the pause detection and the chunking
+    def rms(self, frame_length=FRAME_LENGTH, hop_length=HOP_LENGTH):
+        key = (frame_length, hop_length)
+        if key not in self._rms:
+            self._rms[key] = librosa.feature.rms(y=self.samples, frame_length=frame_length, hop_length=hop_length)[0]
+        return self._rms[key]
+
+    # sha256 of the decoded pcm, the same recording gives the same digest whatever the container
+    @property
+    def digest(self):
+        if self._digest is None:
+            h = hashlib.sha256(str(self.sample_rate).encode())
+            h.update(np.ascontiguousarray(self.samples).tobytes())
+            self._digest = h.hexdigest()
+        return self._digest
+
+# accept either an AudioBuffer or a path to an audio file
+def as_audio_buffer(audio):
+    if isinstance(audio, AudioBuffer):
+        return audio
+    return AudioBuffer.from_file(audio)
+
+# transcribe several clips with one generate call (whisper pads every clip to 30s anyway),
+# timestamps='segment' or 'word' returns dicts with the text, segments and words instead of texts
+def get_transcriptions_whisper_batch(audios, model, processor, language="english", skip_special_tokens=True, timestamps=None):
+  # the buffers are already resampled to 16000
+  with stage('load_audio'):
+    speeches = [as_audio_buffer(audio).normalized for audio in audios]
+  # get the input features for all the clips as one batch
+  with stage('whisper_processor'):
+    input_features = processor(speeches, return_tensors="pt", sampling_rate=16000).input_features.to(model.device)
   # get the forced decoder ids
-  forced_decoder_ids = processor.get_decoder_prompt_ids(language=language, task="transcribe")
-  # generate the transcription
-  predicted_ids = model.generate(input_features, forced_decoder_ids=forced_decoder_ids)
-  # decode the predicted ids
-  transcription = processor.batch_decode(predicted_ids, skip_special_tokens=skip_special_tokens)[0]
-  return transcription
+  forced_decoder_ids = processor.get_decoder_prompt_ids(language=language, task="transcribe", no_timestamps=not timestamps)
+  if not timestamps:
+    # generate the transcriptions
+    with stage('whisper_generate'):
+      predicted_ids = model.generate(input_features, forced_decoder_ids=forced_decoder_ids)
+    # decode the predicted ids, one text per clip in the same order
+    with stage('whisper_decode'):
+      return processor.batch_decode(predicted_ids, skip_special_tokens=skip_special_tokens)
 
-def detect_mispronunciations(transcribed_text):
-    transcribed_words = transcribed_text.lower().split()
-    
-    mispronounced = []
-    valid_words = []
-    
-    # Check each word against CMU dictionary
-    for word in transcribed_words:
-        word_clean = word.lower().strip('.,!?;:')
-        
-        phones = pronouncing.phones_for_word(word_clean)
-        
-        if not phones:      
-            mispronounced.append(word_clean)
+  # Source helper: https://huggingface.co/docs/transformers/model_doc/whisper#transformers.WhisperForConditionalGeneration.generate
+  # the timestamp tokens (segments) and the cross attention token times (words) come from the same generate call
+  words = timestamps == 'word'
+  with stage('whisper_generate'):
+    output = model.generate(
+      input_features, forced_decoder_ids=forced_decoder_ids, return_timestamps=True,
+      return_token_timestamps=words, return_dict_in_generate=words,
+    )
+  sequences = output.sequences if words else output
+  with stage('whisper_decode'):
+    decoded = processor.batch_decode(sequences, skip_special_tokens=True, output_offsets=True)
+    results = []
+    for i, item in enumerate(decoded):
+      duration = as_audio_buffer(audios[i]).duration
+      results.append({
+        'text': item['text'],
+        'segments': [
+          # the last segment has no end time when the clip ends mid sentence
+          {'text': offset['text'].strip(), 'start': offset['timestamp'][0], 'end': offset['timestamp'][1] or duration}
+          for offset in item['offsets']
+        ],
+        'words': group_word_timestamps(processor.tokenizer, sequences[i].tolist(), output.token_timestamps[i].tolist()) if words else None,
+      })
+    return results
+
+# join the whisper sub word tokens into words with their start/end time in seconds,
+# a token starting with a space starts a new word, punctuation stays on the word before
+def group_word_timestamps(tokenizer, token_ids, token_times):
+  words = []
+  for i, token_id in enumerate(token_ids):
+    # special and timestamp tokens come after the text vocabulary
+    if token_id >= tokenizer.eos_token_id:
+      continue
+    piece = tokenizer.convert_ids_to_tokens(token_id)
+    start = token_times[i]
+    end = token_times[i + 1] if i + 1 < len(token_times) else start
+    text = tokenizer.convert_tokens_to_string([piece])
+    if words and not (piece.startswith('\u0120') and any(c.isalnum() for c in text)):
+      words[-1]['tokens'].append(piece)
+      words[-1]['end'] = end
+    else:
+      words.append({'tokens': [piece], 'start': start, 'end': end})
+  return [
+    {'word': tokenizer.convert_tokens_to_string(word['tokens']).strip(), 'start': round(word['start'], 2), 'end': round(word['end'], 2)}
+    for word in words
+  ]
+
+# the text of a transcription result (texts, or dicts when timestamps are on)
+def transcript_text(result):
+  return result['text'] if isinstance(result, dict) else result
+
+# the model is loaded by the first batch, not at import
+def run_whisper_batch(audios):
+  return get_whisper().transcribe_batch(audios, timestamps=getattr(settings, 'WHISPER_TIMESTAMPS', '') or None)
+
+# whisper only hears the first 30s of every clip
+WHISPER_MAX_SECONDS = 30
+
+# split long audio at the silences into chunks of at most max_seconds,
+# short audio is returned as one chunk
+def split_into_chunks(audio, max_seconds=WHISPER_MAX_SECONDS, top_db=35):
+    audio = as_audio_buffer(audio)
+    max_len = int(max_seconds * audio.sample_rate)
+    if len(audio.samples) <= max_len:
+        return [audio]
+
+    # Source helper: https://librosa.org/doc/main/generated/librosa.effects.split.html
+    # the non silent intervals (like librosa.effects.split), the chunks are cut between them
+    db = librosa.amplitude_to_db(audio.rms(), ref=np.max)
+    starts, ends = find_runs(db > -top_db)
+    starts = np.minimum(starts * HOP_LENGTH, len(audio.samples))
+    ends = np.minimum(ends * HOP_LENGTH, len(audio.samples))
+    intervals = zip(starts.tolist(), ends.tolist())
+    chunks = []
+    start = end = None
+    for s, e in intervals:
+        # speech without any pause longer than the window is cut hard
+        while e - s > max_len:
+            if start is not None:
+                chunks.append((start, end))
+                start = None
+            chunks.append((s, s + max_len))
+            s += max_len
+        if start is None:
+            start, end = s, e
+        elif e - start <= max_len:
+            end = e
         else:
-            valid_words.append(word_clean)
-            
+            chunks.append((start, end))
+            start, end = s, e
+    if start is not None:
+        chunks.append((start, end))
+
+    return [AudioBuffer(audio.samples[s:e], audio.sample_rate, audio.offset + s / audio.sample_rate) for s, e in chunks]
+
+# concurrent requests in this process share one generate call
+whisper_scheduler = BatchScheduler(
+    run_whisper_batch,
+    max_batch_size=getattr(settings, 'WHISPER_BATCH_MAX_SIZE', 8),
+    max_wait_ms=getattr(settings, 'WHISPER_BATCH_MAX_WAIT_MS', 30),
+    name='whisper',
+)
+
+def detect_mispronunciations(transcribed_text):
+    # words not in the CMU dictionary, looked up once per word by the token stream
+    tokens = as_token_stream(transcribed_text)
+    mispronounced = tokens.mispronounced
+
     return {
         'mispronounced_words': mispronounced,
-        'valid_words': valid_words,
-        'total_words': len(transcribed_words),
+        'valid_words': tokens.valid,
+        'total_words': tokens.word_count,
         'mispronunciation_count': len(mispronounced)
     }
     
-def get_audio_duration(audio_path):
+def get_audio_duration(audio):
     try:
-        y, sr_val = librosa.load(audio_path)
-        length = librosa.get_duration(y=y, sr=sr_val)  # in seconds
+        length = as_audio_buffer(audio).duration  # in seconds
         
         hours = int(length // 3600)
         remaining = length % 3600
@@ -109,35 +311,26 @@ def get_audio_duration(audio_path):
         return 0, 0, 0
 
 def detect_repeated_words(transcribed_text):
-    words = transcribed_text.lower().split()
-    # Common stop words to ignore
-    stop_words = {'the', 'a', 'an', 'and', 'or', 'is', 'are', 'was', 'were', 
-                  'be', 'been', 'of', 'in', 'to', 'for', 'i', 'you', 'he', 'she', 'it'}
-    # Remove stop words and punctuation
-    filtered_words = []
-    for word in words:
-        word_clean = word.lower().strip('.,!?;:')
-        if word_clean not in stop_words and word_clean:
-            filtered_words.append(word_clean)
-    
-    # Count word frequencies
-    word_counts = Counter(filtered_words)
+    # stop words and punctuation are removed by the token stream
+    tokens = as_token_stream(transcribed_text)
     
     # Get words that appear more than once
-    repeated_words = {word: count for word, count in word_counts.items() if count > 1}
+    repeated_words = tokens.repeated
     
     return {
         'repeated_words': repeated_words,
         'total_repeated': len(repeated_words),
-        'all_word_counts': word_counts
+        'all_word_counts': tokens.word_counts
     }
     
 # Calculate speech rate (words per minute - WPM)
 def calculate_speech_rate(transcribed_text, audio_duration_seconds):
     # Count words in transcription
-    words = transcribed_text.lower().split()
-    word_count = len(words)
-    
+    word_count = as_token_stream(transcribed_text).word_count
+    return speech_rate(word_count, audio_duration_seconds)
+
+# the rate of words already counted (the live sessions keep a running count)
+def speech_rate(word_count, audio_duration_seconds):
     # Convert duration from seconds to minutes
     duration_minutes = audio_duration_seconds / 60
     
@@ -164,41 +357,113 @@ def calculate_speech_rate(transcribed_text, audio_duration_seconds):
     
 
 # source helper: https://github.com/ahmedayman9/Audio-Silence-Detection-and-Pause-Percentage-Calculation/blob/main/Pauses%20detection.ipynb
-def detect_pauses(audio_path, threshold=0.005):
+def detect_pauses(audio, threshold=0.005, min_pause=0.3, hangover=0.1):
     try:
-        # Load audio file
-        y, sr_val = librosa.load(audio_path)
-        energy = librosa.feature.rms(y=y)
+        # use the already decoded audio and its rms frames
+        audio = as_audio_buffer(audio)
+        energy = audio.rms()
         
         #silence less sensitive 
-        silence_indices = np.where(energy < threshold)[1]
+        silent = energy < threshold
         
-        silence_times = librosa.frames_to_time(silence_indices, sr=sr_val)
-        frame_duration = librosa.get_duration(y=y, sr=sr_val) / len(energy[0])
+        frame_duration = audio.duration / len(energy)
         
-        total_silence_time = round(frame_duration * len(silence_times), 2)
-        total_audio_time = len(y) / sr_val
+        total_silence_time = round(frame_duration * np.count_nonzero(silent), 2)
+        total_audio_time = audio.duration
         pauses_percentage = round((total_silence_time / total_audio_time) * 100, 2)
         
+        pause_segments = find_pause_segments(silent, frame_duration, min_pause, hangover)
+        lengths = [segment['length'] for segment in pause_segments]
+        
         return {
             'total_silence_time': total_silence_time,
             'total_audio_time': total_audio_time,
-            'pauses_percentage': pauses_percentage
+            'pauses_percentage': pauses_percentage,
+            'pause_segments': pause_segments,
+            'pause_count': len(pause_segments),
+            'mean_pause': round(sum(lengths) / len(lengths), 2) if lengths else 0,
+            'longest_pause': max(lengths) if lengths else 0,
         }
     except Exception as e:
         print(f"Error detecting pauses: {e}")
         return None
 
+# the pauses as (start, end, length) in seconds from the silent frames:
+# the first `hangover` seconds after speech still count as speech (word endings, breaths)
+# and silences shorter than `min_pause` are not pauses
+def find_pause_segments(silent, frame_duration, min_pause=0.3, hangover=0.1):
+    starts, ends = find_runs(silent)
+    # no hangover for a silence at the start of the recording
+    hangover_frames = int(round(hangover / frame_duration))
+    starts = np.where(starts > 0, starts + hangover_frames, starts)
+    lengths = (ends - starts) * frame_duration
+    keep = lengths >= min_pause
+    return [
+        {'start': round(start * frame_duration, 2), 'end': round(end * frame_duration, 2), 'length': round(length, 2)}
+        for start, end, length in zip(starts[keep].tolist(), ends[keep].tolist(), lengths[keep].tolist())
+    ]
+
+# fluency from the whisper word (or segment) timestamps: no extra pass over the audio and
+# the measured duration instead of the one sent by the client. The pause keys are the same
+# as detect_pauses so the score can use either
+def timestamp_metrics(words, segments, duration, min_pause=0.3):
+    units = words or segments or []
+    word_count = len(words) if words else sum(len(segment['text'].split()) for segment in segments or [])
+    if not units or duration <= 0:
+        return None
+
+    # the gaps between the words (or segments) are the pauses
+    pause_segments = []
+    for before, after in zip(units, units[1:]):
+        gap = after['start'] - before['end']
+        if gap >= min_pause:
+            pause_segments.append({'start': before['end'], 'end': after['start'], 'length': round(gap, 2)})
+    lengths = [pause['length'] for pause in pause_segments]
+    speech_time = max(0.0, units[-1]['end'] - units[0]['start'] - sum(lengths))
+    silence_time = max(0.0, duration - speech_time)
+
+    return {
+        'source': 'words' if words else 'segments',
+        'duration': round(duration, 2),
+        'speech_time': round(speech_time, 2),
+        'word_count': word_count,
+        'wpm': round(word_count / duration * 60, 2),
+        # words per minute of speaking, without the pauses
+        'articulation_rate': round(word_count / speech_time * 60, 2) if speech_time else 0,
+        'segments': [
+            {
+                'text': segment['text'], 'start': segment['start'], 'end': segment['end'],
+                'wpm': round(len(segment['text'].split()) / (segment['end'] - segment['start']) * 60, 2)
+                if segment['end'] > segment['start'] else 0,
+            }
+            for segment in segments or []
+        ],
+        'total_silence_time': round(silence_time, 2),
+        'total_audio_time': duration,
+        'pauses_percentage': round(silence_time / duration * 100, 2),
+        'pause_segments': pause_segments,
+        'pause_count': len(pause_segments),
+        'mean_pause': round(sum(lengths) / len(lengths), 2) if lengths else 0,
+        'longest_pause': max(lengths) if lengths else 0,
+    }
+
 # Calculate overall score 0-100
 # Source helper : https://stackoverflow.com/questions/27337331/how-do-i-make-a-score-counter-in-python
-def calculate_overall_score(transcribed_text, audio_duration_seconds, audio_path):
+# timing: timestamp_metrics of the transcription, used for the pauses instead of the rms pass
+def calculate_overall_score(transcribed_text, audio_duration_seconds, audio, timing=None):
     score = 100.0
     
-    # Get metrics
-    mis = detect_mispronunciations(transcribed_text)
-    rep = detect_repeated_words(transcribed_text)
-    sr = calculate_speech_rate(transcribed_text, audio_duration_seconds)
-    pa = detect_pauses(audio_path) 
+    # Get metrics, the transcript is tokenized once for the three text metrics
+    with stage('tokenize'):
+        transcribed_text = as_token_stream(transcribed_text)
+    with stage('detect_mispronunciations'):
+        mis = detect_mispronunciations(transcribed_text)
+    with stage('detect_repeated_words'):
+        rep = detect_repeated_words(transcribed_text)
+    with stage('speech_rate'):
+        sr = calculate_speech_rate(transcribed_text, audio_duration_seconds)
+    with stage('detect_pauses'):
+        pa = timing if timing else detect_pauses(audio)
 
     mis_pct = (mis['mispronunciation_count'] / mis['total_words'] * 100) if mis['total_words'] > 0 else 0
     if mis_pct > 25:
@@ -299,19 +564,52 @@ def calculate_overall_score(transcribed_text, audio_duration_seconds, audio_path
         'wpm': wpm,
         'repeated': rep['total_repeated'],
         'pauses_percentage': pa['pauses_percentage'] if pa else 0,
+        'pauses': {
+            'count': pa['pause_count'],
+            'mean': pa['mean_pause'],
+            'longest': pa['longest_pause'],
+            'segments': pa['pause_segments'],
+        } if pa else None,
         'mispronounced_words': mis['mispronounced_words'],
         'repeated_words': rep['repeated_words'],
     }
 
+# segments or words of all the chunks in recording time (None when a chunk has none)
+def shift_timestamps(chunks, results, key):
+    if any(result.get(key) is None for result in results):
+        return None
+    return [
+        {**item, 'start': round(item['start'] + chunk.offset, 2), 'end': round(item['end'] + chunk.offset, 2)}
+        for chunk, result in zip(chunks, results) for item in result[key]
+    ]
+
 # to return calculate_overall_score and transcribe_audio to use it in the view
 class AudioAnalyzer:
-    def calculate_overall_score(self, transcribed_text, audio_duration_seconds, audio_path):
-        return calculate_overall_score(transcribed_text, audio_duration_seconds, audio_path)
+    # decode the audio once and pass the buffer to the other methods
+    def load(self, audio_path):
+        return AudioBuffer.from_file(audio_path)
+
+    def calculate_overall_score(self, transcribed_text, audio_duration_seconds, audio, timing=None):
+        return calculate_overall_score(transcribed_text, audio_duration_seconds, audio, timing)
     
-    def transcribe_audio(self, audio_path):
+    def transcribe_audio(self, audio):
         try:
-            result = get_transcription_whisper(audio_path, whisper_model, whisper_processor)
-            return {'success': True, 'text': result}
+            # long recordings are transcribed in chunks, batched together and joined in order
+            chunks = split_into_chunks(audio, getattr(settings, 'WHISPER_CHUNK_SECONDS', WHISPER_MAX_SECONDS))
+            futures = [whisper_scheduler.submit(chunk) for chunk in chunks]
+            timeout = getattr(settings, 'WHISPER_RESULT_TIMEOUT', 300)
+            try:
+                results = whisper_scheduler.results(futures, timeout)
+            except FutureTimeoutError:
+                print(f"Transcription timed out after {timeout}s ({whisper_scheduler.stats()})")
+                return {'success': False, 'timeout': True, 'error': f"Transcription timed out after {timeout}s"}
+            texts = [transcript_text(result).strip() for result in results]
+            transcription = {'success': True, 'text': " ".join(text for text in texts if text)}
+            if results and isinstance(results[0], dict):
+                # the chunk timestamps start at 0, move them to the recording time
+                transcription['segments'] = shift_timestamps(chunks, results, 'segments')
+                transcription['words'] = shift_timestamps(chunks, results, 'words')
+            return transcription
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
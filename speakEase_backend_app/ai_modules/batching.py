@@ -0,0 +1,140 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from ..instrumentation import collect_stages, current_collector, record_stage
+
+# Source helper: https://docs.python.org/3/library/concurrent.futures.html#future-objects
+# collects transcription requests from concurrent callers and runs them as one batch,
+# a batch is sent when it has max_batch_size clips or the first clip waited max_wait_ms
+class BatchScheduler:
+    def __init__(self, run_batch, max_batch_size=8, max_wait_ms=50, name='batch'):
+        # run_batch takes a list of inputs and returns one result per input, in order
+        self.run_batch = run_batch
+        # prefix of the stage timings (<name>_queue, <name>_batch)
+        self.name = name
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.items = 0
+        # callers that gave up waiting, and when the running batch started (None when idle)
+        self.timeouts = 0
+        self._busy_since = None
+
+    # add one input to the next batch, the returned future gets its own result
+    def submit(self, item):
+        future = Future()
+        self._ensure_started()
+        # the stage timings of the batch are copied to the caller's request
+        self._queue.put((item, future, current_collector(), time.perf_counter()))
+        return future
+
+    # blocking helper for the request code
+    def run(self, item, timeout=None):
+        return self.submit(item).result(timeout)
+
+    # the results of several futures with one deadline, on timeout the ones still queued
+    # are cancelled (the loop skips them) and concurrent.futures.TimeoutError is raised
+    def results(self, futures, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            return [
+                future.result(None if deadline is None else max(0, deadline - time.monotonic()))
+                for future in futures
+            ]
+        except FutureTimeoutError:
+            for future in futures:
+                future.cancel()
+            self.timeouts += 1
+            raise
+
+    # seconds the running batch has taken so far, a stuck model shows up here
+    def busy_seconds(self):
+        busy_since = self._busy_since
+        return time.monotonic() - busy_since if busy_since is not None else 0.0
+
+    # the loop thread died (it is started again by the next submit) or a batch runs too long
+    def stalled(self, max_batch_seconds):
+        thread_dead = self._thread is not None and not self._thread.is_alive()
+        return thread_dead or self.busy_seconds() > max_batch_seconds
+
+    # how many inputs are waiting for the next batch
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'average_batch_size': round(self.items / self.batches, 2) if self.batches else 0,
+            'queue_depth': self.queue_depth(),
+            'timeouts': self.timeouts,
+            'busy_seconds': round(self.busy_seconds(), 3),
+        }
+
+    def _ensure_started(self):
+        # threads do not survive a fork, so start a new one in every worker process
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._loop, name='batch-scheduler', daemon=True)
+            self._thread.start()
+
+    def _collect(self):
+        # wait for the first item, then up to max_wait for more
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            # skip callers that gave up already
+            batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.perf_counter()
+            self._busy_since = time.monotonic()
+            try:
+                with collect_stages() as timings:
+                    results = self.run_batch([item for item, *_ in batch])
+            except Exception as e:
+                for _, future, *_ in batch:
+                    future.set_exception(e)
+                continue
+            finally:
+                self._busy_since = None
+            self.batches += 1
+            self.items += len(batch)
+            record_stage(f"{self.name}_batch", time.perf_counter() - started)
+            # the chunks of one request can share a batch: its collector gets the batch
+            # timings once and the longest queue wait, not one copy per chunk
+            waits = {}
+            for _, _, collector, submitted in batch:
+                waited = started - submitted
+                record_stage(f"{self.name}_queue", waited)
+                if collector is not None:
+                    waits[id(collector)] = (collector, max(waited, waits.get(id(collector), (None, 0))[1]))
+            for collector, waited in waits.values():
+                collector.append((f"{self.name}_queue", waited))
+                collector.extend(timings)
+            for (_, future, *_), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,143 @@
+import subprocess
+import tempfile
+import threading
+import numpy as np
+from django.conf import settings
+
+# Source helper: https://trac.ffmpeg.org/wiki/audio%20types
+# decode any audio ffmpeg understands straight to float32 mono 16kHz pcm through pipes:
+# the upload chunks are written to ffmpeg's stdin by a thread while the pcm is read from
+# stdout, so nothing is written to disk and only the decoded samples are kept in memory
+
+DECODE_SAMPLE_RATE = 16000
+READ_SIZE = 64 * 1024
+# containers that keep their index at the end of the file, ffmpeg must seek to read them
+SEEKABLE_ONLY_FORMATS = {'.mp4', '.m4a', '.mov', '.3gp'}
+
+
+# raised when ffmpeg is missing, fails or times out
+class AudioDecodeError(Exception):
+    pass
+
+
+def _ffmpeg_command(source):
+    return [
+        getattr(settings, 'FFMPEG_BINARY', 'ffmpeg'), '-hide_banner', '-loglevel', 'error', '-i', source,
+        '-vn', '-f', 'f32le', '-acodec', 'pcm_f32le', '-ac', '1', '-ar', str(DECODE_SAMPLE_RATE),
+        'pipe:1',
+    ]
+
+
+def _write_chunks(stdin, chunks, errors):
+    try:
+        for chunk in chunks:
+            stdin.write(chunk)
+    except (BrokenPipeError, ValueError):
+        # ffmpeg stopped reading (bad input or killed), its exit code tells why
+        pass
+    except Exception as e:
+        errors.append(e)
+    finally:
+        try:
+            stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+
+
+def _read_tail(stream, tail):
+    # keep only the end of stderr, ffmpeg prints the reason last
+    for line in stream:
+        tail.append(line)
+        del tail[:-20]
+
+
+# run ffmpeg on `source` (a path, or 'pipe:0' fed with `chunks`) and return the samples
+def _run_ffmpeg(source, chunks=None, timeout=None):
+    timeout = timeout or getattr(settings, 'AUDIO_DECODE_TIMEOUT', 120)
+    try:
+        process = subprocess.Popen(
+            _ffmpeg_command(source),
+            stdin=subprocess.PIPE if chunks is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except OSError as e:
+        raise AudioDecodeError(f"ffmpeg is not available: {e}")
+
+    threads = []
+    write_errors = []
+    stderr_tail = []
+    timed_out = threading.Event()
+
+    # kill ffmpeg when it takes too long, the reads below then end
+    def kill():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, kill)
+    try:
+        timer.start()
+        if chunks is not None:
+            threads.append(threading.Thread(target=_write_chunks, args=(process.stdin, chunks, write_errors), daemon=True))
+        threads.append(threading.Thread(target=_read_tail, args=(process.stderr, stderr_tail), daemon=True))
+        for thread in threads:
+            thread.start()
+
+        pcm = bytearray()
+        while True:
+            block = process.stdout.read(READ_SIZE)
+            if not block:
+                break
+            pcm += block
+        returncode = process.wait()
+    finally:
+        timer.cancel()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        for thread in threads:
+            thread.join(timeout=5)
+        process.stdout.close()
+        process.stderr.close()
+
+    if write_errors:
+        raise AudioDecodeError(f"Could not read the upload: {write_errors[0]}")
+    if returncode != 0:
+        if timed_out.is_set():
+            reason = f"timed out after {timeout}s"
+        else:
+            reason = b''.join(stderr_tail).decode(errors='replace').strip() or f"exit code {returncode}"
+        raise AudioDecodeError(f"ffmpeg failed: {reason}")
+
+    # drop a partial sample if the output was cut
+    usable = len(pcm) - len(pcm) % 4
+    return np.frombuffer(memoryview(pcm)[:usable], dtype='<f4').astype(np.float32, copy=False)
+
+
+# decode a file on disk
+def decode_path(path, timeout=None):
+    return _run_ffmpeg(str(path), timeout=timeout)
+
+
+# decode an iterable of encoded bytes (e.g. UploadedFile.chunks()) without touching disk
+def decode_chunks(chunks, timeout=None):
+    return _run_ffmpeg('pipe:0', chunks=chunks, timeout=timeout)
+
+
+# decode a django UploadedFile: uploads spilled to disk by django are read in place,
+# the in-memory ones are piped to ffmpeg
+def decode_upload(uploaded_file, timeout=None):
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        return decode_path(uploaded_file.temporary_file_path(), timeout=timeout)
+
+    name = (uploaded_file.name or '').lower()
+    if any(name.endswith(ext) for ext in SEEKABLE_ONLY_FORMATS):
+        # mp4 style containers can not be decoded from a pipe, give ffmpeg a seekable
+        # file that is removed as soon as the decode ends
+        with tempfile.NamedTemporaryFile(suffix=name[name.rfind('.'):]) as scratch:
+            for chunk in uploaded_file.chunks():
+                scratch.write(chunk)
+            scratch.flush()
+            return decode_path(scratch.name, timeout=timeout)
+
+    return decode_chunks(uploaded_file.chunks(), timeout=timeout)
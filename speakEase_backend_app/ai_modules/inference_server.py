@@ -0,0 +1,209 @@
+import json
+import os
+import socket
+import socketserver
+import struct
+from functools import partial
+import numpy as np
+from .batching import BatchScheduler
+from ..instrumentation import collect_stages
+
+# one process per node owns whisper and its batching (python manage.py run_inference_server),
+# the web and analysis workers with ASR_BACKEND=remote send it the decoded pcm instead of
+# loading their own copy of the model.
+#
+# every message is a 4 byte big endian header length, the json header, then header['payload']
+# bytes. A transcribe request is
+#   {"op": "transcribe", "timestamps": null|"segment"|"word", "clips": [{"samples", "sample_rate"}], "payload"}
+# followed by the float32 little endian samples of all the clips, the answer is
+#   {"results": [text or {"text", "segments", "words"}, ...], "stages": [[name, seconds], ...]}
+# or {"error": message}. {"op": "stats"} returns the backend and batching stats.
+
+MAX_HEADER_BYTES = 1024 * 1024
+# 10 minutes of 16kHz float32 audio per clip, 8 clips
+MAX_PAYLOAD_BYTES = 8 * 600 * 16000 * 4
+TIMESTAMP_MODES = (None, 'segment', 'word')
+
+
+# raised by the client when the server answered with an error
+class InferenceServerError(Exception):
+    pass
+
+
+# "unix:/path/to/socket" or "host:port"
+def parse_address(address):
+    if address.startswith('unix:'):
+        return socket.AF_UNIX, address[len('unix:'):]
+    host, _, port = address.rpartition(':')
+    return socket.AF_INET, (host or '127.0.0.1', int(port))
+
+
+def recv_exactly(sock, size):
+    data = bytearray(size)
+    view = memoryview(data)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if not count:
+            raise ConnectionError('Connection closed by the other side')
+        received += count
+    return bytes(data)
+
+
+def send_message(sock, header, payload=b''):
+    header = dict(header, payload=len(payload))
+    data = json.dumps(header).encode()
+    sock.sendall(struct.pack('>I', len(data)) + data)
+    if payload:
+        sock.sendall(payload)
+
+
+# returns (header, payload), None when the other side closed the connection between messages
+def recv_message(sock):
+    prefix = sock.recv(4, socket.MSG_WAITALL)
+    if not prefix:
+        return None
+    if len(prefix) < 4:
+        prefix += recv_exactly(sock, 4 - len(prefix))
+    (length,) = struct.unpack('>I', prefix)
+    if length > MAX_HEADER_BYTES:
+        raise ValueError(f"Header too large ({length} bytes)")
+    header = json.loads(recv_exactly(sock, length))
+    size = header.pop('payload', 0)
+    if size > MAX_PAYLOAD_BYTES:
+        raise ValueError(f"Payload too large ({size} bytes)")
+    return header, recv_exactly(sock, size) if size else b''
+
+
+# one request/answer on a new connection (unix sockets connect in microseconds),
+# the timeout covers the connect, the queueing and the model time
+def request(address, header, payload=b'', timeout=None):
+    family, target = parse_address(address)
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(target)
+        send_message(sock, header, payload)
+        answer = recv_message(sock)
+    if answer is None:
+        raise ConnectionError('The inference server closed the connection')
+    header, payload = answer
+    if 'error' in header:
+        raise InferenceServerError(header['error'])
+    return header, payload
+
+
+# client side of the transcribe op: returns (results, stages)
+def transcribe_remote(address, audios, timestamps=None, timeout=None):
+    from .audio_analysis import as_audio_buffer
+    buffers = [as_audio_buffer(audio) for audio in audios]
+    header = {
+        'op': 'transcribe',
+        'timestamps': timestamps,
+        'clips': [{'samples': len(buffer.samples), 'sample_rate': buffer.sample_rate} for buffer in buffers],
+    }
+    payload = b''.join(buffer.samples.astype('<f4', copy=False).tobytes() for buffer in buffers)
+    answer, _ = request(address, header, payload, timeout)
+    return answer['results'], answer.get('stages', [])
+
+
+class InferenceServer:
+    def __init__(self, address, backend, max_batch_size=8, max_wait_ms=30, result_timeout=None):
+        self.address = address
+        self.backend = backend
+        # seconds a request waits for its batch, the client gets an error after it
+        self.result_timeout = result_timeout
+        # the clips of all the connected workers are batched together, one queue per timestamp mode
+        # since the mode changes the generate call
+        self.schedulers = {
+            mode: BatchScheduler(
+                partial(backend.transcribe_batch, timestamps=mode),
+                max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, name='whisper',
+            )
+            for mode in TIMESTAMP_MODES
+        }
+        self._server = None
+
+    def stats(self):
+        batches = [scheduler.stats() for scheduler in self.schedulers.values()]
+        return {
+            'asr': self.backend.stats(),
+            'batches': sum(stats['batches'] for stats in batches),
+            'items': sum(stats['items'] for stats in batches),
+            'queue_depth': sum(stats['queue_depth'] for stats in batches),
+        }
+
+    def transcribe(self, header, payload):
+        from .audio_analysis import AudioBuffer
+        scheduler = self.schedulers.get(header.get('timestamps'))
+        if scheduler is None:
+            raise ValueError(f"Unknown timestamps mode '{header.get('timestamps')}'")
+        samples = np.frombuffer(payload, dtype='<f4')
+        if sum(clip['samples'] for clip in header['clips']) != len(samples):
+            raise ValueError('The clip lengths do not match the payload')
+
+        with collect_stages() as timings:
+            futures = []
+            position = 0
+            for clip in header['clips']:
+                audio = AudioBuffer(samples[position:position + clip['samples']], clip['sample_rate'])
+                position += clip['samples']
+                futures.append(scheduler.submit(audio))
+            results = scheduler.results(futures, self.result_timeout)
+        return {'results': results, 'stages': [[name, round(seconds, 6)] for name, seconds in timings]}
+
+    def handle(self, header, payload):
+        if header.get('op') == 'transcribe':
+            return self.transcribe(header, payload)
+        if header.get('op') == 'stats':
+            return self.stats()
+        raise ValueError(f"Unknown op '{header.get('op')}'")
+
+    def serve_forever(self):
+        family, target = parse_address(self.address)
+        if family == socket.AF_UNIX:
+            # a socket file left by a server that was killed
+            if os.path.exists(target):
+                os.unlink(target)
+            base = socketserver.ThreadingUnixStreamServer
+        else:
+            base = socketserver.ThreadingTCPServer
+
+        class Server(base):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        inference = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                # a client can send several requests on the same connection
+                while True:
+                    try:
+                        message = recv_message(self.request)
+                    except (OSError, ValueError) as e:
+                        print(f"Inference server: bad request ({e})")
+                        return
+                    if message is None:
+                        return
+                    try:
+                        answer = inference.handle(*message)
+                    except Exception as e:
+                        print(f"Inference server: error ({e})")
+                        answer = {'error': str(e)}
+                    try:
+                        send_message(self.request, answer)
+                    except OSError:
+                        # the client timed out and went away
+                        return
+
+        with Server(target, Handler) as server:
+            self._server = server
+            try:
+                server.serve_forever()
+            finally:
+                if family == socket.AF_UNIX and os.path.exists(target):
+                    os.unlink(target)
+
+    def shutdown(self):
+        if self._server:
+            self._server.shutdown()
@@ -0,0 +1,142 @@
+import json
+import os
+import struct
+import numpy as np
+
+# compact pronunciation lexicon (CMUdict) stored in one file and memory mapped,
+# all the gunicorn workers share the same pages instead of each holding a dict of lists
+#
+# file layout: MAGIC | header length (uint64) | json header | arrays (64 byte aligned)
+#   words          sorted lowercase words, fixed width bytes  -> binary search
+#   pron_offsets   word i has pronunciations pron_offsets[i]:pron_offsets[i+1]
+#   phone_offsets  pronunciation j is phones[phone_offsets[j]:phone_offsets[j+1]]
+#   phones         phoneme codes (uint8), the symbols are in the header
+
+MAGIC = b'SPKLEX1\n'
+ALIGNMENT = 64
+
+
+def _align(position):
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+# entries: iterable of (word, list of phonemes), a word can appear more than once
+def build_lexicon(entries, path):
+    prons_by_word = {}
+    for word, pron in entries:
+        prons = prons_by_word.setdefault(word.lower(), [])
+        # some sources give tuples, compare them as lists
+        pron = list(pron)
+        if pron not in prons:
+            prons.append(pron)
+
+    words = sorted(prons_by_word)
+    symbols = sorted({phone for prons in prons_by_word.values() for pron in prons for phone in pron})
+    if len(symbols) > 255:
+        raise ValueError('Too many phoneme symbols for the lexicon')
+    codes = {symbol: i for i, symbol in enumerate(symbols)}
+
+    pron_offsets = [0]
+    phone_offsets = [0]
+    phones = []
+    for word in words:
+        for pron in prons_by_word[word]:
+            phones.extend(codes[phone] for phone in pron)
+            phone_offsets.append(len(phones))
+        pron_offsets.append(len(phone_offsets) - 1)
+
+    encoded = [word.encode('utf-8') for word in words]
+    arrays = {
+        'words': np.array(encoded, dtype=f"S{max(len(w) for w in encoded)}"),
+        'pron_offsets': np.array(pron_offsets, dtype='<u4'),
+        'phone_offsets': np.array(phone_offsets, dtype='<u4'),
+        'phones': np.array(phones, dtype='u1'),
+    }
+
+    # work out the offsets first, the header goes before the arrays
+    header = {'symbols': symbols, 'arrays': {}}
+    header_size = 4096
+    while True:
+        position = _align(len(MAGIC) + 8 + header_size)
+        for name, array in arrays.items():
+            header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': position}
+            position = _align(position + array.nbytes)
+        header_bytes = json.dumps(header).encode('utf-8')
+        if len(header_bytes) <= header_size:
+            break
+        header_size = len(header_bytes)
+
+    # write to a temp file then rename, so workers never map a half written file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(header['arrays'][name]['offset'])
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+    return len(words)
+
+
+class Lexicon:
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a pronunciation lexicon file")
+            (header_length,) = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(header_length))
+
+        self.path = path
+        self.symbols = header['symbols']
+        self._map = np.memmap(path, dtype='u1', mode='r')
+        arrays = {
+            name: np.ndarray(tuple(info['shape']), dtype=np.dtype(info['dtype']), buffer=self._map, offset=info['offset'])
+            for name, info in header['arrays'].items()
+        }
+        self._words = arrays['words']
+        self._pron_offsets = arrays['pron_offsets']
+        self._phone_offsets = arrays['phone_offsets']
+        self._phones = arrays['phones']
+        self._width = self._words.dtype.itemsize
+
+    def __len__(self):
+        return len(self._words)
+
+    # binary search in the sorted words, -1 when the word is not in the lexicon
+    def _index(self, word):
+        encoded = word.lower().encode('utf-8')
+        if not encoded or len(encoded) > self._width:
+            return -1
+        i = int(np.searchsorted(self._words, encoded))
+        if i < len(self._words) and self._words[i] == encoded:
+            return i
+        return -1
+
+    def __contains__(self, word):
+        return self._index(word) >= 0
+
+    # all pronunciations of the word as lists of phonemes, like cmudict.dict()[word]
+    def pronunciations(self, word):
+        i = self._index(word)
+        if i < 0:
+            return []
+        prons = []
+        for j in range(self._pron_offsets[i], self._pron_offsets[i + 1]):
+            codes = self._phones[self._phone_offsets[j]:self._phone_offsets[j + 1]]
+            prons.append([self.symbols[code] for code in codes])
+        return prons
+
+    def __getitem__(self, word):
+        prons = self.pronunciations(word)
+        if not prons:
+            raise KeyError(word)
+        return prons
+
+    def get(self, word, default=None):
+        return self.pronunciations(word) or default
+
+    # same result as pronouncing.phones_for_word
+    def phones_for_word(self, word):
+        return [' '.join(pron) for pron in self.pronunciations(word)]
@@ -0,0 +1,72 @@
+from difflib import SequenceMatcher
+from .resources import registry
+from .text_metrics import as_token_stream, lexicon_phones
+
+# target word pronunciation: the expected phonemes of a vocabulary word are computed when the
+# word is saved (CMUdict first, the G2P model for unknown words) and stored on the row, the
+# request only compares them with the lexicon phonemes of the recognized words (no G2P)
+
+
+def strip_stress(phones):
+    return [phone.rstrip('012') for phone in phones]
+
+
+# ARPAbet phonemes of a word or phrase as one space separated string ("" when unknown),
+# use_g2p=False never loads the G2P model
+def word_phonemes(text, use_g2p=True):
+    phonemes = []
+    for word in text.lower().split():
+        known = lexicon_phones(word.strip('.,!?;:'))
+        if known:
+            phonemes.extend(known[0].split())
+        elif use_g2p:
+            phonemes.extend(phone for phone in registry.get('g2p')(word) if phone.strip() and phone[0].isalpha())
+        else:
+            return ''
+    return ' '.join(phonemes)
+
+
+# for the save/import code: a failing G2P model leaves the phonemes empty (backfill_phonemes)
+def expected_phonemes(word, use_g2p=True):
+    try:
+        return word_phonemes(word, use_g2p)
+    except Exception as e:
+        print(f"Error computing the phonemes of '{word}': {e}")
+        return ''
+
+
+def phoneme_similarity(expected, heard):
+    return SequenceMatcher(None, expected, heard, autojunk=False).ratio()
+
+
+# similarity in [0, 1] of every recognized word (or run of words for a phrase) with the target
+def score_pronunciation(target_word, expected_phonemes, transcribed_text):
+    expected = strip_stress(expected_phonemes.split())
+    target_length = len(target_word.split())
+    tokens = [token.text for token in as_token_stream(transcribed_text).tokens if token.text]
+
+    words = []
+    for index in range(max(0, len(tokens) - target_length + 1)):
+        heard = ' '.join(tokens[index:index + target_length])
+        candidates = [lexicon_phones(word) for word in tokens[index:index + target_length]]
+        if expected and all(candidates):
+            # best of the dictionary pronunciations of the heard words
+            prons = [[]]
+            for options in candidates:
+                prons = [pron + option.split() for pron in prons for option in options][:16]
+            similarity = max(phoneme_similarity(expected, strip_stress(pron)) for pron in prons)
+            method = 'phonemes'
+        else:
+            # not in the dictionary: compare the spelling
+            similarity = phoneme_similarity(target_word.lower(), heard)
+            method = 'spelling'
+        words.append({'index': index, 'heard': heard, 'similarity': round(similarity, 3), 'method': method})
+
+    best = max(words, key=lambda word: word['similarity'], default=None)
+    return {
+        'word': target_word,
+        'expected_phonemes': expected_phonemes,
+        'best_match': best['heard'] if best else None,
+        'similarity': best['similarity'] if best else 0.0,
+        'words': words,
+    }
@@ -0,0 +1,77 @@
+import threading
+import time
+
+# models and corpora are loaded on first use (or by `manage.py warmup_models`),
+# never when the module is imported, so migrate/shell/tests do not pay for them
+
+
+class LazyResource:
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.load_seconds = None
+        self.error = None
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    # load once, other threads wait for the first load instead of loading again
+    def get(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    start = time.perf_counter()
+                    try:
+                        self._value = self.loader()
+                    except Exception as e:
+                        self.error = str(e)
+                        raise
+                    self.load_seconds = round(time.perf_counter() - start, 3)
+                    self.error = None
+                    self._loaded = True
+        return self._value
+
+    def status(self):
+        return {
+            'loaded': self._loaded,
+            'load_seconds': self.load_seconds,
+            'error': self.error,
+        }
+
+
+class ResourceRegistry:
+    def __init__(self):
+        self._resources = {}
+
+    def register(self, name, loader):
+        resource = LazyResource(name, loader)
+        self._resources[name] = resource
+        return resource
+
+    def get(self, name):
+        return self._resources[name].get()
+
+    def names(self):
+        return list(self._resources)
+
+    # load the given resources (all by default) and return their status
+    def warm_up(self, names=None):
+        for name in names or self.names():
+            try:
+                self._resources[name].get()
+            except Exception as e:
+                print(f"Error loading {name}: {e}")
+        return self.status(names)
+
+    def status(self, names=None):
+        return {name: self._resources[name].status() for name in names or self.names()}
+
+    def is_ready(self, names=None):
+        return all(self._resources[name].loaded for name in names or self.names())
+
+
+registry = ResourceRegistry()
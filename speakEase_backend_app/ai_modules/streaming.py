@@ -0,0 +1,191 @@
+from collections import Counter
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from .text_metrics import as_token_stream
+from .audio_analysis import (
+    AudioBuffer, TARGET_SAMPLE_RATE, FRAME_LENGTH, HOP_LENGTH, WHISPER_MAX_SECONDS,
+    whisper_scheduler, detect_repeated_words, speech_rate,
+)
+
+# incremental version of the upload analysis for the live (websocket) sessions:
+# the pcm is fed as it arrives, the rms frames and pauses are computed on the new samples
+# only, and every speech segment closed by a pause is sent to whisper while the user goes on
+
+
+class StreamingAnalyzer:
+    def __init__(self, threshold=0.005, min_pause=0.3, hangover=0.1,
+                 max_segment_seconds=WHISPER_MAX_SECONDS, partial_seconds=2.0, max_seconds=600):
+        self.sample_rate = TARGET_SAMPLE_RATE
+        # same defaults as detect_pauses
+        self.threshold = threshold
+        self.min_pause = min_pause
+        self.frame_duration = HOP_LENGTH / self.sample_rate
+        self.hangover_frames = int(round(hangover / self.frame_duration))
+        self.max_segment_samples = int(max_segment_seconds * self.sample_rate)
+        self.partial_samples = int(partial_seconds * self.sample_rate) if partial_seconds else 0
+        self.max_samples = int(max_seconds * self.sample_rate)
+
+        # all the samples, kept for the final score (grown by doubling)
+        self._audio = np.zeros(self.sample_rate * 10, dtype=np.float32)
+        self._length = 0
+        # first sample without an rms frame yet
+        self._frame_pos = 0
+        self.frames = 0
+        self.silent_frames = 0
+
+        # current silence run (frame index) and the pauses found so far
+        self._silence_start = None
+        self.pauses = []
+
+        # open speech segment (sample index), the segments sent to whisper and their texts
+        self._segment_start = None
+        self._partial_at = 0
+        self.segments = []
+        self._texts = {}
+        self._transcribed_until = 0.0
+        # running counts of the transcribed segments, each text is tokenized once
+        self._word_count = 0
+        self._word_counts = Counter()
+
+    @property
+    def duration(self):
+        return self._length / self.sample_rate
+
+    @property
+    def full(self):
+        return self._length >= self.max_samples
+
+    # add float32 samples in [-1, 1], returns the transcription jobs started by them as
+    # dicts with kind ('segment' or 'partial'), index, start, end and the whisper future
+    def feed(self, samples):
+        samples = np.asarray(samples, dtype=np.float32)[:self.max_samples - self._length]
+        if not len(samples):
+            return []
+        if self._length + len(samples) > len(self._audio):
+            grown = np.zeros(max(len(self._audio) * 2, self._length + len(samples)), dtype=np.float32)
+            grown[:self._length] = self._audio[:self._length]
+            self._audio = grown
+        self._audio[self._length:self._length + len(samples)] = samples
+        self._length += len(samples)
+
+        jobs = []
+        for frame, silent in self._new_frames():
+            jobs.extend(self._add_frame(frame, silent))
+
+        # live text of the segment the user is still speaking
+        if (self.partial_samples and self._segment_start is not None
+                and self._length - max(self._partial_at, self._segment_start) >= self.partial_samples):
+            self._partial_at = self._length
+            jobs.append(self._submit('partial', self._segment_start, self._length))
+        return jobs
+
+    # the rms of every complete frame since the last call (frame_length window every hop_length)
+    def _new_frames(self):
+        available = self._length - self._frame_pos
+        if available < FRAME_LENGTH:
+            return []
+        count = 1 + (available - FRAME_LENGTH) // HOP_LENGTH
+        windows = sliding_window_view(self._audio[self._frame_pos:self._length], FRAME_LENGTH)[::HOP_LENGTH][:count]
+        energy = np.sqrt(np.mean(np.square(windows), axis=1))
+        self._frame_pos += count * HOP_LENGTH
+        first = self.frames
+        return list(enumerate((energy < self.threshold).tolist(), start=first))
+
+    def _add_frame(self, frame, silent):
+        self.frames += 1
+        jobs = []
+        if silent:
+            self.silent_frames += 1
+            if self._silence_start is None:
+                self._silence_start = frame
+            # the pause is long enough, transcribe the speech before it now
+            elif self._segment_start is not None and self._pause_length(frame + 1) >= self.min_pause:
+                jobs.append(self._close_segment(self._silence_start * HOP_LENGTH))
+        else:
+            if self._silence_start is not None:
+                self._end_silence(frame)
+            if self._segment_start is None:
+                self._segment_start = frame * HOP_LENGTH
+                self._partial_at = self._segment_start
+            # no pause for too long, cut the segment like split_into_chunks
+            elif (frame + 1) * HOP_LENGTH - self._segment_start >= self.max_segment_samples:
+                jobs.append(self._close_segment((frame + 1) * HOP_LENGTH))
+        return jobs
+
+    # same rule as find_pause_segments: the hangover after speech is not part of the pause
+    def _pause_length(self, end):
+        start = self._silence_start + self.hangover_frames if self._silence_start > 0 else self._silence_start
+        return (end - start) * self.frame_duration
+
+    def _end_silence(self, end):
+        length = self._pause_length(end)
+        if length >= self.min_pause:
+            start = end * self.frame_duration - length
+            self.pauses.append({
+                'start': round(start, 2), 'end': round(end * self.frame_duration, 2), 'length': round(length, 2)
+            })
+        self._silence_start = None
+
+    def _close_segment(self, end):
+        job = self._submit('segment', self._segment_start, end)
+        self._segment_start = None
+        return job
+
+    def _submit(self, kind, start, end):
+        clip = AudioBuffer(self._audio[start:end].copy(), self.sample_rate)
+        job = {
+            'kind': kind,
+            'index': len(self.segments) if kind == 'segment' else None,
+            'start': round(start / self.sample_rate, 2),
+            'end': round(end / self.sample_rate, 2),
+            'future': whisper_scheduler.submit(clip),
+        }
+        if kind == 'segment':
+            self.segments.append(job)
+        return job
+
+    # the text of a finished segment, added to the running counts
+    def add_text(self, job, text):
+        text = text.strip()
+        self._texts[job['index']] = text
+        self._transcribed_until = max(self._transcribed_until, job['end'])
+        if text:
+            tokens = as_token_stream(text)
+            self._word_count += tokens.word_count
+            self._word_counts.update(detect_repeated_words(tokens)['all_word_counts'])
+
+    @property
+    def text(self):
+        return " ".join(self._texts[i] for i in sorted(self._texts) if self._texts[i])
+
+    # live metrics, the wpm only counts the audio that is already transcribed
+    def metrics(self):
+        rate = speech_rate(self._word_count, self._transcribed_until)
+        lengths = [pause['length'] for pause in self.pauses]
+        repeated = {word: count for word, count in self._word_counts.items() if count > 1}
+        return {
+            'duration': round(self.duration, 2),
+            'wpm': rate['wpm'],
+            'speed_category': rate['speed_category'],
+            'word_count': rate['word_count'],
+            'pauses_percentage': round(self.silent_frames / self.frames * 100, 2) if self.frames else 0,
+            'pause_count': len(self.pauses),
+            'mean_pause': round(sum(lengths) / len(lengths), 2) if lengths else 0,
+            'longest_pause': max(lengths) if lengths else 0,
+            'repeated_words': repeated,
+            'total_repeated': len(repeated),
+        }
+
+    # end of the stream: close the last pause and send the last speech segment
+    def finish(self):
+        jobs = []
+        if self._silence_start is not None:
+            if self._segment_start is not None and self._pause_length(self.frames) >= self.min_pause:
+                jobs.append(self._close_segment(self._silence_start * HOP_LENGTH))
+            self._end_silence(self.frames)
+        if self._segment_start is not None:
+            jobs.append(self._close_segment(self._length))
+        return jobs
+
+    def audio(self):
+        return AudioBuffer(self._audio[:self._length].copy(), self.sample_rate)
@@ -0,0 +1,45 @@
+import io
+import wave
+import numpy as np
+from .audio_analysis import TARGET_SAMPLE_RATE
+
+# deterministic "speech like" audio for the benchmarks and load tests: harmonic tone
+# bursts (syllables) with short gaps, and longer silences inserted between the phrases,
+# the same seed and length always give the same samples
+
+
+def synthetic_speech(seconds, seed=0, sample_rate=TARGET_SAMPLE_RATE, pause_every=3.0, pause_length=0.6):
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    samples = np.zeros(total, dtype=np.float32)
+    position = int(0.2 * sample_rate)
+    next_pause = pause_every
+    while position < total:
+        # one syllable: 120-250 ms of a voiced tone with a few harmonics and a smooth envelope
+        length = int(rng.uniform(0.12, 0.25) * sample_rate)
+        t = np.arange(length) / sample_rate
+        pitch = rng.uniform(110, 220)
+        tone = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in (1, 2, 3))
+        burst = (0.25 * tone * np.hanning(length)).astype(np.float32)
+        end = min(total, position + length)
+        samples[position:end] = burst[:end - position]
+        position = end + int(rng.uniform(0.03, 0.08) * sample_rate)
+
+        if position / sample_rate >= next_pause:
+            position += int(pause_length * sample_rate)
+            next_pause += pause_every
+    # a little noise so the silences are not digital zero
+    samples += rng.normal(0, 0.001, total).astype(np.float32)
+    return samples
+
+
+# 16 bit mono wav file content, e.g. for uploads
+def wav_bytes(samples, sample_rate=TARGET_SAMPLE_RATE):
+    pcm = (np.clip(samples, -1, 1) * 32767).astype('<i2')
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
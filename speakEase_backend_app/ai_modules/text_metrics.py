@@ -0,0 +1,70 @@
+from collections import Counter
+from functools import lru_cache
+from typing import NamedTuple
+from django.conf import settings
+from .resources import registry
+
+# one pass over the transcript for all the text metrics: every word is lowercased,
+# stripped and looked up once, then detect_mispronunciations, detect_repeated_words and
+# calculate_speech_rate read the same TokenStream
+
+# Common stop words to ignore for the repetitions
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'is', 'are', 'was', 'were',
+    'be', 'been', 'of', 'in', 'to', 'for', 'i', 'you', 'he', 'she', 'it',
+})
+PUNCTUATION = '.,!?;:'
+
+
+# Source helper: https://docs.python.org/3/library/functools.html#functools.lru_cache
+# pronunciations of a word from the lexicon, the same words come back in every transcript
+@lru_cache(maxsize=getattr(settings, 'LEXICON_CACHE_SIZE', 50000))
+def lexicon_phones(word):
+    if not word:
+        return ()
+    return tuple(registry.get('lexicon').phones_for_word(word))
+
+
+class Token(NamedTuple):
+    text: str
+    is_stop: bool
+    in_lexicon: bool
+
+
+class TokenStream:
+    def __init__(self, text):
+        self.tokens = []
+        # counts of the words that are not stop words, like detect_repeated_words
+        self.word_counts = Counter()
+        for raw in text.lower().split():
+            word = raw.strip(PUNCTUATION)
+            token = Token(word, word in STOP_WORDS, bool(lexicon_phones(word)))
+            self.tokens.append(token)
+            if word and not token.is_stop:
+                self.word_counts[word] += 1
+
+    def __len__(self):
+        return len(self.tokens)
+
+    @property
+    def word_count(self):
+        return len(self.tokens)
+
+    @property
+    def mispronounced(self):
+        return [token.text for token in self.tokens if not token.in_lexicon]
+
+    @property
+    def valid(self):
+        return [token.text for token in self.tokens if token.in_lexicon]
+
+    @property
+    def repeated(self):
+        return {word: count for word, count in self.word_counts.items() if count > 1}
+
+
+# the metric functions take the text or an already built stream
+def as_token_stream(text):
+    if isinstance(text, TokenStream):
+        return text
+    return TokenStream(text)
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import threading
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Sum
+from django.utils import timezone
+from .models import AnalysisCacheEntry
+from .ai_modules.audio_analysis import whisper_model_name
+
+# transcripts and scores keyed by the hash of the decoded audio + model + config,
+# so the same recording (client retries, re-submits) skips the model completely
+
+
+# check the size limit after every this many writes instead of on each one, in a background
+# thread so the directory scan never runs inside the request that wrote the entry
+EVICT_EVERY = 50
+
+
+class BaseAnalysisCache:
+    name = 'base'
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._evict_thread = None
+
+    def get(self, key):
+        value = self._get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._set(key, value)
+        with self._lock:
+            self._writes += 1
+            if self._writes % EVICT_EVERY != 0:
+                return
+            # one eviction at a time, the next one starts EVICT_EVERY writes later
+            if self._evict_thread is not None and self._evict_thread.is_alive():
+                return
+            self._evict_thread = threading.Thread(target=self._evict_in_background, name='analysis-cache-evict', daemon=True)
+            self._evict_thread.start()
+
+    def _evict_in_background(self):
+        try:
+            self.evict()
+        except Exception as e:
+            print(f"Error evicting the analysis cache: {e}")
+        finally:
+            # the db backend opened a connection for this thread
+            connection.close()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'backend': self.name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else None,
+            'max_entries': self.max_entries,
+            **self._usage(),
+        }
+
+    def _get(self, key):
+        return None
+
+    def _set(self, key, value):
+        pass
+
+    def evict(self):
+        pass
+
+    def _usage(self):
+        return {}
+
+
+# used when the cache is turned off
+class NoAnalysisCache(BaseAnalysisCache):
+    name = 'none'
+
+
+# one json file per entry, the least recently used files are deleted first
+class DiskAnalysisCache(BaseAnalysisCache):
+    name = 'disk'
+
+    def __init__(self, max_entries, directory, max_bytes):
+        super().__init__(max_entries)
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            # the modification time is the last use for the eviction
+            os.utime(path)
+            return value
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _set(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for folder in os.scandir(self.directory):
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                if entry.name.endswith('.json'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        entries = sorted(self._entries())
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+
+    def _usage(self):
+        entries = self._entries()
+        return {'entries': len(entries), 'size_bytes': sum(size for _, size, _ in entries)}
+
+
+# AnalysisCacheEntry rows, shared by all the workers and servers using the database
+class DBAnalysisCache(BaseAnalysisCache):
+    name = 'db'
+
+    def _get(self, key):
+        entry = AnalysisCacheEntry.objects.filter(key=key).only('value').first()
+        if entry is None:
+            return None
+        AnalysisCacheEntry.objects.filter(key=key).update(hits=F('hits') + 1, last_used_at=timezone.now())
+        return entry.value
+
+    def _set(self, key, value):
+        AnalysisCacheEntry.objects.update_or_create(
+            key=key,
+            defaults={'value': value, 'size': len(json.dumps(value)), 'last_used_at': timezone.now()}
+        )
+
+    def evict(self):
+        # everything older than the max_entries most recently used rows
+        old_ids = list(
+            AnalysisCacheEntry.objects.order_by('-last_used_at').values_list('id', flat=True)[self.max_entries:]
+        )
+        if old_ids:
+            AnalysisCacheEntry.objects.filter(id__in=old_ids).delete()
+
+    def _usage(self):
+        return {
+            'entries': AnalysisCacheEntry.objects.count(),
+            'size_bytes': AnalysisCacheEntry.objects.aggregate(total=Sum('size'))['total'] or 0,
+        }
+
+
+def create_analysis_cache():
+    backend = getattr(settings, 'ANALYSIS_CACHE_BACKEND', 'disk')
+    max_entries = getattr(settings, 'ANALYSIS_CACHE_MAX_ENTRIES', 10000)
+    if backend == 'disk':
+        return DiskAnalysisCache(
+            max_entries,
+            str(settings.ANALYSIS_CACHE_DIR),
+            getattr(settings, 'ANALYSIS_CACHE_MAX_BYTES', 256 * 1024 * 1024),
+        )
+    if backend == 'db':
+        return DBAnalysisCache(max_entries)
+    return NoAnalysisCache(max_entries)
+
+
+analysis_cache = create_analysis_cache()
+
+
+# the backend that actually runs the model, with ASR_BACKEND=remote the one of the inference server
+def serving_backend_name():
+    backend = getattr(settings, 'ASR_BACKEND', 'hf')
+    if backend == 'remote':
+        return f"remote:{getattr(settings, 'INFERENCE_SERVER_BACKEND', 'hf')}"
+    return backend
+
+
+# the model and everything that changes the results are part of the key
+def config_version():
+    parts = [
+        whisper_model_name,
+        serving_backend_name(),
+        str(getattr(settings, 'WHISPER_CHUNK_SECONDS', 30)),
+        getattr(settings, 'WHISPER_TIMESTAMPS', ''),
+        str(getattr(settings, 'ANALYSIS_CACHE_VERSION', 1)),
+    ]
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()[:16]
+
+
+def transcript_key(audio):
+    return hashlib.sha256(f"transcript|{audio.digest}|{config_version()}".encode()).hexdigest()
+
+
+# the score also depends on the duration sent by the client, the transcript it was computed
+# from (live sessions bring their own) and where the pauses came from (timestamps or rms)
+def analysis_key(audio, duration, transcribed_text, pause_source='rms'):
+    text_hash = hashlib.sha256(transcribed_text.encode()).hexdigest()
+    return hashlib.sha256(
+        f"analysis|{audio.digest}|{duration}|{text_hash}|{pause_source}|{config_version()}".encode()
+    ).hexdigest()
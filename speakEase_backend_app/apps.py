@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SpeakeaseBackendAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'speakEase_backend_app'
+
+    def ready(self):
+        # connect the model signals
+        from . import signals  # noqa: F401
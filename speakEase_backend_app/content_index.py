@@ -0,0 +1,105 @@
+import random
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from .models import VocabularyWord, Tip
+
+# in-process index of the vocabulary/tip ids grouped by difficulty/category, so a random
+# item is random.choice + one primary key lookup instead of ORDER BY RANDOM() on the table.
+# The index is dropped by the model signals and import_content, which also bump a version in
+# the django cache: with CACHE_BACKEND db or file the other workers reload on their next pick,
+# with the per process local memory cache after CONTENT_INDEX_TTL seconds.
+
+
+class RandomIdIndex:
+    def __init__(self, name, model, group_field):
+        self.name = name
+        self.model = model
+        self.group_field = group_field
+        self._groups = None
+        self._loaded_at = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _version_key(self):
+        return f"content_index_{self.name}_version"
+
+    # drop the index of this process and of the workers sharing the cache
+    def invalidate(self):
+        key = self._version_key()
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # expired between the add and the incr
+            cache.set(key, 1, None)
+        self._drop()
+
+    def _drop(self):
+        with self._lock:
+            self._groups = None
+
+    def _load(self):
+        groups = {None: []}
+        for obj_id, group in self.model.objects.order_by().values_list('id', self.group_field).iterator():
+            groups[None].append(obj_id)
+            groups.setdefault(group, []).append(obj_id)
+        return groups
+
+    def ids(self, group=None):
+        ttl = getattr(settings, 'CONTENT_INDEX_TTL', 300)
+        version = cache.get(self._version_key(), 0)
+        with self._lock:
+            if self._groups is None or version != self._version or time.monotonic() - self._loaded_at > ttl:
+                self._groups = self._load()
+                self._loaded_at = time.monotonic()
+                self._version = version
+            return self._groups.get(group, [])
+
+    # random id of the group, avoiding the `exclude` ids while there are others to choose
+    def pick(self, group=None, exclude=()):
+        ids = self.ids(group)
+        if not ids:
+            return None
+        exclude = set(exclude)
+        if len(exclude) < len(ids):
+            # a few random tries are enough while exclude is small compared to ids
+            for _ in range(10):
+                obj_id = random.choice(ids)
+                if obj_id not in exclude:
+                    return obj_id
+            remaining = [obj_id for obj_id in ids if obj_id not in exclude]
+            if remaining:
+                return random.choice(remaining)
+        return random.choice(ids)
+
+    # the recent ids of a user are kept in the django cache, shared by the workers only when
+    # CACHE_BACKEND is db or file (the default local memory cache is per process)
+    def _recent_key(self, user):
+        return f"recent_{self.name}_{user.id}"
+
+    def get_random(self, group=None, user=None):
+        no_repeat = getattr(settings, 'CONTENT_NO_REPEAT', 5)
+        track = bool(no_repeat) and user is not None and user.is_authenticated
+        recent = cache.get(self._recent_key(user), []) if track else []
+
+        for _ in range(3):
+            obj_id = self.pick(group, recent)
+            if obj_id is None:
+                return None
+            objects = self.model.objects.filter(pk=obj_id)
+            if group is not None:
+                objects = objects.filter(**{self.group_field: group})
+            obj = objects.first()
+            if obj:
+                if track:
+                    cache.set(self._recent_key(user), ([obj.id] + recent)[:no_repeat], 24 * 60 * 60)
+                return obj
+            # deleted or changed by another worker
+            self._drop()
+        return None
+
+
+vocabulary_index = RandomIdIndex('vocabulary', VocabularyWord, 'difficulty_level')
+tip_index = RandomIdIndex('tip', Tip, 'category')
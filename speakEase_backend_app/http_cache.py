@@ -0,0 +1,41 @@
+import hashlib
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+# conditional GET helpers: compute the ETag/Last-Modified from a cheap query first, answer
+# 304 Not Modified before loading and serializing the object when the client is up to date
+#
+#   etag, last_modified = make_etag(obj.id, obj.last_updated), obj.last_updated
+#   not_modified = conditional_response(request, etag, last_modified)
+#   if not_modified: return not_modified
+#   ... build the Response ...
+#   return with_cache_headers(response, etag, last_modified, private=True, no_cache=True)
+
+
+def make_etag(*parts):
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def _timestamp(last_modified):
+    return int(last_modified.timestamp()) if last_modified else None
+
+
+# 304 (or 412) response when the client copy is still valid, else None
+def conditional_response(request, etag=None, last_modified=None, **cache_control):
+    response = get_conditional_response(request, etag=etag, last_modified=_timestamp(last_modified))
+    if response is not None:
+        with_cache_headers(response, etag, last_modified, **cache_control)
+    return response
+
+
+def with_cache_headers(response, etag=None, last_modified=None, **cache_control):
+    if etag:
+        response.headers['ETag'] = etag
+    if last_modified:
+        response.headers['Last-Modified'] = http_date(_timestamp(last_modified))
+    if cache_control:
+        patch_cache_control(response, **cache_control)
+    # the responses depend on the logged in user (JWT header)
+    patch_vary_headers(response, ['Authorization'])
+    return response
@@ -0,0 +1,159 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Source helper: https://www.w3.org/TR/server-timing/
+# timing of the analysis stages: every `with stage('name'):` block is added to the
+# histograms of this process (GET /metrics) and, inside a request, to the request's
+# collector that ServerTimingMiddleware turns into the Server-Timing header
+#
+#   with stage('detect_pauses'):
+#       pa = detect_pauses(audio)
+
+# histogram buckets in seconds (prometheus `le` labels)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# the percentiles are computed from the last RESERVOIR_SIZE samples of every stage
+RESERVOIR_SIZE = 2048
+QUANTILES = (0.5, 0.95, 0.99)
+
+# (name, seconds) list of the current request, None outside a request
+_collector = contextvars.ContextVar('stage_collector', default=None)
+
+
+class Histogram:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self._recent = deque(maxlen=RESERVOIR_SIZE)
+
+    def observe(self, seconds):
+        with self._lock:
+            index = bisect.bisect_left(BUCKETS, seconds)
+            if index < len(BUCKETS):
+                self.bucket_counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            self._recent.append(seconds)
+
+    # cumulative (le, count) pairs like prometheus expects, +Inf last
+    def buckets(self):
+        with self._lock:
+            counts = list(self.bucket_counts)
+            total = self.count
+        cumulative = []
+        running = 0
+        for bound, count in zip(BUCKETS, counts):
+            running += count
+            cumulative.append((bound, running))
+        cumulative.append(('+Inf', total))
+        return cumulative
+
+    def quantiles(self):
+        with self._lock:
+            recent = sorted(self._recent)
+        if not recent:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: recent[min(len(recent) - 1, int(q * len(recent)))] for q in QUANTILES}
+
+
+class StageMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.requests = {}
+
+    def _histogram(self, table, name):
+        histogram = table.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = table.setdefault(name, Histogram())
+        return histogram
+
+    # copy of a table, histograms can be added by other threads while rendering
+    def snapshot(self, table):
+        with self._lock:
+            return sorted(table.items())
+
+    def observe_stage(self, name, seconds):
+        self._histogram(self.stages, name).observe(seconds)
+
+    def observe_request(self, view, seconds):
+        self._histogram(self.requests, view).observe(seconds)
+
+
+stage_metrics = StageMetrics()
+
+
+# add a measured stage to the histograms and to the current request
+def record_stage(name, seconds):
+    stage_metrics.observe_stage(name, seconds)
+    timings = _collector.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+# collect the stages of the block (a request), yields the (name, seconds) list
+@contextmanager
+def collect_stages():
+    timings = []
+    token = _collector.set(timings)
+    try:
+        yield timings
+    finally:
+        _collector.reset(token)
+
+
+# the list of the current request, for work done on other threads (whisper batches)
+def current_collector():
+    return _collector.get()
+
+
+def _labels(**labels):
+    return ','.join(f'{name}="{str(value).replace(chr(34), "")}"' for name, value in labels.items())
+
+
+def _histogram_lines(metric, label, table, pid):
+    lines = [f"# TYPE {metric} histogram"]
+    for name, histogram in stage_metrics.snapshot(table):
+        for bound, count in histogram.buckets():
+            lines.append(f"{metric}_bucket{{{_labels(**{label: name, 'le': bound, 'pid': pid})}}} {count}")
+        lines.append(f"{metric}_sum{{{_labels(**{label: name, 'pid': pid})}}} {histogram.sum:.6f}")
+        lines.append(f"{metric}_count{{{_labels(**{label: name, 'pid': pid})}}} {histogram.count}")
+    return lines
+
+
+# Source helper: https://prometheus.io/docs/instrumenting/exposition_formats/
+# the metrics of this process in the prometheus text format, gauges is {name: value}.
+# Every series has a pid label: with several gunicorn workers a scrape answers from one of
+# them, so scrape every worker and aggregate the buckets in prometheus, e.g.
+#   histogram_quantile(0.95, sum by (le, stage) (rate(speakease_stage_duration_seconds_bucket[5m])))
+# the quantile gauges are of that one worker and can not be added up
+def render_prometheus(gauges=None):
+    pid = os.getpid()
+    lines = _histogram_lines('speakease_stage_duration_seconds', 'stage', stage_metrics.stages, pid)
+    lines.append("# TYPE speakease_stage_duration_quantile_seconds gauge")
+    for name, histogram in stage_metrics.snapshot(stage_metrics.stages):
+        for quantile, value in histogram.quantiles().items():
+            lines.append(
+                f"speakease_stage_duration_quantile_seconds{{{_labels(stage=name, quantile=quantile, pid=pid)}}} {value:.6f}"
+            )
+    lines += _histogram_lines('speakease_request_duration_seconds', 'view', stage_metrics.requests, pid)
+    for name, value in (gauges or {}).items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name}{{{_labels(pid=pid)}}} {value}")
+    return "\n".join(lines) + "\n"
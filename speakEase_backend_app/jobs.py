@@ -0,0 +1,69 @@
+from datetime import timedelta
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import AnalysisJob
+from .services import analyze_voice_training, decode_audio_file, AnalysisError
+
+# DB backed queue for the voice analysis jobs, no broker needed
+
+
+# take the oldest pending job and mark it running, returns None if the queue is empty
+def claim_next_job():
+    with transaction.atomic():
+        jobs = AnalysisJob.objects.filter(status='pending').order_by('created_at')
+        # skip jobs locked by other workers so they never wait on each other
+        if connection.features.has_select_for_update_skip_locked:
+            jobs = jobs.select_for_update(skip_locked=True)
+        job = jobs.first()
+        if not job:
+            return None
+        job.status = 'running'
+        job.started_at = timezone.now()
+        job.attempts += 1
+        job.save(update_fields=['status', 'started_at', 'attempts'])
+    return job
+
+
+# run the analysis for one job and save the result or the error on it
+def process_job(job):
+    try:
+        audio = decode_audio_file(job.audio_file.path)
+        # marks the job done in the transaction that saves the session
+        analyze_voice_training(job.user, audio, job.training_type, job.duration, job.word, job=job)
+    except AnalysisError as e:
+        job.status = 'failed'
+        job.error = str(e)
+    except Exception as e:
+        print(f"Error processing analysis job {job.id}: {e}")
+        job.status = 'failed'
+        job.error = str(e)
+    finally:
+        # the upload is not needed after the analysis
+        if job.audio_file:
+            job.audio_file.delete(save=False)
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'training_session', 'audio_file', 'finished_at'])
+    return job
+
+
+# put back jobs left running by a worker that died, or fail them after max_attempts
+def requeue_stale_jobs(stale_after_seconds, max_attempts=3):
+    cutoff = timezone.now() - timedelta(seconds=stale_after_seconds)
+    stale = AnalysisJob.objects.filter(status='running', started_at__lt=cutoff)
+    failed = 0
+    for job in stale.filter(attempts__gte=max_attempts).only('id', 'audio_file'):
+        # claim the job before deleting its upload, another worker may be failing it too
+        if not AnalysisJob.objects.filter(id=job.id, status='running').update(
+            status='failed', error='Analysis timed out', finished_at=timezone.now(), audio_file=''
+        ):
+            continue
+        if job.audio_file:
+            job.audio_file.delete(save=False)
+        failed += 1
+    requeued = stale.filter(attempts__lt=max_attempts).update(status='pending', started_at=None)
+    return requeued, failed
+
+
+def pending_jobs_count():
+    return AnalysisJob.objects.filter(status='pending').count()
@@ -0,0 +1,40 @@
+import time
+from django.core.management.base import BaseCommand
+from speakEase_backend_app.models import VocabularyWord
+from speakEase_backend_app.ai_modules.pronunciation import expected_phonemes
+
+
+# set the expected phonemes of the vocabulary words saved before the column existed
+# (or imported with --skip-g2p), bulk_update skips the signals so nothing is computed twice
+class Command(BaseCommand):
+    help = 'Compute the missing phonemes of the vocabulary words'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Recompute every word, not only the empty ones')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        words = VocabularyWord.objects.order_by('id').only('id', 'word', 'phonemes')
+        if not options['all']:
+            words = words.filter(phonemes='')
+
+        updated = missing = 0
+        batch = []
+        for vocabulary_word in words.iterator(chunk_size=options['batch_size']):
+            vocabulary_word.phonemes = expected_phonemes(vocabulary_word.word)
+            if not vocabulary_word.phonemes:
+                missing += 1
+            batch.append(vocabulary_word)
+            if len(batch) >= options['batch_size']:
+                updated += self.save_batch(batch)
+                batch = []
+        updated += self.save_batch(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {updated} words ({missing} without phonemes) in {time.perf_counter() - start:.1f}s"
+        ))
+
+    def save_batch(self, batch):
+        VocabularyWord.objects.bulk_update(batch, ['phonemes'])
+        return len(batch)
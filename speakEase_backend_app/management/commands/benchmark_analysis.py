@@ -0,0 +1,222 @@
+import json
+import platform
+import statistics
+import time
+from contextlib import contextmanager
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from speakEase_backend_app import services
+from speakEase_backend_app.ai_modules import audio_analysis, registry
+from speakEase_backend_app.ai_modules.asr_backends import ASR_BACKENDS
+from speakEase_backend_app.ai_modules.audio_analysis import AudioBuffer, load_whisper
+from speakEase_backend_app.ai_modules.synthetic import synthetic_speech, wav_bytes
+from speakEase_backend_app.analysis_cache import NoAnalysisCache
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(latencies, audio_seconds):
+    mean = statistics.fmean(latencies)
+    return {
+        'runs': len(latencies),
+        'mean_ms': round(mean * 1000, 3),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'min_ms': round(min(latencies) * 1000, 3),
+        'max_ms': round(max(latencies) * 1000, 3),
+        'per_second': round(1 / mean, 2) if mean else None,
+        # seconds of audio processed per second, > 1 is faster than real time
+        'realtime_factor': round(audio_seconds / mean, 2) if mean else None,
+    }
+
+
+# the persistent analysis cache would answer the endpoint runs from an earlier benchmark
+@contextmanager
+def analysis_cache_disabled():
+    original = services.analysis_cache
+    services.analysis_cache = NoAnalysisCache(0)
+    try:
+        yield
+    finally:
+        services.analysis_cache = original
+
+
+# Source helper: https://docs.python.org/3/library/time.html#time.perf_counter
+# every case runs `repeat` times on clips of every length, each run on a clip with its own
+# seed so the analysis cache and the rms cache never hit
+class Command(BaseCommand):
+    help = 'Benchmark the audio analysis functions and the voice training endpoint on synthetic audio'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', default='stub', help="ASR backend (stub, hf, int8, onnx), default: stub")
+        parser.add_argument('--lengths', default='5,15,30,60', help='Clip lengths in seconds, comma separated')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--only', default='', help='Only the cases whose name contains this text')
+        parser.add_argument('--skip-endpoint', action='store_true', help='Do not benchmark VoiceTrainingView')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--baseline', help='Compare with the results in this JSON file')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Allowed p50 slowdown against the baseline (0.2 = 20%%)')
+        parser.add_argument('--min-delta-ms', type=float, default=0.5,
+                            help='Slowdowns smaller than this are noise, not regressions')
+
+    def handle(self, *args, **options):
+        try:
+            lengths = [float(value) for value in options['lengths'].split(',') if value]
+        except ValueError:
+            raise CommandError('--lengths must be numbers')
+        repeat = max(1, options['repeat'])
+
+        if options['backend'] not in ASR_BACKENDS:
+            raise CommandError(f"Unknown ASR backend '{options['backend']}', choose from {', '.join(ASR_BACKENDS)}")
+        loaded = registry.warm_up(['lexicon'])
+        if not loaded['lexicon']['loaded']:
+            raise CommandError(f"Could not load lexicon: {loaded['lexicon']['error']}")
+        # the benchmarked backend serves this process' whisper resource (the batch scheduler uses it)
+        start = time.perf_counter()
+        try:
+            backend = load_whisper(options['backend'])
+        except Exception as e:
+            raise CommandError(f"Could not load whisper: {e}")
+        registry.register('whisper', lambda: backend)
+        loaded['whisper'] = {'loaded': True, 'load_seconds': round(time.perf_counter() - start, 3), 'error': None}
+
+        with analysis_cache_disabled():
+            results = self.run_cases(lengths, repeat, options)
+
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'backend': options['backend'],
+                'lengths': lengths,
+                'repeat': repeat,
+                'seed': options['seed'],
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'machine': platform.machine(),
+                'load_seconds': {name: info['load_seconds'] for name, info in loaded.items()},
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['threshold'], options['min_delta_ms'])
+
+    def run_cases(self, lengths, repeat, options):
+        results = {}
+        for seconds in lengths:
+            for name, setup, function in self.cases(seconds, options['seed'], repeat, options['skip_endpoint']):
+                key = f"{name}@{seconds:g}s"
+                if options['only'] and options['only'] not in key:
+                    continue
+                try:
+                    # first call untimed (imports, jit, lazy caches)
+                    function(*setup(-1))
+                    latencies = []
+                    for index in range(repeat):
+                        args = setup(index)
+                        start = time.perf_counter()
+                        function(*args)
+                        latencies.append(time.perf_counter() - start)
+                except Exception as e:
+                    self.stderr.write(self.style.WARNING(f"{key}: skipped ({e})"))
+                    continue
+                results[key] = summarize(latencies, seconds)
+                self.stdout.write(
+                    f"{key:<38} p50 {results[key]['p50_ms']:>10.2f} ms   p95 {results[key]['p95_ms']:>10.2f} ms"
+                    f"   {results[key]['realtime_factor']:>8}x realtime"
+                )
+        return results
+
+    # (name, setup, function): setup(index) makes the arguments of the run untimed
+    def cases(self, seconds, seed, repeat, skip_endpoint):
+        # index -1 is the warm up run
+        clips = {index: synthetic_speech(seconds, seed=seed * 1000 + index + 1) for index in range(-1, repeat)}
+        backend = registry.get('whisper')
+        texts = {}
+
+        def text(index):
+            if index not in texts:
+                texts[index] = backend.transcribe_batch([AudioBuffer(clips[index])])[0]
+            return texts[index]
+
+        # a new buffer every run, the rms is cached on the buffer
+        def fresh(index):
+            return (AudioBuffer(clips[index].copy()),)
+
+        cases = [
+            ('rms', fresh, lambda audio: audio.rms()),
+            ('split_into_chunks', fresh, audio_analysis.split_into_chunks),
+            ('detect_pauses', fresh, audio_analysis.detect_pauses),
+            ('transcribe_audio', fresh, audio_analysis.audio_analyzer.transcribe_audio),
+            ('detect_mispronunciations', lambda i: (text(i),), audio_analysis.detect_mispronunciations),
+            ('detect_repeated_words', lambda i: (text(i),), audio_analysis.detect_repeated_words),
+            ('calculate_speech_rate', lambda i: (text(i), seconds), audio_analysis.calculate_speech_rate),
+            ('calculate_overall_score', lambda i: (text(i), seconds) + fresh(i), audio_analysis.calculate_overall_score),
+        ]
+        if not skip_endpoint:
+            cases.append(('voice_training_view', *self.endpoint_case(seconds, clips)))
+        return cases
+
+    # POST /api/training/voice/ through the view (decode, transcribe, score, DB writes),
+    # everything it writes is rolled back
+    def endpoint_case(self, seconds, clips):
+        from speakEase_backend_app.views import VoiceTrainingView
+        view = VoiceTrainingView.as_view()
+        factory = APIRequestFactory()
+
+        def setup(index):
+            request = factory.post('/api/training/voice/', {
+                'audio_file': SimpleUploadedFile('clip.wav', wav_bytes(clips[index]), content_type='audio/wav'),
+                'duration': max(1, int(seconds)),
+            }, format='multipart')
+            return (request,)
+
+        def run(request):
+            with transaction.atomic():
+                user = get_user_model().objects.create(username=f"benchmark-{time.perf_counter_ns()}")
+                force_authenticate(request, user=user)
+                response = view(request)
+                transaction.set_rollback(True)
+            if response.status_code != 201:
+                raise RuntimeError(f"status {response.status_code}: {getattr(response, 'data', '')}")
+
+        return setup, run
+
+    def compare(self, results, baseline_path, threshold, min_delta_ms):
+        try:
+            with open(baseline_path) as f:
+                baseline = json.load(f)['results']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Could not read the baseline {baseline_path}: {e}")
+
+        regressions = []
+        self.stdout.write(f"\nCompared with {baseline_path} (threshold {threshold:.0%}):")
+        for key, current in results.items():
+            if key not in baseline:
+                continue
+            before, after = baseline[key]['p50_ms'], current['p50_ms']
+            change = (after - before) / before if before else 0
+            line = f"{key:<38} {before:>10.2f} -> {after:>10.2f} ms ({change:+.1%})"
+            if change > threshold and after - before > min_delta_ms:
+                regressions.append(key)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s) over {threshold:.0%}: {', '.join(regressions)}")
+        self.stdout.write(self.style.SUCCESS('No regressions'))
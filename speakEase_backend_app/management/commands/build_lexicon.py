@@ -0,0 +1,21 @@
+import os
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from speakEase_backend_app.ai_modules.audio_analysis import build_pronouncing_lexicon
+
+
+# build the memory mapped pronunciation lexicon from CMUdict
+class Command(BaseCommand):
+    help = 'Build the compact pronunciation lexicon file used by the voice analysis'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=str(settings.PRONUNCIATION_LEXICON_PATH))
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        words = build_pronouncing_lexicon(options['output'])
+        size_mb = os.path.getsize(options['output']) / (1024 * 1024)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {words} words to {options['output']} ({size_mb:.1f} MB) in {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,157 @@
+import csv
+import json
+import time
+from functools import partial
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from speakEase_backend_app.models import VocabularyWord, Tip
+from speakEase_backend_app.content_index import vocabulary_index, tip_index
+from speakEase_backend_app.ai_modules.pronunciation import expected_phonemes
+
+
+# stream the rows of a .csv (with a header row) or .jsonl file as (dict, None) or (None, error),
+# (None, None) for the blank jsonl lines so the line numbers stay right
+def read_rows(path, file_format):
+    with open(path, newline='', encoding='utf-8') as f:
+        if file_format == 'csv':
+            for row in csv.DictReader(f):
+                yield row, None
+        else:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    yield None, None
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield None, f"invalid json ({e})"
+                    continue
+                if not isinstance(row, dict):
+                    yield None, "expected a json object"
+                    continue
+                yield row, None
+
+
+def clean(row, name):
+    value = row.get(name)
+    return str(value).strip() if value is not None else ''
+
+
+# returns (model instance, None) or (None, error message)
+def vocabulary_from_row(row, use_g2p=True):
+    word = clean(row, 'word')
+    definition = clean(row, 'definition')
+    difficulty = clean(row, 'difficulty_level') or 'beginner'
+    if not word or len(word) > 100:
+        return None, 'word is required (max 100 characters)'
+    if not definition:
+        return None, 'definition is required'
+    if difficulty not in dict(VocabularyWord._meta.get_field('difficulty_level').choices):
+        return None, f"unknown difficulty_level '{difficulty}'"
+    return VocabularyWord(
+        word=word,
+        definition=definition,
+        difficulty_level=difficulty,
+        example_sentence=clean(row, 'example_sentence'),
+        # bulk_create skips the pre_save signal that sets them
+        phonemes=expected_phonemes(word, use_g2p),
+    ), None
+
+
+def tip_from_row(row):
+    title = clean(row, 'title')
+    content = clean(row, 'content')
+    category = clean(row, 'category') or 'general'
+    author = clean(row, 'author') or 'SpeakEase Team'
+    if not title or len(title) > 150:
+        return None, 'title is required (max 150 characters)'
+    if not content:
+        return None, 'content is required'
+    if category not in dict(Tip.TIP_TYPES):
+        return None, f"unknown category '{category}'"
+    if len(author) > 100:
+        return None, 'author is too long (max 100 characters)'
+    return Tip(title=title, content=content, category=category, author=author), None
+
+
+# Source helper: https://docs.djangoproject.com/en/5.2/ref/models/querysets/#bulk-create
+class Command(BaseCommand):
+    help = 'Import vocabulary words or tips from a CSV or JSONL file with batched inserts/upserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--model', choices=['vocabulary', 'tip'], required=True)
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Default: from the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Only validate the rows')
+        parser.add_argument('--max-errors', type=int, default=20, help='How many invalid rows to print')
+        parser.add_argument('--skip-g2p', action='store_true',
+                            help='Leave the phonemes of words missing from CMUdict empty (fill them with backfill_phonemes)')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f"{path} does not exist")
+        file_format = options['format'] or ('jsonl' if path.suffix in ('.jsonl', '.ndjson') else 'csv')
+        if options['model'] == 'vocabulary':
+            from_row = partial(vocabulary_from_row, use_g2p=not options['skip_g2p'])
+        else:
+            from_row = tip_from_row
+        batch_size = max(1, options['batch_size'])
+
+        start = time.perf_counter()
+        imported = invalid = 0
+        # vocabulary batches are keyed by word: the last row of a duplicated word wins
+        batch = {}
+        for line, (row, error) in enumerate(read_rows(path, file_format), start=2 if file_format == 'csv' else 1):
+            if row is None and error is None:
+                continue
+            obj = None
+            if row is not None:
+                obj, error = from_row(row)
+            if error:
+                invalid += 1
+                if invalid <= options['max_errors']:
+                    self.stderr.write(f"line {line}: {error}")
+                continue
+
+            batch[obj.word if options['model'] == 'vocabulary' else line] = obj
+            if len(batch) >= batch_size:
+                imported += self.save_batch(list(batch.values()), options)
+                batch = {}
+        imported += self.save_batch(list(batch.values()), options)
+
+        # bulk_create does not send the model signals, the other workers see the shared version
+        # of the index change (CACHE_BACKEND db or file) or reload it after CONTENT_INDEX_TTL
+        if not options['dry_run']:
+            (vocabulary_index if options['model'] == 'vocabulary' else tip_index).invalidate()
+
+        elapsed = time.perf_counter() - start
+        rate = imported / elapsed if elapsed else 0
+        action = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {imported} rows ({invalid} invalid) in {elapsed:.2f}s ({rate:.0f} rows/sec)"
+        ))
+
+    def save_batch(self, objects, options):
+        if not objects or options['dry_run']:
+            return len(objects)
+        with transaction.atomic():
+            if options['model'] == 'vocabulary':
+                update_fields = ['definition', 'difficulty_level', 'example_sentence', 'updated_at']
+                # without G2P the phonemes of the words missing from CMUdict are empty, keep the
+                # ones already computed (the word is the conflict key, so they still match it)
+                if not options['skip_g2p']:
+                    update_fields.append('phonemes')
+                # insert new words, update the existing ones (ON CONFLICT (word) DO UPDATE)
+                VocabularyWord.objects.bulk_create(
+                    objects,
+                    update_conflicts=True,
+                    unique_fields=['word'],
+                    update_fields=update_fields,
+                )
+            else:
+                Tip.objects.bulk_create(objects)
+        return len(objects)
@@ -0,0 +1,250 @@
+import itertools
+import json
+import queue
+import random
+import threading
+import time
+import uuid
+from urllib import error, request as urlrequest
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from speakEase_backend_app.ai_modules.synthetic import synthetic_speech, wav_bytes
+
+# Source helper: https://docs.python.org/3/library/urllib.request.html
+# load generator for a running server, no model needed when the server runs the stub backend:
+#
+#   ASR_BACKEND=stub ASR_STUB_LATENCY_MS=300 gunicorn speakEase_backend.wsgi -w 4
+#   python manage.py load_test --base-url http://localhost:8000 --users 20 --concurrency 20 --duration 60
+#
+# every worker thread logs in as one of the users, uploads synthetic clips to
+# /api/training/voice/ and reads /api/progress/ and /api/training-sessions/ in between
+
+READ_ENDPOINTS = ('/api/progress/', '/api/training-sessions/?page_size=20', '/api/progress/series/')
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Client:
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.token = None
+
+    # returns (status, parsed json or None), network errors are status 0
+    def call(self, method, path, body=None, content_type='application/json'):
+        headers = {'Content-Type': content_type} if body is not None else {}
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        if body is not None and content_type == 'application/json':
+            body = json.dumps(body).encode()
+        req = urlrequest.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with urlrequest.urlopen(req, timeout=self.timeout) as response:
+                return response.status, self._json(response.read())
+        except error.HTTPError as e:
+            return e.code, self._json(e.read())
+        except (error.URLError, OSError):
+            return 0, None
+
+    def _json(self, data):
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    def login(self, username, password, signup):
+        status, data = self.call('POST', '/api/login/', {'username': username, 'password': password})
+        if status != 200 and signup:
+            self.call('POST', '/api/users/signup/', {
+                'username': username, 'password': password, 'email': f"{username}@example.com", 'age': 30,
+            })
+            status, data = self.call('POST', '/api/login/', {'username': username, 'password': password})
+        if status != 200:
+            raise CommandError(f"Could not log in as {username} (status {status})")
+        self.token = data['access']
+
+    def upload(self, clip, duration, use_async):
+        boundary = uuid.uuid4().hex
+        parts = [
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"duration\"\r\n\r\n{duration}\r\n".encode(),
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"training_type\"\r\n\r\nvoice\r\n".encode(),
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"audio_file\"; filename=\"clip.wav\"\r\n"
+            f"Content-Type: audio/wav\r\n\r\n".encode() + clip + b"\r\n",
+            f"--{boundary}--\r\n".encode(),
+        ]
+        path = '/api/training/voice/' + ('?async=1' if use_async else '')
+        return self.call('POST', path, b''.join(parts), f"multipart/form-data; boundary={boundary}")
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def add(self, name, seconds, ok):
+        with self._lock:
+            self.latencies.setdefault(name, []).append(seconds)
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def report(self, elapsed):
+        operations = {}
+        with self._lock:
+            items = {name: list(values) for name, values in self.latencies.items()}
+            errors = dict(self.errors)
+        for name, values in sorted(items.items()):
+            operations[name] = {
+                'requests': len(values),
+                'errors': errors.get(name, 0),
+                'error_rate': round(errors.get(name, 0) / len(values), 4),
+                'throughput_rps': round(len(values) / elapsed, 2),
+                **{f"p{int(q * 100)}_ms": round(percentile(values, q) * 1000, 1) for q in (0.5, 0.9, 0.95, 0.99)},
+                'max_ms': round(max(values) * 1000, 1),
+            }
+        total = sum(op['requests'] for op in operations.values())
+        return {
+            'elapsed_seconds': round(elapsed, 2),
+            'requests': total,
+            'throughput_rps': round(total / elapsed, 2) if elapsed else 0,
+            'error_rate': round(sum(op['errors'] for op in operations.values()) / total, 4) if total else 0,
+            'operations': operations,
+        }
+
+
+class Command(BaseCommand):
+    help = 'Load test the voice training and read endpoints of a running server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000')
+        parser.add_argument('--users', type=int, default=5, help='Test users (created with signup if missing)')
+        parser.add_argument('--user-prefix', default='loadtest')
+        parser.add_argument('--password', default='loadtest-password')
+        parser.add_argument('--no-signup', action='store_true', help='Only log in, never create the users')
+        parser.add_argument('--concurrency', type=int, default=5, help='Worker threads')
+        parser.add_argument('--rate', type=float, default=0,
+                            help='Arrivals per second for all workers (0 = closed loop, as fast as possible)')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+        parser.add_argument('--clip-seconds', default='5,10,20', help='Lengths of the uploaded clips')
+        parser.add_argument('--read-ratio', type=float, default=0.5, help='Share of the requests that are reads')
+        parser.add_argument('--async', dest='use_async', action='store_true',
+                            help='Upload with ?async=1 and poll the job until it is done')
+        parser.add_argument('--timeout', type=float, default=120)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the report to this JSON file')
+
+    def handle(self, *args, **options):
+        try:
+            lengths = [float(value) for value in options['clip_seconds'].split(',') if value]
+        except ValueError:
+            raise CommandError('--clip-seconds must be numbers')
+
+        # the clips are made once, every upload adds its own noise (see worker) so the
+        # server's analysis cache never gets a hit and each request pays for the full analysis
+        clips = [
+            (synthetic_speech(seconds, seed=options['seed'] * 100 + index + 1), max(1, int(seconds)))
+            for index, seconds in enumerate(lengths)
+        ]
+
+        clients = []
+        for index in range(max(1, options['users'])):
+            client = Client(options['base_url'], options['timeout'])
+            client.login(f"{options['user_prefix']}{index}", options['password'], not options['no_signup'])
+            clients.append(client)
+        self.stdout.write(f"Logged in {len(clients)} users, running {options['duration']:g}s "
+                          f"with {options['concurrency']} workers")
+
+        stats = Stats()
+        stop = threading.Event()
+        # open loop: a ticket per arrival, the workers take them (queueing delay counts)
+        tickets = queue.Queue() if options['rate'] > 0 else None
+        workers = [
+            threading.Thread(target=self.worker, args=(
+                clients[index % len(clients)], clips, stats, stop, tickets, options, random.Random(options['seed'] + index)
+            ), daemon=True)
+            for index in range(max(1, options['concurrency']))
+        ]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        try:
+            if tickets is not None:
+                interval = 1 / options['rate']
+                for count in itertools.count():
+                    due = start + count * interval
+                    if due - start >= options['duration']:
+                        break
+                    time.sleep(max(0, due - time.perf_counter()))
+                    tickets.put(time.perf_counter())
+            else:
+                time.sleep(options['duration'])
+        except KeyboardInterrupt:
+            pass
+        stop.set()
+        for worker in workers:
+            worker.join(timeout=options['timeout'])
+        report = stats.report(time.perf_counter() - start)
+        if tickets is not None:
+            report['dropped_arrivals'] = tickets.qsize()
+
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+
+    def worker(self, client, clips, stats, stop, tickets, options, rng):
+        while not stop.is_set():
+            if tickets is not None:
+                try:
+                    arrived = tickets.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+            else:
+                arrived = time.perf_counter()
+
+            if rng.random() < options['read_ratio']:
+                path = rng.choice(READ_ENDPOINTS)
+                status, _ = client.call('GET', path)
+                stats.add(f"GET {path.split('?')[0]}", time.perf_counter() - arrived, status == 200)
+                continue
+
+            samples, duration = rng.choice(clips)
+            noise = np.random.default_rng(rng.getrandbits(64)).normal(0, 0.002, len(samples))
+            clip = wav_bytes(samples + noise.astype(np.float32))
+            status, data = client.upload(clip, duration, options['use_async'])
+            if not options['use_async']:
+                stats.add('POST /api/training/voice/', time.perf_counter() - arrived, status == 201)
+                continue
+            stats.add('POST /api/training/voice/?async=1', time.perf_counter() - arrived, status == 202)
+            if status == 202:
+                # time until the analysis result is ready
+                done = self.wait_for_job(client, data['status_url'], stop, options['timeout'])
+                stats.add('analysis job', time.perf_counter() - arrived, done)
+
+    def wait_for_job(self, client, status_url, stop, timeout):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline and not stop.is_set():
+            status, data = client.call('GET', status_url)
+            if status != 200:
+                return False
+            if data['status'] in ('done', 'failed'):
+                return data['status'] == 'done'
+            time.sleep(0.25)
+        return False
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"\n{report['requests']} requests in {report['elapsed_seconds']}s: "
+            f"{report['throughput_rps']} req/s, {report['error_rate']:.2%} errors"
+        )
+        self.stdout.write(f"{'operation':<36}{'count':>7}{'err%':>7}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+        for name, op in report['operations'].items():
+            self.stdout.write(
+                f"{name:<36}{op['requests']:>7}{op['error_rate']:>7.1%}{op['throughput_rps']:>8}"
+                f"{op['p50_ms']:>9}{op['p95_ms']:>9}{op['p99_ms']:>9}{op['max_ms']:>9}"
+            )
+        if 'dropped_arrivals' in report:
+            self.stdout.write(f"arrivals not started before the end: {report['dropped_arrivals']}")
@@ -0,0 +1,20 @@
+import time
+from django.core.management.base import BaseCommand
+from speakEase_backend_app.progress import rebuild_progress, rebuild_daily_progress
+
+
+# recompute ProgressAnalytics, the profile training time and the DailyProgress rollups from the TrainingSession rows
+class Command(BaseCommand):
+    help = 'Rebuild the progress totals of the users from their training sessions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='Only this user id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        updated = rebuild_progress(options['user_ids'], options['batch_size'])
+        days = rebuild_daily_progress(options['user_ids'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt progress for {updated} users and {days} daily rollups in {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,83 @@
+import multiprocessing
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from speakEase_backend_app.jobs import claim_next_job, process_job, requeue_stale_jobs
+
+
+# take pending jobs from the DB queue until stopped
+def worker_loop(poll_interval, once):
+    while True:
+        job = claim_next_job()
+        if job:
+            process_job(job)
+            continue
+        if once:
+            return
+        time.sleep(poll_interval)
+
+
+# one worker process, its threads share the whisper batch scheduler of the process
+def worker_process(poll_interval, once, threads):
+    # every process needs its own DB connection
+    connections.close_all()
+    workers = [
+        threading.Thread(target=worker_loop, args=(poll_interval, once))
+        for _ in range(max(1, threads))
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+# Source helper: https://docs.djangoproject.com/en/5.2/howto/custom-management-commands/
+class Command(BaseCommand):
+    help = 'Run local worker processes for the queued voice analysis jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'ANALYSIS_WORKERS', 2))
+        parser.add_argument('--threads', type=int, default=getattr(settings, 'WHISPER_BATCH_MAX_SIZE', 1),
+                            help='Jobs each process runs at the same time, batched into one whisper call')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--stale-after', type=int, default=600, help='Requeue jobs running longer than this (seconds)')
+        parser.add_argument('--requeue-interval', type=float, default=60.0,
+                            help='Seconds between the checks for jobs of dead workers')
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+
+    def requeue(self, stale_after):
+        requeued, failed = requeue_stale_jobs(stale_after)
+        if requeued or failed:
+            self.stdout.write(f"Requeued {requeued} stale jobs, failed {failed}")
+
+    def handle(self, *args, **options):
+        self.requeue(options['stale_after'])
+
+        workers = max(1, options['workers'])
+        # close the parent connection so the forked workers do not share it
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(
+                target=worker_process,
+                args=(options['poll_interval'], options['once'], options['threads'])
+            )
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(self.style.SUCCESS(f"Started {workers} analysis workers"))
+
+        try:
+            # a worker killed in the middle of a job leaves it running, the parent puts it
+            # back in the queue while the other workers keep going
+            while any(process.is_alive() for process in processes):
+                for process in processes:
+                    process.join(options['requeue_interval'] / len(processes))
+                self.requeue(options['stale_after'])
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
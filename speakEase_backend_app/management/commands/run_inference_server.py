@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from speakEase_backend_app.ai_modules.asr_backends import ASR_BACKENDS
+from speakEase_backend_app.ai_modules.audio_analysis import load_whisper
+from speakEase_backend_app.ai_modules.inference_server import InferenceServer
+
+
+# Source helper: https://docs.python.org/3/library/socketserver.html
+# one whisper per node: run it next to the web workers and set ASR_BACKEND=remote for them
+class Command(BaseCommand):
+    help = 'Run the shared inference server that owns the whisper model and its batching'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--address', default=settings.INFERENCE_SERVER_ADDRESS,
+                            help='unix:/path/to/socket or host:port')
+        parser.add_argument('--backend', default=getattr(settings, 'INFERENCE_SERVER_BACKEND', 'hf'))
+        parser.add_argument('--batch-size', type=int, default=getattr(settings, 'WHISPER_BATCH_MAX_SIZE', 8))
+        parser.add_argument('--max-wait-ms', type=int, default=getattr(settings, 'WHISPER_BATCH_MAX_WAIT_MS', 30))
+
+    def handle(self, *args, **options):
+        backend_name = options['backend']
+        if backend_name == 'remote' or backend_name not in ASR_BACKENDS:
+            raise CommandError(f"The server needs a local backend, not '{backend_name}'")
+
+        # the workers put INFERENCE_SERVER_BACKEND in their analysis cache keys
+        if backend_name != getattr(settings, 'INFERENCE_SERVER_BACKEND', 'hf'):
+            self.stderr.write(self.style.WARNING(
+                f"--backend {backend_name} differs from INFERENCE_SERVER_BACKEND, the workers' cached results "
+                f"will be keyed with the wrong backend"
+            ))
+
+        # the model is loaded before listening so the first request does not pay for it
+        backend = load_whisper(backend_name)
+        self.stdout.write(f"Loaded {backend.name} {backend.model_name} in {backend.load_seconds}s")
+
+        server = InferenceServer(
+            options['address'], backend, options['batch_size'], options['max_wait_ms'],
+            getattr(settings, 'WHISPER_RESULT_TIMEOUT', 300),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Inference server listening on {options['address']}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from speakEase_backend_app.ai_modules import registry
+
+
+# load the models and corpora before serving traffic, e.g. in the deploy script
+class Command(BaseCommand):
+    help = 'Load the AI models and corpora so the first request does not pay for it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('resources', nargs='*', help="Resources to load (default: all)")
+
+    def handle(self, *args, **options):
+        names = options['resources'] or registry.names()
+        unknown = [name for name in names if name not in registry.names()]
+        if unknown:
+            raise CommandError(f"Unknown resources: {', '.join(unknown)} (choose from {', '.join(registry.names())})")
+
+        for name, info in registry.warm_up(names).items():
+            if info['loaded']:
+                self.stdout.write(self.style.SUCCESS(f"{name}: loaded in {info['load_seconds']}s"))
+            else:
+                self.stdout.write(self.style.ERROR(f"{name}: failed ({info['error']})"))
+
+        if not registry.is_ready(names):
+            raise CommandError('Some resources failed to load')
@@ -0,0 +1,34 @@
+import time
+from django.conf import settings
+from .instrumentation import collect_stages, stage_metrics
+
+# Source helper: https://docs.djangoproject.com/en/5.2/topics/http/middleware/
+# times every request: the total goes to the per view histogram, the stages measured
+# during the request are sent back as a Server-Timing header, e.g.
+#   Server-Timing: decode;dur=41.2, whisper_generate;dur=812.5, db_write;dur=6.1, total;dur=905.3
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'SERVER_TIMING', True)
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with collect_stages() as timings:
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        stage_metrics.observe_request(match.view_name if match else 'unmatched', total)
+
+        if self.enabled:
+            # a stage run more than once (one per chunk) is summed
+            durations = {}
+            for name, seconds in timings:
+                durations[name] = durations.get(name, 0) + seconds
+            durations['total'] = total
+            response['Server-Timing'] = ", ".join(
+                f"{name};dur={seconds * 1000:.1f}" for name, seconds in durations.items()
+            )
+        return response
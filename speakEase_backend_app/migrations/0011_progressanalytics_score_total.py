@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:45
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+# fill score_total and total_sessions from the existing sessions
+def backfill_score_total(apps, schema_editor):
+    ProgressAnalytics = apps.get_model('speakEase_backend_app', 'ProgressAnalytics')
+    TrainingSession = apps.get_model('speakEase_backend_app', 'TrainingSession')
+    sessions = TrainingSession.objects.filter(user=OuterRef('user')).order_by().values('user')
+    # the subqueries are NULL for the users without sessions, both columns are NOT NULL
+    ProgressAnalytics.objects.update(
+        score_total=Coalesce(Subquery(sessions.annotate(total=Sum('score')).values('total')[:1]), Value(0.0)),
+        total_sessions=Coalesce(Subquery(sessions.annotate(count=Count('id')).values('count')[:1]), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('speakEase_backend_app', '0010_analysiscacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='progressanalytics',
+            name='score_total',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.RunPython(backfill_score_total, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDate
+
+
+# build the rollups of the sessions saved before this migration
+def backfill_daily_progress(apps, schema_editor):
+    DailyProgress = apps.get_model('speakEase_backend_app', 'DailyProgress')
+    TrainingSession = apps.get_model('speakEase_backend_app', 'TrainingSession')
+    rows = TrainingSession.objects.order_by().annotate(day=TruncDate('created_at')).values('user', 'day').annotate(
+        count=Count('id'), total=Sum('score'), best=Max('score'), worst=Min('score'), seconds=Sum('duration'),
+    )
+    DailyProgress.objects.bulk_create(
+        (
+            DailyProgress(
+                user_id=row['user'], day=row['day'], session_count=row['count'], score_sum=row['total'],
+                score_min=row['worst'], score_max=row['best'], training_seconds=row['seconds'],
+            )
+            for row in rows.iterator(chunk_size=1000)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('speakEase_backend_app', '0011_progressanalytics_score_total'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingsession',
+            name='wpm',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.CreateModel(
+            name='DailyProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('session_count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0.0)),
+                ('score_min', models.FloatField(default=0.0)),
+                ('score_max', models.FloatField(default=0.0)),
+                ('training_seconds', models.PositiveIntegerField(default=0)),
+                ('wpm_sum', models.FloatField(default=0.0)),
+                ('wpm_count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['day'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'day'), name='dailyprogress_user_day_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_progress, migrations.RunPython.noop),
+    ]
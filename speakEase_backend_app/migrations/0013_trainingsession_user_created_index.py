@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('speakEase_backend_app', '0012_dailyprogress'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trainingsession',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='session_user_created_idx'),
+        ),
+    ]
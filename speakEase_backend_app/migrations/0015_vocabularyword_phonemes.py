@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:40
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('speakEase_backend_app', '0014_tip_updated_at_vocabularyword_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vocabularyword',
+            name='phonemes',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddIndex(
+            model_name='vocabularyword',
+            index=models.Index(django.db.models.functions.text.Lower('word'), name='vocabularyword_word_lower_idx'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 
 # Create your models here.
 
@@ -38,6 +40,8 @@ class TrainingSession(models.Model):
     # performance metrics
     repeated_words = models.PositiveIntegerField(default=0)
     mispronunciations = models.PositiveIntegerField(default=0)
+    # words per minute, 0 when not measured
+    wpm = models.FloatField(default=0.0)
     # this ensure scores never go negative or exceed 100
     score = models.FloatField(
         default=0.0,
@@ -48,6 +52,8 @@ class TrainingSession(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        # the session history pages of one user, newest first
+        indexes = [models.Index(fields=['user', '-created_at', '-id'], name='session_user_created_idx')]
     def __str__(self):
          return f"{self.user.username} - {self.training_type} ({self.created_at.date()})"
 
@@ -55,6 +61,8 @@ class TrainingSession(models.Model):
 class ProgressAnalytics(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='progress_analytics')
     total_sessions = models.PositiveIntegerField(default=0)
+    # sum of all the session scores, average_score = score_total / total_sessions
+    score_total = models.FloatField(default=0.0)
     average_score = models.FloatField(default=0.0)
     best_score = models.FloatField(default=0.0)
     worst_score = models.FloatField(default=0.0)
@@ -64,6 +72,27 @@ class ProgressAnalytics(models.Model):
     def __str__(self):
         return f"Progress Analytics for {self.user.username}"
 
+# DailyProgress Model (per user per day totals for the progress charts)
+# kept up to date by the TrainingSession signals, see progress.py
+class DailyProgress(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_progress')
+    day = models.DateField()
+    session_count = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0.0)
+    score_min = models.FloatField(default=0.0)
+    score_max = models.FloatField(default=0.0)
+    training_seconds = models.PositiveIntegerField(default=0)
+    # only the sessions with a measured wpm
+    wpm_sum = models.FloatField(default=0.0)
+    wpm_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['day']
+        constraints = [models.UniqueConstraint(fields=['user', 'day'], name='dailyprogress_user_day_unique')]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.day} ({self.session_count} sessions)"
+
 # Tip Model
 class Tip(models.Model):
     TIP_TYPES = [
@@ -77,6 +106,7 @@ class Tip(models.Model):
     category = models.CharField(max_length=20, choices=TIP_TYPES, default='general')
     author = models.CharField(max_length=100, blank=True, default="SpeakEase Team")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
@@ -95,9 +125,59 @@ class VocabularyWord(models.Model):
     )
     # to give user example how to use the word in good sentence 
     example_sentence = models.TextField(blank=True)
+    # expected ARPAbet phonemes of the word, set when the word is saved or imported
+    # (a text column: a 100 character phrase can have more than 255 characters of phonemes)
+    phonemes = models.TextField(blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # the practiced word is looked up case insensitively on every voice training request
+        indexes = [models.Index(Lower('word'), name='vocabularyword_word_lower_idx')]
 
     def __str__(self):
         return self.word
-    
-    
\ No newline at end of file
+
+# AnalysisJob Model (voice uploads waiting for the analysis workers)
+class AnalysisJob(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='analysis_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    audio_file = models.FileField(upload_to='analysis_jobs/', blank=True)
+    training_type = models.CharField(max_length=20, choices=TrainingSession.TRAINING_TYPES, default='voice')
+    duration = models.PositiveIntegerField(help_text="Duration in seconds")
+    word = models.CharField(max_length=100, blank=True)
+    # the same data VoiceTrainingView returns
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    training_session = models.ForeignKey(TrainingSession, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        # the workers look for the oldest pending job
+        indexes = [models.Index(fields=['status', 'created_at'], name='analysisjob_status_idx')]
+
+    def __str__(self):
+        return f"{self.user.username} - job {self.id} ({self.status})"
+
+# AnalysisCacheEntry Model (transcripts and scores cached by the hash of the audio)
+class AnalysisCacheEntry(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    value = models.JSONField()
+    size = models.PositiveIntegerField(default=0)  # in bytes
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"Analysis cache {self.key[:12]} ({self.hits} hits)"
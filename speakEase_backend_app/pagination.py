@@ -0,0 +1,61 @@
+import base64
+import json
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
+
+# Source helper: https://use-the-index-luke.com/no-offset
+# keyset (cursor) pagination on (created_at, id), newest first: every page is an index range
+# scan on (user, -created_at, -id) however deep the user scrolls, unlike OFFSET
+
+
+class KeysetPagination:
+    page_size = 20
+    max_page_size = 100
+
+    # only paginate when the client asks for it, the plain list stays for the old clients
+    def is_requested(self, request):
+        return 'cursor' in request.query_params or 'page_size' in request.query_params
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get('page_size', self.page_size))
+        except ValueError:
+            raise ValidationError({'page_size': 'Must be a number'})
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, obj):
+        data = json.dumps([obj.created_at.isoformat(), obj.id])
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            created_at, obj_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            created_at = parse_datetime(created_at)
+            if created_at is None:
+                raise ValueError
+            return created_at, int(obj_id)
+        except (ValueError, TypeError):
+            raise ValidationError({'cursor': 'Invalid cursor'})
+
+    # returns the rows of the page and the cursor of the next page (None on the last page)
+    def paginate_queryset(self, queryset, request):
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by('-created_at', '-id')
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            created_at, obj_id = self.decode_cursor(cursor)
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=obj_id))
+
+        # one extra row tells if there is a next page
+        rows = list(queryset[:page_size + 1])
+        next_cursor = self.encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+        return rows[:page_size], next_cursor
+
+
+# pages for the admin users list: ?page=N&page_size=M
+class AdminUserPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
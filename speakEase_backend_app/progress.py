@@ -0,0 +1,166 @@
+from django.db import transaction
+from django.db.models import Case, Count, ExpressionWrapper, F, FloatField, Max, Min, Q, Sum, Value, When
+from django.db.models.functions import Greatest, Least, TruncDate
+from django.utils import timezone
+from .models import TrainingSession, UserProfile, ProgressAnalytics, DailyProgress
+
+# ProgressAnalytics is kept as running totals (count, sum, min, max) updated in the DB,
+# so saving a session costs the same whether the user has 10 or 10000 sessions
+
+
+# add one new session to the user progress, one UPDATE per table in one transaction
+def record_session_progress(user, score, duration):
+    score = float(score)
+    with transaction.atomic():
+        # add to the total_training_time the duration
+        UserProfile.objects.filter(user=user).update(
+            total_training_time=F('total_training_time') + duration,
+            updated_at=timezone.now(),
+        )
+        # the right side uses the values before the update, so total_sessions=0 means first session
+        ProgressAnalytics.objects.filter(user=user).update(
+            total_sessions=F('total_sessions') + 1,
+            score_total=F('score_total') + score,
+            total_training_time=F('total_training_time') + duration,
+            average_score=ExpressionWrapper(
+                (F('score_total') + score) / (F('total_sessions') + 1.0), output_field=FloatField()
+            ),
+            best_score=Case(When(total_sessions=0, then=Value(score)), default=Greatest('best_score', Value(score))),
+            worst_score=Case(When(total_sessions=0, then=Value(score)), default=Least('worst_score', Value(score))),
+            last_updated=timezone.now(),
+        )
+
+
+# recompute the totals from the TrainingSession rows (all users, or only user_ids)
+def rebuild_progress(user_ids=None, batch_size=1000):
+    sessions = TrainingSession.objects.all()
+    analytics = ProgressAnalytics.objects.order_by('id')
+    profiles = UserProfile.objects.order_by('id')
+    if user_ids is not None:
+        sessions = sessions.filter(user_id__in=user_ids)
+        analytics = analytics.filter(user_id__in=user_ids)
+        profiles = profiles.filter(user_id__in=user_ids)
+
+    # one grouped query for all the users
+    totals = {
+        row['user']: row
+        for row in sessions.order_by().values('user').annotate(
+            count=Count('id'), total=Sum('score'), best=Max('score'), worst=Min('score'), seconds=Sum('duration')
+        )
+    }
+
+    updated = 0
+    batch = []
+    # bulk_update skips auto_now, the ProgressAnalyticsView ETag needs the new last_updated
+    now = timezone.now()
+    for progress in analytics.iterator(chunk_size=batch_size):
+        row = totals.get(progress.user_id)
+        progress.total_sessions = row['count'] if row else 0
+        progress.score_total = row['total'] if row else 0.0
+        progress.average_score = row['total'] / row['count'] if row else 0.0
+        progress.best_score = row['best'] if row else 0.0
+        progress.worst_score = row['worst'] if row else 0.0
+        progress.total_training_time = row['seconds'] if row else 0
+        progress.last_updated = now
+        batch.append(progress)
+        if len(batch) >= batch_size:
+            updated += _save_progress_batch(batch)
+            batch = []
+    updated += _save_progress_batch(batch)
+
+    batch = []
+    for profile in profiles.iterator(chunk_size=batch_size):
+        row = totals.get(profile.user_id)
+        profile.total_training_time = row['seconds'] if row else 0
+        batch.append(profile)
+        if len(batch) >= batch_size:
+            UserProfile.objects.bulk_update(batch, ['total_training_time'])
+            batch = []
+    UserProfile.objects.bulk_update(batch, ['total_training_time'])
+
+    return updated
+
+
+def _save_progress_batch(batch):
+    ProgressAnalytics.objects.bulk_update(batch, [
+        'total_sessions', 'score_total', 'average_score', 'best_score', 'worst_score', 'total_training_time',
+        'last_updated',
+    ])
+    return len(batch)
+
+
+# the rollup day of a session
+def session_day(session):
+    return timezone.localdate(session.created_at)
+
+
+# add a new session to its DailyProgress row (created on the first session of the day)
+def add_session_to_rollup(session):
+    score = float(session.score)
+    wpm = float(session.wpm or 0)
+    with transaction.atomic():
+        rollup, _ = DailyProgress.objects.get_or_create(user_id=session.user_id, day=session_day(session))
+        DailyProgress.objects.filter(pk=rollup.pk).update(
+            session_count=F('session_count') + 1,
+            score_sum=F('score_sum') + score,
+            score_min=Case(When(session_count=0, then=Value(score)), default=Least('score_min', Value(score))),
+            score_max=Case(When(session_count=0, then=Value(score)), default=Greatest('score_max', Value(score))),
+            training_seconds=F('training_seconds') + session.duration,
+            wpm_sum=F('wpm_sum') + wpm,
+            wpm_count=F('wpm_count') + (1 if wpm > 0 else 0),
+        )
+
+
+# take a deleted session out of its DailyProgress row, min/max come from the rest of that day
+def remove_session_from_rollup(session):
+    day = session_day(session)
+    wpm = float(session.wpm or 0)
+    with transaction.atomic():
+        rollups = DailyProgress.objects.select_for_update().filter(user_id=session.user_id, day=day)
+        rollup = rollups.first()
+        if not rollup:
+            return
+        if rollup.session_count <= 1:
+            rollup.delete()
+            return
+        day_sessions = TrainingSession.objects.filter(
+            user_id=session.user_id, created_at__date=day
+        ).exclude(pk=session.pk).aggregate(best=Max('score'), worst=Min('score'))
+        rollups.update(
+            session_count=F('session_count') - 1,
+            score_sum=F('score_sum') - float(session.score),
+            score_min=day_sessions['worst'] if day_sessions['worst'] is not None else 0.0,
+            score_max=day_sessions['best'] if day_sessions['best'] is not None else 0.0,
+            training_seconds=Greatest(F('training_seconds') - session.duration, Value(0)),
+            wpm_sum=F('wpm_sum') - wpm,
+            wpm_count=F('wpm_count') - (1 if wpm > 0 else 0),
+        )
+
+
+# recompute the DailyProgress rows from the TrainingSession rows (all users, or only user_ids)
+def rebuild_daily_progress(user_ids=None, batch_size=1000):
+    sessions = TrainingSession.objects.all()
+    rollups = DailyProgress.objects.all()
+    if user_ids is not None:
+        sessions = sessions.filter(user_id__in=user_ids)
+        rollups = rollups.filter(user_id__in=user_ids)
+
+    rows = sessions.order_by().annotate(day=TruncDate('created_at')).values('user', 'day').annotate(
+        count=Count('id'), total=Sum('score'), best=Max('score'), worst=Min('score'), seconds=Sum('duration'),
+        wpm_total=Sum('wpm', filter=Q(wpm__gt=0)), wpm_sessions=Count('id', filter=Q(wpm__gt=0)),
+    )
+    with transaction.atomic():
+        rollups.delete()
+        created = DailyProgress.objects.bulk_create(
+            (
+                DailyProgress(
+                    user_id=row['user'], day=row['day'], session_count=row['count'],
+                    score_sum=row['total'], score_min=row['worst'], score_max=row['best'],
+                    training_seconds=row['seconds'], wpm_sum=row['wpm_total'] or 0.0,
+                    wpm_count=row['wpm_sessions'],
+                )
+                for row in rows.iterator(chunk_size=batch_size)
+            ),
+            batch_size=batch_size,
+        )
+    return len(created)
@@ -1,13 +1,25 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import TrainingSession, ProgressAnalytics, Tip, UserProfile, VocabularyWord
+from .models import TrainingSession, ProgressAnalytics, Tip, UserProfile, VocabularyWord, AnalysisJob
 
 User = get_user_model()
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = '__all__'
+        # never send the password hash, groups/user_permissions cost extra queries per user
+        exclude = ['password', 'groups', 'user_permissions']
+
+# admin users list, the profile and progress come from select_related (no query per user)
+class AdminUserSerializer(UserSerializer):
+    full_name = serializers.CharField(source='profile.full_name', read_only=True, default=None)
+    age = serializers.IntegerField(source='profile.age', read_only=True, default=None)
+    total_training_time = serializers.IntegerField(source='profile.total_training_time', read_only=True, default=None)
+    total_sessions = serializers.IntegerField(source='progress_analytics.total_sessions', read_only=True, default=None)
+    average_score = serializers.FloatField(source='progress_analytics.average_score', read_only=True, default=None)
+
+    class Meta(UserSerializer.Meta):
+        pass
 
 class UserProfileSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
@@ -16,7 +28,16 @@ class UserProfileSerializer(serializers.ModelSerializer):
         model = UserProfile
         fields = '__all__'
         
-class TrainingSessionSerializer(serializers.ModelSerializer):
+# drop the fields the client did not ask for, pass context={'fields': [...]} (None = all fields)
+class SparseFieldsMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get('fields')
+        if requested:
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
+
+class TrainingSessionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # get the username from User model
     user_username = serializers.CharField(source='user.username', read_only=True)
     class Meta:
@@ -39,4 +60,10 @@ class VocabularyWordSerializer(serializers.ModelSerializer):
     class Meta:
         model = VocabularyWord
         fields = '__all__'
-        
\ No newline at end of file
+        read_only_fields = ['phonemes']
+
+class AnalysisJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AnalysisJob
+        fields = ['id', 'status', 'training_type', 'duration', 'word', 'result', 'error',
+                  'training_session', 'created_at', 'started_at', 'finished_at']
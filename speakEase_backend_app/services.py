@@ -0,0 +1,150 @@
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+from .models import TrainingSession, VocabularyWord
+from .serializers import TrainingSessionSerializer
+from .ai_modules import audio_analyzer, AudioBuffer
+from .ai_modules.audio_analysis import timestamp_metrics
+from .ai_modules.pronunciation import score_pronunciation, word_phonemes
+from .ai_modules.decoding import decode_path, decode_upload, AudioDecodeError, DECODE_SAMPLE_RATE
+from .analysis_cache import analysis_cache, transcript_key, analysis_key
+from .progress import record_session_progress
+from .instrumentation import stage
+
+# the voice training analysis shared by VoiceTrainingView and the analysis job workers
+
+
+# raised when the audio can not be transcribed or scored
+class AnalysisError(Exception):
+    pass
+
+
+# decode an audio file once to mono 16kHz for the whole analysis
+def decode_audio_file(path):
+    try:
+        with stage('decode'):
+            return AudioBuffer(decode_path(path), DECODE_SAMPLE_RATE)
+    except AudioDecodeError as e:
+        print(f"Error decoding {path}: {e}")
+        raise AnalysisError('Could not decode the audio file')
+
+
+# decode a request upload straight from memory (or django's own upload temp file)
+def decode_uploaded_audio(uploaded_file):
+    try:
+        with stage('decode'):
+            return AudioBuffer(decode_upload(uploaded_file), DECODE_SAMPLE_RATE)
+    except AudioDecodeError as e:
+        print(f"Error decoding upload {uploaded_file.name}: {e}")
+        raise AnalysisError('Could not decode the audio file')
+
+
+# transcribe + score the audio, save the TrainingSession and update the user progress,
+# transcribed_text is given when the audio was already transcribed (live sessions),
+# job is the AnalysisJob to mark done in the same transaction as the session
+def analyze_voice_training(user, audio, training_type, duration, word='', transcribed_text=None, job=None):
+    # the same audio with the same model and config skips the model
+    cache_key = transcript_key(audio)
+    transcription = {'text': transcribed_text} if transcribed_text is not None else analysis_cache.get(cache_key)
+    if transcription is None:
+        # Transcribe audio using audio_analyzer from audio_analysis ai model
+        with stage('transcribe'):
+            transcription_result = audio_analyzer.transcribe_audio(audio)
+        if transcription_result and transcription_result.get('timeout'):
+            raise AnalysisError('Transcription timed out, please try again later')
+        if not transcription_result or 'text' not in transcription_result:
+            raise AnalysisError('Transcription failed')
+
+        transcription = {
+            'text': transcription_result['text'],
+            'segments': transcription_result.get('segments'),
+            'words': transcription_result.get('words'),
+        }
+        analysis_cache.set(cache_key, transcription)
+    transcribed_text = transcription['text']
+
+    # with the whisper timestamps the rate and the pauses use the measured duration
+    timing = None
+    if transcription.get('segments'):
+        timing = timestamp_metrics(transcription.get('words'), transcription['segments'], audio.duration)
+    if timing:
+        duration = max(1, int(round(audio.duration)))
+
+    cache_key = analysis_key(audio, duration, transcribed_text, timing['source'] if timing else 'rms')
+    analysis_result = analysis_cache.get(cache_key)
+    if analysis_result is None:
+        # audio analysis calculate_overall_score
+        with stage('score'):
+            analysis_result = audio_analyzer.calculate_overall_score(
+                transcribed_text=transcribed_text,
+                audio_duration_seconds=timing['duration'] if timing else duration,
+                audio=audio,
+                timing=timing,
+            )
+
+        if not analysis_result:
+            raise AnalysisError('Analysis failed')
+        analysis_cache.set(cache_key, analysis_result)
+
+    pronunciation = None
+    if word:
+        with stage('pronunciation'):
+            pronunciation = target_word_pronunciation(word, transcribed_text)
+
+    # the session, the progress totals and the job result are saved together, a worker
+    # that dies before the commit leaves nothing behind for the retry to duplicate
+    with stage('db_write'), transaction.atomic():
+        # it create new TrainingSession save the data to db
+        training_session = TrainingSession.objects.create(
+            # link session to the user
+            user=user,
+            training_type=training_type,
+            duration=duration,
+            score=analysis_result.get('score', 0),
+            mispronunciations=analysis_result.get('mis_pct', 0),
+            repeated_words=analysis_result.get('repeated', 0),
+            wpm=analysis_result.get('wpm', 0),
+            feedback_text=analysis_result.get('feedback', ''),
+            transcribed_text=transcribed_text
+        )
+
+        # update the running totals of the user progress
+        record_session_progress(user, training_session.score, duration)
+
+        serializer = TrainingSessionSerializer(training_session)
+        result = {
+            **serializer.data,
+            'analysis': {
+                'wpm': analysis_result.get('wpm', 0),
+                'rating': analysis_result.get('rating'),
+                'word': word,
+                'mispronounced_words': analysis_result.get('mispronounced_words', []),
+                'repeated_words': analysis_result.get('repeated_words', []),
+                'pauses_percentage': analysis_result.get('pauses_percentage'),
+                'pauses': analysis_result.get('pauses'),
+                'pronunciation': pronunciation,
+                'timing': timing,
+            }
+        }
+
+        if job is not None:
+            job.status = 'done'
+            job.result = result
+            job.training_session = training_session
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'result', 'training_session', 'finished_at'])
+    return result
+
+
+# similarity of the recognized words with the practiced word, the expected phonemes come
+# from the VocabularyWord row (computed on save), other words from the lexicon only
+def target_word_pronunciation(word, transcribed_text):
+    word = word.strip()
+    # LOWER(word) = ... uses the vocabularyword_word_lower_idx index (word__iexact would not)
+    expected = (
+        VocabularyWord.objects.alias(word_lower=Lower('word')).filter(word_lower=word.lower())
+        .values_list('phonemes', flat=True).first()
+    )
+    if not expected:
+        expected = word_phonemes(word, use_g2p=False)
+    return score_pronunciation(word, expected, transcribed_text)
@@ -0,0 +1,46 @@
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import TrainingSession, VocabularyWord, Tip
+from .progress import add_session_to_rollup, remove_session_from_rollup
+from .content_index import vocabulary_index, tip_index
+
+User = get_user_model()
+
+# Source helper: https://docs.djangoproject.com/en/5.2/topics/signals/
+
+
+# keep the DailyProgress rollups in sync with the training sessions
+@receiver(post_save, sender=TrainingSession)
+def training_session_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        add_session_to_rollup(instance)
+
+
+@receiver(post_delete, sender=TrainingSession)
+def training_session_deleted(sender, instance, origin=None, **kwargs):
+    # deleting a user cascades to its DailyProgress rows too, no per session update needed
+    if isinstance(origin, User) or (isinstance(origin, QuerySet) and origin.model is User):
+        return
+    remove_session_from_rollup(instance)
+
+
+# the expected phonemes are computed here so the G2P model never runs on a request
+@receiver(pre_save, sender=VocabularyWord)
+def vocabulary_phonemes(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'word' not in update_fields):
+        return
+    from .ai_modules.pronunciation import expected_phonemes
+    instance.phonemes = expected_phonemes(instance.word)
+
+
+# drop the random id indexes when the content changes
+@receiver([post_save, post_delete], sender=VocabularyWord)
+def vocabulary_changed(sender, **kwargs):
+    vocabulary_index.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Tip)
+def tip_changed(sender, **kwargs):
+    tip_index.invalidate()
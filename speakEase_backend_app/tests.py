@@ -1,3 +1,1111 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import json
+import os
+import socket
+import stat
+import sys
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import timedelta
+from unittest import mock
+import numpy as np
+import pronouncing
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .ai_modules import AudioBuffer, registry
+from .ai_modules.batching import BatchScheduler
+from .ai_modules.decoding import AudioDecodeError, decode_upload
+from .ai_modules.asr_backends import ASRBackend, RemoteBackend, StubBackend
+from .ai_modules.audio_analysis import (
+    find_pause_segments, split_into_chunks, timestamp_metrics, detect_mispronunciations, detect_repeated_words, calculate_speech_rate,
+)
+from .ai_modules.inference_server import (
+    InferenceServer, InferenceServerError, parse_address, recv_message, request, send_message, transcribe_remote,
+)
+from .ai_modules.lexicon import Lexicon, build_lexicon
+from .ai_modules.pronunciation import score_pronunciation, word_phonemes
+from .ai_modules.streaming import StreamingAnalyzer
+from .ai_modules.text_metrics import TokenStream
+from .ai_modules.resources import ResourceRegistry
+from .content_index import RandomIdIndex, tip_index
+from .analysis_cache import DiskAnalysisCache, NoAnalysisCache, analysis_key, transcript_key
+from .instrumentation import stage
+from .jobs import process_job, requeue_stale_jobs
+from .middleware import ServerTimingMiddleware
+from .models import AnalysisJob, TrainingSession, ProgressAnalytics, DailyProgress, UserProfile, Tip, VocabularyWord
+from .services import target_word_pronunciation
+from .progress import rebuild_progress, rebuild_daily_progress, record_session_progress
 
-# Create your tests here.
+User = get_user_model()
+
+
+# the 0011 data migration fills score_total and total_sessions from the sessions
+class ScoreTotalMigrationTest(TransactionTestCase):
+    app = 'speakEase_backend_app'
+    migrate_from = [(app, '0010_analysiscacheentry')]
+    migrate_to = [(app, '0011_progressanalytics_score_total')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.latest = executor.loader.graph.leaf_nodes()
+        executor.migrate(self.migrate_from)
+        apps = executor.loader.project_state(self.migrate_from).apps
+        User = apps.get_model('auth', 'User')
+        ProgressAnalytics = apps.get_model(self.app, 'ProgressAnalytics')
+        TrainingSession = apps.get_model(self.app, 'TrainingSession')
+
+        active = User.objects.create(username='active')
+        new = User.objects.create(username='new')
+        ProgressAnalytics.objects.create(user=active)
+        # a user that signed up and never trained
+        ProgressAnalytics.objects.create(user=new)
+        for score in (60.0, 80.0):
+            TrainingSession.objects.create(user=active, training_type='voice', duration=10, score=score)
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.latest)
+
+    def test_backfill_with_and_without_sessions(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        apps = executor.loader.project_state(self.migrate_to).apps
+        ProgressAnalytics = apps.get_model(self.app, 'ProgressAnalytics')
+
+        active = ProgressAnalytics.objects.get(user__username='active')
+        self.assertEqual(active.score_total, 140.0)
+        self.assertEqual(active.total_sessions, 2)
+        new = ProgressAnalytics.objects.get(user__username='new')
+        self.assertEqual(new.score_total, 0.0)
+        self.assertEqual(new.total_sessions, 0)
+
+
+def create_session(user, score=50.0, duration=10, **fields):
+    return TrainingSession.objects.create(user=user, training_type='voice', duration=duration, score=score, **fields)
+
+
+# keeps the uploads of a test in a temporary MEDIA_ROOT
+class MediaRootMixin:
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        media = self.settings(MEDIA_ROOT=directory.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+
+class AnalysisJobTest(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('jobs')
+        audio = AudioBuffer(np.zeros(16000, dtype=np.float32), 16000)
+        analysis = {'score': 70.0, 'wpm': 120.0, 'feedback': 'good'}
+        for patcher in (
+            mock.patch('speakEase_backend_app.jobs.decode_audio_file', return_value=audio),
+            mock.patch('speakEase_backend_app.services.analysis_cache', NoAnalysisCache(0)),
+            mock.patch('speakEase_backend_app.services.audio_analyzer.transcribe_audio', return_value={'text': 'hello there'}),
+            mock.patch('speakEase_backend_app.services.audio_analyzer.calculate_overall_score', return_value=analysis),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def create_job(self, **fields):
+        job = AnalysisJob(user=self.user, duration=1, **fields)
+        job.audio_file.save('upload.wav', ContentFile(b'RIFF'), save=False)
+        job.save()
+        return job
+
+    def test_done_job_links_its_session(self):
+        job = process_job(self.create_job(status='running'))
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.training_session, TrainingSession.objects.get(user=self.user))
+        self.assertEqual(job.result['id'], job.training_session_id)
+        self.assertFalse(job.audio_file)
+
+    def test_crash_before_the_commit_saves_no_session(self):
+        with mock.patch('speakEase_backend_app.services.record_session_progress', side_effect=RuntimeError('boom')):
+            job = process_job(self.create_job(status='running'))
+
+        self.assertEqual(job.status, 'failed')
+        self.assertFalse(TrainingSession.objects.exists())
+        self.assertIsNone(AnalysisJob.objects.get(id=job.id).training_session)
+
+    def test_requeue_and_fail_stale_jobs(self):
+        started_at = timezone.now() - timedelta(hours=1)
+        retry = self.create_job(status='running', started_at=started_at, attempts=1)
+        dead = self.create_job(status='running', started_at=started_at, attempts=3)
+        fresh = self.create_job(status='running', started_at=timezone.now(), attempts=1)
+        path = dead.audio_file.path
+
+        self.assertEqual(requeue_stale_jobs(600), (1, 1))
+        self.assertEqual(AnalysisJob.objects.get(id=retry.id).status, 'pending')
+        self.assertEqual(AnalysisJob.objects.get(id=fresh.id).status, 'running')
+        dead.refresh_from_db()
+        self.assertEqual(dead.status, 'failed')
+        self.assertFalse(dead.audio_file)
+        self.assertFalse(os.path.exists(path))
+
+
+class BatchSchedulerTest(SimpleTestCase):
+    def test_concurrent_items_share_a_batch(self):
+        batches = []
+
+        def run_batch(items):
+            batches.append(items)
+            return [item * 2 for item in items]
+
+        scheduler = BatchScheduler(run_batch, max_batch_size=2, max_wait_ms=200)
+        futures = [scheduler.submit(item) for item in range(5)]
+
+        self.assertEqual(scheduler.results(futures, 5), [0, 2, 4, 6, 8])
+        self.assertEqual(batches, [[0, 1], [2, 3], [4]])
+        self.assertEqual((scheduler.stats()['batches'], scheduler.stats()['items']), (3, 5))
+
+    def test_batch_error_reaches_every_caller(self):
+        def run_batch(items):
+            raise RuntimeError('model failed')
+
+        scheduler = BatchScheduler(run_batch, max_wait_ms=50)
+        futures = [scheduler.submit(item) for item in range(2)]
+        for future in futures:
+            with self.assertRaisesRegex(RuntimeError, 'model failed'):
+                future.result(5)
+
+    def test_timeout_cancels_the_queued_items(self):
+        release = threading.Event()
+        seen = []
+
+        def run_batch(items):
+            seen.extend(items)
+            release.wait(5)
+            return items
+
+        scheduler = BatchScheduler(run_batch, max_batch_size=1, max_wait_ms=0)
+        running = scheduler.submit('running')
+        # wait until the first batch holds the model
+        while scheduler.busy_seconds() == 0:
+            release.wait(0.01)
+        queued = scheduler.submit('queued')
+
+        with self.assertRaises(FutureTimeoutError):
+            scheduler.results([queued], 0.05)
+        self.assertTrue(queued.cancelled())
+        self.assertEqual(scheduler.stats()['timeouts'], 1)
+        self.assertTrue(scheduler.stalled(0.01))
+
+        release.set()
+        self.assertEqual(running.result(5), 'running')
+        self.assertEqual(scheduler.run('next', 5), 'next')
+        # the cancelled item never reached the model
+        self.assertEqual(seen, ['running', 'next'])
+        self.assertFalse(scheduler.stalled(0.01))
+
+
+class LazyResourceTest(SimpleTestCase):
+    def test_loaded_once_on_first_use(self):
+        loads = []
+        resources = ResourceRegistry()
+        resources.register('model', lambda: loads.append(1) or 'weights')
+
+        self.assertEqual(loads, [])
+        self.assertFalse(resources.is_ready())
+        self.assertEqual(resources.get('model'), 'weights')
+        self.assertEqual(resources.get('model'), 'weights')
+        self.assertEqual(loads, [1])
+        self.assertTrue(resources.is_ready(['model']))
+
+    def test_failed_load_is_reported_and_retried(self):
+        attempts = []
+
+        def loader():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise OSError('no weights')
+            return 'weights'
+
+        resources = ResourceRegistry()
+        resources.register('model', loader)
+        status = resources.warm_up()
+        self.assertEqual(status['model']['error'], 'no weights')
+        self.assertFalse(status['model']['loaded'])
+        self.assertTrue(resources.warm_up()['model']['loaded'])
+
+    def test_importing_the_app_loads_no_model(self):
+        self.assertFalse(registry.status()['whisper']['loaded'])
+
+
+class ReadinessViewTest(SimpleTestCase):
+    def setUp(self):
+        self.resource = registry.register('test_model', lambda: 'weights')
+        self.addCleanup(registry._resources.pop, 'test_model')
+
+    def test_503_until_the_required_resources_are_loaded(self):
+        with self.settings(READINESS_RESOURCES=['test_model']):
+            response = self.client.get('/api/health/ready/')
+            self.assertEqual(response.status_code, 503)
+            self.assertFalse(response.json()['ready'])
+
+            self.resource.get()
+            response = self.client.get('/api/health/ready/')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.json()['ready'])
+
+
+class LexiconTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'test.lex')
+
+    def test_round_trip(self):
+        count = build_lexicon([
+            ('Hello', ['HH', 'AH0', 'L', 'OW1']),
+            ('hello', ['HH', 'EH0', 'L', 'OW1']),
+            ('hello', ('HH', 'AH0', 'L', 'OW1')),
+            ('world', ['W', 'ER1', 'L', 'D']),
+        ], self.path)
+        lexicon = Lexicon(self.path)
+
+        self.assertEqual(count, 2)
+        self.assertEqual(len(lexicon), 2)
+        # lowercased, duplicates dropped, the order of the pronunciations kept
+        self.assertEqual(lexicon['HELLO'], [['HH', 'AH0', 'L', 'OW1'], ['HH', 'EH0', 'L', 'OW1']])
+        self.assertEqual(lexicon.phones_for_word('world'), ['W ER1 L D'])
+        self.assertIn('world', lexicon)
+
+    def test_unknown_words(self):
+        build_lexicon([('cat', ['K', 'AE1', 'T'])], self.path)
+        lexicon = Lexicon(self.path)
+
+        self.assertNotIn('dog', lexicon)
+        self.assertNotIn('', lexicon)
+        # longer than every word in the file
+        self.assertNotIn('category', lexicon)
+        self.assertEqual(lexicon.get('dog', []), [])
+        with self.assertRaises(KeyError):
+            lexicon['dog']
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a lexicon')
+        with self.assertRaises(ValueError):
+            Lexicon(self.path)
+
+
+# noise for speech and zeros for the pauses, 16kHz
+def speech_and_pauses(*parts, sample_rate=16000):
+    rng = np.random.default_rng(0)
+    samples = [
+        rng.uniform(-0.5, 0.5, int(seconds * sample_rate)) if speech else np.zeros(int(seconds * sample_rate))
+        for speech, seconds in parts
+    ]
+    return AudioBuffer(np.concatenate(samples).astype(np.float32), sample_rate)
+
+
+class SplitIntoChunksTest(SimpleTestCase):
+    def test_short_audio_is_one_chunk(self):
+        audio = speech_and_pauses((True, 1.5))
+        self.assertEqual(split_into_chunks(audio, max_seconds=2), [audio])
+
+    def test_cut_at_the_pauses(self):
+        audio = speech_and_pauses((True, 1.5), (False, 0.5), (True, 1.5), (False, 0.5), (True, 1.0))
+        chunks = split_into_chunks(audio, max_seconds=2)
+
+        self.assertEqual(len(chunks), 3)
+        for chunk, (start, length) in zip(chunks, [(0.0, 1.5), (2.0, 1.5), (4.0, 1.0)]):
+            self.assertLessEqual(chunk.duration, 2)
+            # the cuts fall within a few rms frames of the pauses
+            self.assertAlmostEqual(chunk.offset, start, delta=0.15)
+            self.assertAlmostEqual(chunk.duration, length, delta=0.3)
+
+    def test_speech_without_pauses_is_cut_hard(self):
+        audio = speech_and_pauses((True, 5.0))
+        chunks = split_into_chunks(audio, max_seconds=2)
+
+        self.assertEqual([chunk.duration for chunk in chunks], [2.0, 2.0, 1.0])
+        self.assertEqual([chunk.offset for chunk in chunks], [0.0, 2.0, 4.0])
+        np.testing.assert_array_equal(np.concatenate([chunk.samples for chunk in chunks]), audio.samples)
+
+
+class ASRBackendTest(SimpleTestCase):
+    def test_every_backend_records_its_clips(self):
+        class EchoBackend(ASRBackend):
+            name = 'echo'
+
+            def _load(self):
+                pass
+
+            def _transcribe_batch(self, audios, timestamps):
+                return ['hello'] * len(audios)
+
+        backend = EchoBackend('echo-model').load()
+        audio = speech_and_pauses((True, 1.0))
+        self.assertEqual(backend.transcribe_batch([audio, audio]), ['hello', 'hello'])
+        backend.transcribe_batch([audio])
+
+        stats = backend.stats()
+        self.assertEqual((stats['backend'], stats['clips']), ('echo', 3))
+        self.assertIsNotNone(stats['average_clip_seconds'])
+        self.assertIsNotNone(stats['last_clip_seconds'])
+
+    def test_stub_is_deterministic(self):
+        backend = StubBackend('stub').load()
+        audio = speech_and_pauses((True, 2.0))
+
+        text = backend.transcribe_batch([audio])[0]
+        self.assertEqual(backend.transcribe_batch([audio])[0], text)
+        self.assertEqual(len(text.split()), round(2.0 * backend.words_per_second))
+        timed = backend.transcribe_batch([audio], timestamps='word')[0]
+        self.assertEqual(timed['text'], text)
+        self.assertEqual(len(timed['words']), len(text.split()))
+        self.assertEqual(backend.stats()['clips'], 3)
+
+
+class AnalysisCacheKeyTest(SimpleTestCase):
+    def setUp(self):
+        self.audio = speech_and_pauses((True, 1.0))
+
+    def test_transcript_key(self):
+        key = transcript_key(self.audio)
+        self.assertEqual(transcript_key(AudioBuffer(self.audio.samples.copy(), 16000)), key)
+        self.assertNotEqual(transcript_key(speech_and_pauses((True, 1.0), (False, 0.1))), key)
+        with self.settings(ANALYSIS_CACHE_VERSION=999):
+            self.assertNotEqual(transcript_key(self.audio), key)
+        with self.settings(ASR_BACKEND='remote', INFERENCE_SERVER_BACKEND='int8'):
+            self.assertNotEqual(transcript_key(self.audio), key)
+
+    def test_analysis_key(self):
+        key = analysis_key(self.audio, 10, 'hello there')
+        self.assertEqual(analysis_key(self.audio, 10, 'hello there', 'rms'), key)
+        for other in (
+            analysis_key(self.audio, 11, 'hello there'),
+            analysis_key(self.audio, 10, 'hello where'),
+            analysis_key(self.audio, 10, 'hello there', 'words'),
+        ):
+            self.assertNotEqual(other, key)
+
+
+class DiskAnalysisCacheTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = DiskAnalysisCache(3, directory.name, 1024 * 1024)
+
+    def fill(self, count):
+        keys = [f"{i:02d}" + 'a' * 62 for i in range(count)]
+        for i, key in enumerate(keys):
+            self.cache.set(key, {'text': key})
+            # the first key is the oldest, a second apart
+            os.utime(self.cache._path(key), (1000 + i, 1000 + i))
+        return keys
+
+    def test_evicts_the_least_recently_used(self):
+        keys = self.fill(5)
+        # reading an entry makes it the most recently used
+        self.assertEqual(self.cache.get(keys[0]), {'text': keys[0]})
+        self.cache.evict()
+
+        self.assertEqual(self.cache.stats()['entries'], 3)
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNone(self.cache.get(keys[2]))
+        self.assertIsNotNone(self.cache.get(keys[0]))
+
+    def test_evicts_by_size(self):
+        keys = self.fill(3)
+        self.cache.max_bytes = 2 * os.path.getsize(self.cache._path(keys[0]))
+        self.cache.evict()
+        self.assertEqual(self.cache.stats()['entries'], 2)
+
+    def test_eviction_runs_outside_the_writing_request(self):
+        with mock.patch('speakEase_backend_app.analysis_cache.EVICT_EVERY', 5), \
+                mock.patch.object(self.cache, 'evict') as evict:
+            self.fill(5)
+            self.cache._evict_thread.join(5)
+        self.assertNotEqual(self.cache._evict_thread, threading.current_thread())
+        evict.assert_called_once_with()
+
+
+class PauseSegmentsTest(SimpleTestCase):
+    def test_find_pause_segments(self):
+        silent = np.array([0, 0, 1, 1, 1, 1, 1, 0, 1, 0], dtype=bool)
+        # the first 0.1s after speech is the hangover, the last silence is too short
+        self.assertEqual(find_pause_segments(silent, 0.1), [{'start': 0.3, 'end': 0.7, 'length': 0.4}])
+
+    def test_find_pause_segments_leading_silence(self):
+        silent = np.array([1, 1, 1, 1, 0, 0], dtype=bool)
+        self.assertEqual(find_pause_segments(silent, 0.1), [{'start': 0.0, 'end': 0.4, 'length': 0.4}])
+
+
+class ProgressAnalyticsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('progress')
+
+    def test_rebuild_progress(self):
+        progress = ProgressAnalytics.objects.create(user=self.user, total_sessions=7, score_total=1.0)
+        UserProfile.objects.create(user=self.user, age=30)
+        for score, duration in ((50.0, 10), (90.0, 20)):
+            create_session(self.user, score=score, duration=duration)
+        before = progress.last_updated
+
+        self.assertEqual(rebuild_progress([self.user.id]), 1)
+        progress.refresh_from_db()
+        self.assertEqual(progress.total_sessions, 2)
+        self.assertEqual(progress.score_total, 140.0)
+        self.assertEqual(progress.average_score, 70.0)
+        self.assertEqual((progress.best_score, progress.worst_score), (90.0, 50.0))
+        self.assertEqual(progress.total_training_time, 30)
+        self.assertGreater(progress.last_updated, before)
+        self.assertEqual(UserProfile.objects.get(user=self.user).total_training_time, 30)
+
+    def test_record_session_progress(self):
+        ProgressAnalytics.objects.create(user=self.user)
+        UserProfile.objects.create(user=self.user, age=30)
+        for score in (60.0, 20.0):
+            record_session_progress(self.user, score, 15)
+
+        progress = ProgressAnalytics.objects.get(user=self.user)
+        self.assertEqual(progress.total_sessions, 2)
+        self.assertEqual(progress.average_score, 40.0)
+        self.assertEqual((progress.best_score, progress.worst_score), (60.0, 20.0))
+        self.assertEqual(progress.total_training_time, 30)
+
+    def test_deleting_a_user_deletes_the_sessions(self):
+        ProgressAnalytics.objects.create(user=self.user)
+        for score in (60.0, 20.0):
+            create_session(self.user, score=score)
+
+        self.user.delete()
+        self.assertFalse(TrainingSession.objects.exists())
+        self.assertFalse(ProgressAnalytics.objects.exists())
+
+
+class ProgressRollupTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('rollup')
+
+    def test_sessions_are_added_and_removed(self):
+        low = create_session(self.user, score=40.0, duration=10, wpm=100.0)
+        create_session(self.user, score=80.0, duration=20)
+        create_session(self.user, score=60.0, duration=30, wpm=140.0)
+
+        rollup = DailyProgress.objects.get(user=self.user)
+        self.assertEqual(rollup.session_count, 3)
+        self.assertEqual(rollup.score_sum, 180.0)
+        self.assertEqual((rollup.score_min, rollup.score_max), (40.0, 80.0))
+        self.assertEqual(rollup.training_seconds, 60)
+        self.assertEqual((rollup.wpm_sum, rollup.wpm_count), (240.0, 2))
+
+        low.delete()
+        rollup.refresh_from_db()
+        self.assertEqual(rollup.session_count, 2)
+        self.assertEqual(rollup.score_sum, 140.0)
+        # the new minimum comes from the remaining sessions of the day
+        self.assertEqual((rollup.score_min, rollup.score_max), (60.0, 80.0))
+        self.assertEqual((rollup.wpm_sum, rollup.wpm_count), (140.0, 1))
+
+    def test_last_session_of_the_day_removes_the_row(self):
+        create_session(self.user).delete()
+        self.assertFalse(DailyProgress.objects.filter(user=self.user).exists())
+
+    def test_rebuild_daily_progress(self):
+        for score in (30.0, 70.0):
+            create_session(self.user, score=score)
+        DailyProgress.objects.filter(user=self.user).update(session_count=9, score_sum=1.0)
+
+        self.assertEqual(rebuild_daily_progress([self.user.id]), 1)
+        rollup = DailyProgress.objects.get(user=self.user)
+        self.assertEqual((rollup.session_count, rollup.score_sum), (2, 100.0))
+
+
+class ProgressSeriesViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('series')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_daily_series(self):
+        for score in (40.0, 80.0):
+            create_session(self.user, score=score, duration=30)
+        response = self.client.get('/api/progress/series/')
+
+        self.assertEqual(response.status_code, 200)
+        [day] = response.data['series']
+        self.assertEqual(day['period_start'], timezone.localdate())
+        self.assertEqual((day['sessions'], day['average_score'], day['training_time']), (2, 60.0, 60))
+        self.assertEqual((day['best_score'], day['worst_score']), (80.0, 40.0))
+
+    def test_bad_ranges(self):
+        for params in (
+            {'period': 'year'},
+            {'start': 'yesterday'},
+            {'end': '2026-02-30'},
+            {'start': '2026-05-02', 'end': '2026-05-01'},
+            {'start': '2000-01-01', 'end': '2026-01-01'},
+        ):
+            self.assertEqual(self.client.get('/api/progress/series/', params).status_code, 400, params)
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('pager')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        sessions = [create_session(self.user, score=i) for i in range(5)]
+        # two sessions at the same time, the id breaks the tie
+        same_time = timezone.now() - timedelta(days=1)
+        TrainingSession.objects.filter(pk__in=[sessions[1].pk, sessions[2].pk]).update(created_at=same_time)
+        create_session(User.objects.create_user('other'))
+        self.expected = list(
+            TrainingSession.objects.filter(user=self.user).order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def test_pages_cover_every_session_once(self):
+        ids = []
+        response = self.client.get('/api/training-sessions/', {'page_size': 2})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.data['results'])
+            if not response.data['next_cursor']:
+                break
+            response = self.client.get('/api/training-sessions/', {'page_size': 2, 'cursor': response.data['next_cursor']})
+        self.assertEqual(ids, self.expected)
+
+    def test_plain_list_without_paging(self):
+        response = self.client.get('/api/training-sessions/')
+        self.assertEqual(len(response.data), 5)
+
+    def test_bad_cursor(self):
+        for cursor in ('not-base64!', base64.urlsafe_b64encode(b'[1, 2]').decode(),
+                       base64.urlsafe_b64encode(b'["yesterday", 1]').decode()):
+            response = self.client.get('/api/training-sessions/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+
+    def test_sparse_fields(self):
+        response = self.client.get('/api/training-sessions/', {'page_size': 2, 'fields': 'id,score'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'score'})
+
+    def test_bad_page_size(self):
+        response = self.client.get('/api/training-sessions/', {'page_size': 'many'})
+        self.assertEqual(response.status_code, 400)
+
+
+class AdminUsersTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin', is_staff=True)
+        for i in range(4):
+            user = User.objects.create_user(f"user{i}", email=f"user{i}@example.com")
+            UserProfile.objects.create(user=user, age=20 + i, full_name=f"User {i}")
+            ProgressAnalytics.objects.create(user=user, total_sessions=i)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_paged_by_default(self):
+        # the count and one joined query for the page, whatever the page size
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/users/')
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(len(response.data['results']), 5)
+
+        response = self.client.get('/api/users/', {'page': 2, 'page_size': 2})
+        self.assertEqual([row['username'] for row in response.data['results']], ['user1', 'user2'])
+        self.assertEqual(response.data['results'][0]['age'], 21)
+
+    def test_admin_only(self):
+        self.client.force_authenticate(User.objects.get(username='user0'))
+        self.assertEqual(self.client.get('/api/users/').status_code, 403)
+        self.assertEqual(self.client.get('/api/users/export/').status_code, 403)
+
+    def test_export_csv(self):
+        response = self.client.get('/api/users/export/', {'output': 'csv'})
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(len(rows), 5)
+        self.assertEqual((rows[1]['username'], rows[1]['age'], rows[1]['total_sessions']), ('user0', '20', '0'))
+
+    def test_export_ndjson(self):
+        response = self.client.get('/api/users/export/')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['username'], 'admin')
+        self.assertIsNone(rows[0]['age'])
+        self.assertEqual(rows[4]['full_name'], 'User 3')
+        self.assertEqual(self.client.get('/api/users/export/', {'output': 'xml'}).status_code, 400)
+
+
+class RandomIdIndexTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        tip_index.invalidate()
+        self.addCleanup(tip_index.invalidate)
+        self.tips = [Tip.objects.create(title=f"tip {i}", content='...', category='voice') for i in range(6)]
+        Tip.objects.create(title='other', content='...', category='general')
+        self.user = User.objects.create_user('reader')
+
+    def test_no_repeat_of_the_recent_tips(self):
+        with self.settings(CONTENT_NO_REPEAT=5):
+            seen = [tip_index.get_random('voice', self.user).id for _ in range(6)]
+        # the last five are excluded, so six picks cover all the tips of the group
+        self.assertEqual(sorted(seen), [tip.id for tip in self.tips])
+
+    def test_group_and_invalidate(self):
+        self.assertEqual(len(tip_index.ids()), 7)
+        self.assertEqual(tip_index.get_random('general').title, 'other')
+
+        # the signal drops the index of this process
+        Tip.objects.filter(category='voice').exclude(id=self.tips[0].id).delete()
+        Tip.objects.get(title='other').delete()
+        self.assertEqual(tip_index.ids(), [self.tips[0].id])
+        self.assertIsNone(tip_index.get_random('general'))
+
+    def test_stale_ids_are_skipped(self):
+        tip_index.ids()
+        # removed behind the index's back, e.g. by another worker
+        Tip.objects.filter(id__in=[tip.id for tip in self.tips[1:]])._raw_delete(Tip.objects.db)
+        self.assertEqual(tip_index.get_random('voice').id, self.tips[0].id)
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('etag')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_training_session_304_until_changed(self):
+        session = create_session(self.user)
+        url = f'/api/training-sessions/{session.id}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        session.feedback_text = 'changed'
+        session.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_progress_304_until_rebuilt(self):
+        ProgressAnalytics.objects.create(user=self.user)
+        etag = self.client.get('/api/progress/')['ETag']
+        self.assertEqual(self.client.get('/api/progress/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        create_session(self.user, score=75.0)
+        rebuild_progress([self.user.id])
+        response = self.client.get('/api/progress/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_sessions'], 1)
+
+    def test_per_user_cache_headers(self):
+        ProgressAnalytics.objects.create(user=self.user)
+        response = self.client.get('/api/progress/')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('Authorization', response['Vary'])
+        self.assertIn('Last-Modified', response)
+
+    def test_other_users_session_is_not_found(self):
+        session = create_session(User.objects.create_user('stranger'))
+        self.assertEqual(self.client.get(f'/api/training-sessions/{session.id}/').status_code, 404)
+
+
+class ImportContentTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def import_csv(self, name, rows):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['word', 'definition', 'difficulty_level'])
+            writer.writeheader()
+            writer.writerows(rows)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('import_content', path, model='vocabulary', skip_g2p=True, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_insert_then_upsert(self):
+        VocabularyWord.objects.bulk_create([VocabularyWord(word='eloquent', definition='old')])
+        output, errors = self.import_csv('words.csv', [
+            {'word': 'eloquent', 'definition': 'fluent and persuasive', 'difficulty_level': 'advanced'},
+            {'word': 'brief', 'definition': 'first', 'difficulty_level': 'beginner'},
+            # the last row of a duplicated word wins
+            {'word': 'brief', 'definition': 'short', 'difficulty_level': 'beginner'},
+            {'word': '', 'definition': 'missing word', 'difficulty_level': 'beginner'},
+            {'word': 'odd', 'definition': 'strange', 'difficulty_level': 'expert'},
+        ])
+
+        self.assertIn('(2 invalid)', output)
+        self.assertIn('line 5: word is required', errors)
+        self.assertIn("line 6: unknown difficulty_level 'expert'", errors)
+        self.assertEqual(VocabularyWord.objects.count(), 2)
+        eloquent = VocabularyWord.objects.get(word='eloquent')
+        self.assertEqual((eloquent.definition, eloquent.difficulty_level), ('fluent and persuasive', 'advanced'))
+        self.assertEqual(VocabularyWord.objects.get(word='brief').definition, 'short')
+
+        self.import_csv('again.csv', [{'word': 'brief', 'definition': 'concise', 'difficulty_level': 'intermediate'}])
+        self.assertEqual(VocabularyWord.objects.count(), 2)
+        self.assertEqual(VocabularyWord.objects.get(word='brief').definition, 'concise')
+
+    def test_skip_g2p_keeps_the_computed_phonemes(self):
+        VocabularyWord.objects.bulk_create([VocabularyWord(word='blorptastic', definition='old', phonemes='Z IH1 Z IH0 V AH0')])
+        self.import_csv('words.csv', [{'word': 'blorptastic', 'definition': 'made up', 'difficulty_level': 'advanced'}])
+
+        word = VocabularyWord.objects.get(word='blorptastic')
+        self.assertEqual((word.definition, word.phonemes), ('made up', 'Z IH1 Z IH0 V AH0'))
+
+    def test_other_workers_see_the_import(self):
+        cache.clear()
+        # the index of another process sharing the cache
+        worker_index = RandomIdIndex('vocabulary', VocabularyWord, 'difficulty_level')
+        self.assertEqual(worker_index.ids(), [])
+
+        self.import_csv('words.csv', [{'word': 'brief', 'definition': 'short', 'difficulty_level': 'beginner'}])
+        self.assertEqual(worker_index.ids(), [VocabularyWord.objects.get(word='brief').id])
+
+    def test_dry_run_writes_nothing(self):
+        path = os.path.join(self.directory, 'words.jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"word": "calm", "definition": "quiet"}\n\nnot json\n')
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('import_content', path, model='vocabulary', dry_run=True, skip_g2p=True, stdout=stdout, stderr=stderr)
+
+        self.assertIn('Validated 1 rows (1 invalid)', stdout.getvalue())
+        self.assertIn('line 3: invalid json', stderr.getvalue())
+        self.assertFalse(VocabularyWord.objects.exists())
+
+
+# stands in for ffmpeg: passes the input bytes through as float32 samples, fails on
+# inputs starting with BAD and hangs on the ones starting with SLOW
+FAKE_FFMPEG = f"""#!{sys.executable}
+import sys, time
+import numpy as np
+source = sys.argv[sys.argv.index('-i') + 1]
+data = sys.stdin.buffer.read() if source == 'pipe:0' else open(source, 'rb').read()
+if data.startswith(b'BAD'):
+    sys.stderr.write('Invalid data found when processing input\\n')
+    sys.exit(1)
+if data.startswith(b'SLOW'):
+    time.sleep(10)
+sys.stdout.buffer.write(data)
+"""
+
+
+class DecodeUploadTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        binary = os.path.join(directory.name, 'ffmpeg')
+        with open(binary, 'w') as f:
+            f.write(FAKE_FFMPEG)
+        os.chmod(binary, os.stat(binary).st_mode | stat.S_IEXEC)
+        ffmpeg = self.settings(FFMPEG_BINARY=binary)
+        ffmpeg.enable()
+        self.addCleanup(ffmpeg.disable)
+
+    def test_piped_through_ffmpeg(self):
+        samples = np.array([0.5, -0.25, 1.0], dtype='<f4')
+        # a cut last sample is dropped
+        upload = SimpleUploadedFile('clip.webm', samples.tobytes() + b'\x00\x01')
+        np.testing.assert_array_equal(decode_upload(upload), samples)
+
+    def test_seekable_formats_go_through_a_file(self):
+        samples = np.array([0.125], dtype='<f4')
+        np.testing.assert_array_equal(decode_upload(SimpleUploadedFile('clip.m4a', samples.tobytes())), samples)
+
+    def test_ffmpeg_error(self):
+        with self.assertRaisesRegex(AudioDecodeError, 'Invalid data found'):
+            decode_upload(SimpleUploadedFile('clip.webm', b'BAD audio'))
+
+    def test_timeout(self):
+        with self.assertRaisesRegex(AudioDecodeError, 'timed out'):
+            decode_upload(SimpleUploadedFile('clip.webm', b'SLOW audio'), timeout=0.5)
+
+    def test_missing_ffmpeg(self):
+        with self.settings(FFMPEG_BINARY='/nonexistent/ffmpeg'):
+            with self.assertRaisesRegex(AudioDecodeError, 'not available'):
+                decode_upload(SimpleUploadedFile('clip.webm', b'audio'))
+
+
+class StreamingAnalyzerTest(SimpleTestCase):
+    def setUp(self):
+        scheduler = mock.patch('speakEase_backend_app.ai_modules.streaming.whisper_scheduler')
+        self.submitted = scheduler.start().submit
+        self.submitted.side_effect = lambda clip: Future()
+        self.addCleanup(scheduler.stop)
+
+    def feed(self, analyzer, audio, chunk=1600):
+        jobs = []
+        for start in range(0, len(audio.samples), chunk):
+            jobs.extend(analyzer.feed(audio.samples[start:start + chunk]))
+        return jobs
+
+    def test_segments_closed_by_the_pauses(self):
+        analyzer = StreamingAnalyzer(partial_seconds=0)
+        jobs = self.feed(analyzer, speech_and_pauses((True, 1.0), (False, 0.6), (True, 1.0)))
+
+        # the first segment goes to whisper during the pause, before the stream ends
+        self.assertEqual([job['kind'] for job in jobs], ['segment'])
+        self.assertAlmostEqual(jobs[0]['end'], 1.0, delta=0.15)
+        jobs = analyzer.finish()
+        self.assertEqual([job['index'] for job in jobs], [1])
+        self.assertAlmostEqual(jobs[0]['end'], 2.6, delta=0.01)
+
+        [pause] = analyzer.pauses
+        # the 0.1s hangover after the speech is not part of the pause
+        self.assertAlmostEqual(pause['length'], 0.5, delta=0.15)
+        self.assertEqual(self.submitted.call_count, 2)
+
+    def test_partial_texts_while_speaking(self):
+        analyzer = StreamingAnalyzer(partial_seconds=1.0)
+        jobs = self.feed(analyzer, speech_and_pauses((True, 2.5)))
+        self.assertEqual([job['kind'] for job in jobs], ['partial', 'partial'])
+
+    def test_running_metrics(self):
+        analyzer = StreamingAnalyzer(partial_seconds=0)
+        self.feed(analyzer, speech_and_pauses((True, 1.0), (False, 0.6), (True, 1.0)))
+        jobs = analyzer.segments + analyzer.finish()
+        analyzer.add_text(jobs[0], ' practice makes ')
+        analyzer.add_text(jobs[1], 'practice perfect')
+
+        # the metrics use the running counts, the transcript is not tokenized again
+        with mock.patch('speakEase_backend_app.ai_modules.audio_analysis.as_token_stream', side_effect=AssertionError):
+            metrics = analyzer.metrics()
+        self.assertEqual(analyzer.text, 'practice makes practice perfect')
+        self.assertEqual(metrics['word_count'], 4)
+        self.assertAlmostEqual(metrics['wpm'], 4 / (jobs[1]['end'] / 60), delta=0.01)
+        self.assertEqual(metrics['repeated_words'], {'practice': 2})
+        self.assertEqual(metrics['pause_count'], 1)
+
+
+class ServerTimingTest(SimpleTestCase):
+    def test_stages_of_the_request_in_the_header(self):
+        def view(request):
+            # a stage run once per chunk is summed
+            for _ in range(2):
+                with stage('decode'):
+                    pass
+            with stage('score'):
+                pass
+            return HttpResponse('ok')
+
+        response = ServerTimingMiddleware(view)(RequestFactory().get('/'))
+        names = [part.split(';')[0] for part in response['Server-Timing'].split(', ')]
+        self.assertEqual(names, ['decode', 'score', 'total'])
+
+    def test_turned_off(self):
+        with self.settings(SERVER_TIMING=False):
+            response = ServerTimingMiddleware(lambda request: HttpResponse('ok'))(RequestFactory().get('/'))
+        self.assertNotIn('Server-Timing', response)
+
+
+class MetricsViewTest(TestCase):
+    def test_closed_without_a_token(self):
+        with self.settings(METRICS_TOKEN=''):
+            self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    def test_token_required(self):
+        with self.settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+
+            self.client.get('/api/health/ready/')
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        body = response.content.decode()
+        self.assertEqual(response.status_code, 200)
+        # every series says which worker process it comes from
+        self.assertIn(f'view="readiness",le="+Inf",pid="{os.getpid()}"', body)
+        self.assertIn(f'speakease_analysis_jobs_pending{{pid="{os.getpid()}"}} 0', body)
+
+
+class TokenStreamTest(SimpleTestCase):
+    TEXTS = [
+        '',
+        'Hello, hello world!',
+        'The quick brown fox... the QUICK fox; jumps over it. ... Zorbleflax zorbleflax?',
+        'I think I think that, um, practice makes practice perfect',
+    ]
+
+    # the word lists of the metric functions before the token stream
+    def old_metrics(self, text):
+        words = [word.strip('.,!?;:') for word in text.lower().split()]
+        stop_words = {'the', 'a', 'an', 'and', 'or', 'is', 'are', 'was', 'were',
+                      'be', 'been', 'of', 'in', 'to', 'for', 'i', 'you', 'he', 'she', 'it'}
+        return {
+            'mispronounced': [word for word in words if not pronouncing.phones_for_word(word)],
+            'valid': [word for word in words if pronouncing.phones_for_word(word)],
+            'counts': Counter(word for word in words if word and word not in stop_words),
+            'word_count': len(words),
+        }
+
+    def test_same_results_as_the_old_functions(self):
+        for text in self.TEXTS:
+            old = self.old_metrics(text)
+            tokens = TokenStream(text)
+            mispronunciations = detect_mispronunciations(tokens)
+            repeated = detect_repeated_words(tokens)
+
+            self.assertEqual(mispronunciations['mispronounced_words'], old['mispronounced'], text)
+            self.assertEqual(mispronunciations['valid_words'], old['valid'], text)
+            self.assertEqual(mispronunciations['total_words'], old['word_count'], text)
+            self.assertEqual(repeated['all_word_counts'], old['counts'], text)
+            self.assertEqual(repeated['repeated_words'], {w: c for w, c in old['counts'].items() if c > 1}, text)
+            self.assertEqual(calculate_speech_rate(tokens, 30)['word_count'], old['word_count'], text)
+
+    def test_text_or_stream(self):
+        text = self.TEXTS[2]
+        self.assertEqual(detect_repeated_words(text), detect_repeated_words(TokenStream(text)))
+        self.assertEqual(calculate_speech_rate(text, 6), calculate_speech_rate(TokenStream(text), 6))
+
+
+class PronunciationTest(TestCase):
+    def test_exact_word_scores_one(self):
+        result = score_pronunciation('practice', word_phonemes('practice', use_g2p=False), 'I practice every day')
+        self.assertEqual((result['best_match'], result['similarity']), ('practice', 1.0))
+        self.assertEqual(result['words'][1]['method'], 'phonemes')
+        self.assertLess(result['words'][0]['similarity'], 1.0)
+
+    def test_close_word_beats_the_others(self):
+        result = score_pronunciation('practice', word_phonemes('practice', use_g2p=False), 'the practise was fun')
+        self.assertEqual(result['best_match'], 'practise')
+        self.assertGreater(result['similarity'], 0.7)
+
+    def test_phrase_and_unknown_words(self):
+        phrase = score_pronunciation('good morning', word_phonemes('good morning', use_g2p=False), 'well good morning')
+        self.assertEqual((phrase['best_match'], phrase['similarity']), ('good morning', 1.0))
+
+        unknown = score_pronunciation('zorbleflax', '', 'zorbleflax')
+        self.assertEqual(unknown['words'][0]['method'], 'spelling')
+        self.assertEqual(unknown['similarity'], 1.0)
+        self.assertIsNone(score_pronunciation('word', '', '')['best_match'])
+
+    def test_stored_phonemes_of_the_vocabulary_word(self):
+        # bulk_create skips the signal, the phonemes stay the given ones
+        VocabularyWord.objects.bulk_create([VocabularyWord(word='Zorbleflax', definition='-', phonemes='Z AO1 R B AH0 L')])
+        with self.assertNumQueries(1):
+            result = target_word_pronunciation(' zorbleflax ', 'zorble')
+        self.assertEqual(result['expected_phonemes'], 'Z AO1 R B AH0 L')
+
+
+class TimestampMetricsTest(SimpleTestCase):
+    def test_timestamp_metrics_from_words(self):
+        words = [
+            {'word': 'one', 'start': 0.0, 'end': 0.5},
+            {'word': 'two', 'start': 1.0, 'end': 1.5},
+            {'word': 'three', 'start': 1.6, 'end': 2.0},
+        ]
+        segments = [{'text': 'one two three', 'start': 0.0, 'end': 2.0}]
+        timing = timestamp_metrics(words, segments, 3.0)
+
+        self.assertEqual(timing['source'], 'words')
+        self.assertEqual(timing['pause_segments'], [{'start': 0.5, 'end': 1.0, 'length': 0.5}])
+        self.assertEqual(timing['speech_time'], 1.5)
+        self.assertEqual(timing['wpm'], 60.0)
+        self.assertEqual(timing['articulation_rate'], 120.0)
+        self.assertEqual(timing['pauses_percentage'], 50.0)
+        self.assertEqual(timing['segments'][0]['wpm'], 90.0)
+
+    def test_timestamp_metrics_from_segments(self):
+        segments = [
+            {'text': 'one two', 'start': 0.0, 'end': 1.0},
+            {'text': 'three', 'start': 2.0, 'end': 2.5},
+        ]
+        timing = timestamp_metrics(None, segments, 4.0)
+
+        self.assertEqual(timing['source'], 'segments')
+        self.assertEqual(timing['word_count'], 3)
+        self.assertEqual(timing['pause_count'], 1)
+        self.assertEqual(timing['longest_pause'], 1.0)
+
+    def test_timestamp_metrics_without_timestamps(self):
+        self.assertIsNone(timestamp_metrics(None, [], 5.0))
+        self.assertIsNone(timestamp_metrics(None, [{'text': 'a', 'start': 0, 'end': 1}], 0))
+
+
+class InferenceServerTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.address = f"unix:{os.path.join(directory.name, 'inference.sock')}"
+
+    def start_server(self):
+        server = InferenceServer(self.address, StubBackend('stub').load(), max_wait_ms=5, result_timeout=5)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(server.shutdown)
+        path = parse_address(self.address)[1]
+        while not os.path.exists(path):
+            thread.join(0.01)
+        return server
+
+    def test_framing(self):
+        left, right = socket.socketpair()
+        with left, right:
+            send_message(left, {'op': 'stats'})
+            send_message(left, {'op': 'transcribe'}, b'\x01\x02\x03')
+            self.assertEqual(recv_message(right), ({'op': 'stats'}, b''))
+            # the payload size is part of the framing, not of the header
+            self.assertEqual(recv_message(right), ({'op': 'transcribe'}, b'\x01\x02\x03'))
+            left.sendall(b'\xff\xff\xff\xff')
+            with self.assertRaises(ValueError):
+                recv_message(right)
+            left.close()
+            self.assertIsNone(recv_message(right))
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address('unix:/tmp/x.sock'), (socket.AF_UNIX, '/tmp/x.sock'))
+        self.assertEqual(parse_address(':9000'), (socket.AF_INET, ('127.0.0.1', 9000)))
+
+    def test_remote_transcription_matches_the_local_backend(self):
+        self.start_server()
+        clips = [speech_and_pauses((True, 1.0)), speech_and_pauses((True, 2.0))]
+
+        texts, stages = transcribe_remote(self.address, clips, timeout=10)
+        self.assertEqual(texts, StubBackend('stub').transcribe_batch(clips))
+        self.assertIn('whisper_queue', [name for name, _ in stages])
+        timed, _ = transcribe_remote(self.address, clips[:1], timestamps='word', timeout=10)
+        self.assertEqual(timed[0]['text'], texts[0])
+
+        stats, _ = request(self.address, {'op': 'stats'}, timeout=10)
+        self.assertEqual((stats['asr']['backend'], stats['items']), ('stub', 3))
+        with self.assertRaisesRegex(InferenceServerError, 'Unknown op'):
+            request(self.address, {'op': 'train'}, timeout=10)
+
+    def test_remote_backend_falls_back_when_the_server_is_down(self):
+        clip = speech_and_pauses((True, 1.0))
+        backend = RemoteBackend('stub', address=self.address, timeout=1, fallback=lambda: StubBackend('stub').load())
+        backend.load()
+
+        self.assertEqual(backend.transcribe_batch([clip]), StubBackend('stub').transcribe_batch([clip]))
+        self.assertEqual(backend.stats()['fallbacks'], 1)
+        self.assertTrue(backend.stats()['fallback_loaded'])
+
+        with self.assertRaises(OSError):
+            RemoteBackend('stub', address=self.address, timeout=1).transcribe_batch([clip])
+
+    def test_remote_backend_uses_the_server(self):
+        self.start_server()
+        clip = speech_and_pauses((True, 1.0))
+        backend = RemoteBackend('stub', address=self.address, timeout=10, fallback=lambda: self.fail('fell back')).load()
+
+        self.assertEqual(backend.transcribe_batch([clip]), StubBackend('stub').transcribe_batch([clip]))
+        self.assertEqual((backend.stats()['fallbacks'], backend.stats()['clips']), (0, 1))
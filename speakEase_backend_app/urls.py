@@ -1,15 +1,17 @@
 from django.urls import path
-from .views import TrainingSessionView, UserSignUpView, AllUsersView, CurrentUserView, UserProfileView, VoiceTrainingView, TrainingSessionDetailView, VocabularyView, TipView, ProgressAnalyticsView, TipDetailView, TipListView
+from .views import TrainingSessionView, UserSignUpView, AllUsersView, CurrentUserView, UserProfileView, VoiceTrainingView, TrainingSessionDetailView, VocabularyView, TipView, ProgressAnalyticsView, TipDetailView, TipListView, AnalysisJobView, ReadinessView, AnalysisCacheStatsView, ProgressSeriesView, UserExportView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 urlpatterns = [
    path('users/signup/', UserSignUpView.as_view(), name='user-signup'),
    path('users/current/', CurrentUserView.as_view(), name='current-user'),
    path('users/', AllUsersView.as_view(), name='all-users'),
+   path('users/export/', UserExportView.as_view(), name='users-export'),
    path('profile/', UserProfileView.as_view(), name='user-profile'),
    path('login/', TokenObtainPairView.as_view(), name='login'),
    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
    path('training/voice/', VoiceTrainingView.as_view(), name='voice-training'), 
+   path('training/jobs/<int:job_id>/', AnalysisJobView.as_view(), name='analysis-job-detail'),
    path('training-sessions/', TrainingSessionView.as_view(), name='training-sessions-list'),
    path('training-sessions/<int:session_id>/', TrainingSessionDetailView.as_view(), name='training-session-detail'),
    path('vocabulary/', VocabularyView.as_view(), name='vocabulary'),
@@ -17,4 +19,7 @@ urlpatterns = [
    path('tips/', TipListView.as_view(), name='tips-list'), 
    path('tips/<int:tip_id>/', TipDetailView.as_view(), name='tip-detail'),  
    path('progress/', ProgressAnalyticsView.as_view(), name='progress-analytics'),
+   path('progress/series/', ProgressSeriesView.as_view(), name='progress-series'),
+   path('health/ready/', ReadinessView.as_view(), name='readiness'),
+   path('analysis-cache/stats/', AnalysisCacheStatsView.as_view(), name='analysis-cache-stats'),
 ]
\ No newline at end of file
@@ -1,17 +1,36 @@
 from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from .models import TrainingSession,UserProfile, ProgressAnalytics, VocabularyWord, Tip
-from .serializers import TrainingSessionSerializer, UserSerializer,UserProfileSerializer, VocabularyWordSerializer, TipSerializer, ProgressAnalyticsSerializer
+from .models import TrainingSession,UserProfile, ProgressAnalytics, VocabularyWord, Tip, AnalysisJob, DailyProgress
+from .serializers import TrainingSessionSerializer, UserSerializer,UserProfileSerializer, VocabularyWordSerializer, TipSerializer, ProgressAnalyticsSerializer, AnalysisJobSerializer, AdminUserSerializer
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.contrib.auth import get_user_model
-from .ai_modules import audio_analyzer
+from .services import analyze_voice_training, decode_uploaded_audio, AnalysisError
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.core.files.storage import default_storage
+import hmac
 import uuid
 from pathlib import Path
-from pydub import AudioSegment
+from django.urls import reverse
+from django.conf import settings
+from django.db.models import Count, F, Max, Min, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import timedelta
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
+import csv
+import itertools
+import json
+from .ai_modules import registry
+from .analysis_cache import analysis_cache
+from .pagination import KeysetPagination, AdminUserPagination
+from .content_index import vocabulary_index, tip_index
+from .http_cache import make_etag, conditional_response, with_cache_headers
+from .instrumentation import render_prometheus
+from .jobs import pending_jobs_count
+from .ai_modules.audio_analysis import whisper_scheduler
 # Create your views here.
 
 User = get_user_model()
@@ -152,9 +171,54 @@ class AllUsersView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        users = User.objects.all()
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data)
+        users = User.objects.select_related('profile', 'progress_analytics').order_by('id')
+        # always paged (?page=2&page_size=100), the whole table is GET /api/users/export/
+        paginator = AdminUserPagination()
+        page = paginator.paginate_queryset(users, request, view=self)
+        serializer = AdminUserSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+# Source helper: https://docs.djangoproject.com/en/5.2/howto/outputting-csv/#streaming-large-csv-files
+# pseudo buffer for csv.writer, the rows are sent as soon as they are written
+class Echo:
+    def write(self, value):
+        return value
+
+
+# export all the users as a stream (just the admin), memory stays flat for any number of users
+# GET /api/users/export/?output=ndjson|csv
+class UserExportView(APIView):
+    permission_classes = [IsAuthenticated]
+    EXPORT_FIELDS = [
+        'id', 'username', 'email', 'first_name', 'last_name', 'is_staff', 'is_active', 'date_joined', 'last_login',
+        'profile__full_name', 'profile__age', 'profile__total_training_time',
+        'progress_analytics__total_sessions', 'progress_analytics__average_score',
+    ]
+
+    def get(self, request):
+        if not request.user.is_staff:
+            return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+
+        output = request.query_params.get('output', 'ndjson')
+        if output not in ('ndjson', 'csv'):
+            return Response({'error': 'output must be ndjson or csv'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # one query with the joins, read from the DB in chunks
+        rows = User.objects.order_by('id').values_list(*self.EXPORT_FIELDS).iterator(chunk_size=2000)
+        headers = [name.split('__')[-1] for name in self.EXPORT_FIELDS]
+
+        if output == 'csv':
+            writer = csv.writer(Echo())
+            lines = itertools.chain([writer.writerow(headers)], (writer.writerow(row) for row in rows))
+            content_type = 'text/csv'
+        else:
+            lines = (json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder) + '\n' for row in rows)
+            content_type = 'application/x-ndjson'
+
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="users.{output}"'
+        return response
 
 
 # for analysis the file upload
@@ -181,109 +245,75 @@ class VoiceTrainingView(APIView):
                 file_ext = '.webm'
             
             file_ext = Path(audio_file.name).suffix if audio_file.name else '.webm'
-            # Source helper : https://www.geeksforgeeks.org/python/generating-random-ids-using-uuid-python/
-            # generate random id number for the saving audio files
-            temp_filename = f"temp_audio/{uuid.uuid4()}{file_ext}"
-            temp_path = default_storage.save(temp_filename, audio_file)
-            full_temp_path = default_storage.path(temp_path)
-            
-            wav_filename = f"temp_audio/{uuid.uuid4()}.wav"
-            wav_path = default_storage.path(wav_filename)
-            audio = AudioSegment.from_file(full_temp_path)
-            audio = audio.set_channels(1).set_frame_rate(16000)  # mono 16kHz
-            audio.export(wav_path, format="wav")
-            
-            default_storage.delete(temp_path)
 
-            # Transcribe audio using audio_analyzer from audio_analysis ai model
-            transcription_result = audio_analyzer.transcribe_audio(wav_path)
-            if not transcription_result or 'text' not in transcription_result:
-                default_storage.delete(wav_path)
-                return Response({'error': 'Transcription failed'}, status=status.HTTP_400_BAD_REQUEST)
+            # job mode: keep the upload and let the analysis workers process it
+            if request.query_params.get('async', '').lower() in ('1', 'true', 'yes'):
+                job = AnalysisJob(
+                    user=request.user,
+                    training_type=training_type,
+                    duration=duration,
+                    word=word,
+                )
+                job.audio_file.save(f"{uuid.uuid4()}{file_ext}", audio_file, save=False)
+                job.save()
+                return Response(
+                    {
+                        'job_id': job.id,
+                        'status': job.status,
+                        'status_url': reverse('analysis-job-detail', kwargs={'job_id': job.id}),
+                    },
+                    status=status.HTTP_202_ACCEPTED
+                )
 
-            transcribed_text = transcription_result['text']
-
-            
-            # audio analysis calculate_overall_score
-            analysis_result = audio_analyzer.calculate_overall_score(
-                transcribed_text=transcribed_text,
-                audio_duration_seconds=duration,
-                audio_path=  wav_path  
-            )
-            
-            if not analysis_result:
-                default_storage.delete(wav_path)
-                return Response({'Analysis failed'}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # it create new TrainingSession save the data to db
-            training_session = TrainingSession.objects.create(
-                # link session to the user 
-                user=request.user,
-                training_type=training_type,
-                duration=duration,
-                # audio_file=audio_file,
-                score=analysis_result.get('score', 0),
-                mispronunciations=analysis_result.get('mis_pct', 0),
-                repeated_words=analysis_result.get('repeated', 0),
-                feedback_text=analysis_result.get('feedback', ''),
-                transcribed_text= transcribed_text 
-            )
-            
-            profile = UserProfile.objects.get(user=request.user)
-            # add to the total_training_time the duration
-            profile.total_training_time += duration
-            # and save it to the db
-            profile.save()
-            
-            
-            
-            Progress_Analytics = ProgressAnalytics.objects.get(user=request.user)
-            # update total_sessions
-            Progress_Analytics.total_sessions = Progress_Analytics.total_sessions + 1 
-            Progress_Analytics.total_training_time = Progress_Analytics.total_training_time + duration
-            
-            # to get all user sessions
-            all_sessions = TrainingSession.objects.filter(user=request.user)
-            # loop and save all scores for the user in TrainingSession
-            scores = []
-            for session in all_sessions:
-                score = session.score
-                scores.append(score)
-                
-            #source helper: https://stackoverflow.com/questions/64692048/how-to-get-average-highest-and-lowest-values-of-input-values
-            if scores:
-                Progress_Analytics.average_score = sum(scores) / len(scores)
-                Progress_Analytics.best_score = max(scores)
-                Progress_Analytics.worst_score = min(scores)
-                
-            # save all data and analysis in ProgressAnalytics db
-            Progress_Analytics.save()
-            
-            serializer = TrainingSessionSerializer(training_session)
-            response_data = {
-                **serializer.data,
-                'analysis': {
-                    'wpm': analysis_result.get('wpm', 0),
-                    'rating': analysis_result.get('rating'),
-                    'word': word,
-                    'mispronounced_words': analysis_result.get('mispronounced_words', []),
-                    'repeated_words': analysis_result.get('repeated_words', []),
-                    'pauses_percentage': analysis_result.get('pauses_percentage'),
-                }
-            }
-            default_storage.delete(wav_path)
+            try:
+                # decode the upload once to mono 16kHz through an ffmpeg pipe, no temp files
+                audio = decode_uploaded_audio(audio_file)
+                response_data = analyze_voice_training(request.user, audio, training_type, duration, word)
+            except AnalysisError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             return Response(response_data, status=status.HTTP_201_CREATED)
         
+
+# to check the status of a voice analysis job and get its result
+class AnalysisJobView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        try:
+            job = AnalysisJob.objects.get(id=job_id, user=request.user)
+        except AnalysisJob.DoesNotExist:
+            return Response({'error': 'Analysis job not found'}, status=status.HTTP_404_NOT_FOUND)
+        serializer = AnalysisJobSerializer(job)
+        return Response(serializer.data)
+        
               
 class TrainingSessionView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    pagination = KeysetPagination()
+
     # to get all the training sessions for the user 
+    # ?fields=id,score,created_at returns only those fields (skip the big text columns)
+    # ?page_size=20 then ?cursor=<next_cursor> returns pages instead of the whole history
     def get(self, request):
         sessions = TrainingSession.objects.filter(user=request.user)
-        serializer = TrainingSessionSerializer(sessions, many=True)
-        return Response(serializer.data)
+        fields = [name for name in request.query_params.get('fields', '').split(',') if name]
+        if fields:
+            # load only the requested columns (+ the ones the cursor needs)
+            columns = {f.name for f in TrainingSession._meta.concrete_fields} & set(fields)
+            sessions = sessions.only(*(columns | {'id', 'created_at', 'user'}))
+        if not fields or 'user_username' in fields:
+            sessions = sessions.select_related('user')
+        context = {'fields': fields or None}
+
+        if not self.pagination.is_requested(request):
+            serializer = TrainingSessionSerializer(sessions, many=True, context=context)
+            return Response(serializer.data)
+
+        page, next_cursor = self.pagination.paginate_queryset(sessions, request)
+        serializer = TrainingSessionSerializer(page, many=True, context=context)
+        return Response({'results': serializer.data, 'next_cursor': next_cursor})
     
 class TrainingSessionDetailView(APIView):
     permission_classes = [IsAuthenticated]
@@ -294,12 +324,23 @@ class TrainingSessionDetailView(APIView):
         except TrainingSession.DoesNotExist:
             return None
     
+    # the browser/front end revalidate every time, unchanged sessions get a 304
+    CACHE_CONTROL = {'private': True, 'no_cache': True}
+
     def get(self, request, session_id):
+        last_updated = TrainingSession.objects.filter(id=session_id, user=request.user).values_list('last_updated', flat=True).first()
+        if not last_updated:
+            return Response({'error': 'Training session not found'}, status=status.HTTP_404_NOT_FOUND)
+        etag = make_etag('session', session_id, last_updated.isoformat())
+        not_modified = conditional_response(request, etag, last_updated, **self.CACHE_CONTROL)
+        if not_modified:
+            return not_modified
+
         session = self.get_object(request.user, session_id)
         if not session:
             return Response({'error': 'Training session not found'}, status=status.HTTP_404_NOT_FOUND)
         serializer = TrainingSessionSerializer(session)
-        return Response(serializer.data)
+        return with_cache_headers(Response(serializer.data), etag, last_updated, **self.CACHE_CONTROL)
     
     def delete(self, request, session_id):
         session = self.get_object(request.user, session_id)
@@ -308,44 +349,50 @@ class TrainingSessionDetailView(APIView):
         session.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+# the random word/tip is different on every request: anonymous responses can be shared
+# by a CDN for a short time, logged in users get their own (no repeat) pick
+def random_content_cache_control(request):
+    if request.user.is_authenticated:
+        return {'private': True, 'no_store': True}
+    return {'public': True, 'max_age': getattr(settings, 'PUBLIC_CONTENT_MAX_AGE', 60)}
+
+
 # to get one random word for the voice training 
+# ?difficulty=beginner|intermediate|advanced to filter
 class VocabularyView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        word = VocabularyWord.objects.order_by('?').first()
+        difficulty = request.query_params.get('difficulty') or None
+        if difficulty and difficulty not in dict(VocabularyWord._meta.get_field('difficulty_level').choices):
+            return Response({'error': 'Unknown difficulty'}, status=status.HTTP_400_BAD_REQUEST)
+
+        word = vocabulary_index.get_random(difficulty, request.user)
         
         if not word:
             return Response({'error': 'No words'}, status=status.HTTP_404_NOT_FOUND)
         
         serializer = VocabularyWordSerializer(word)
-        return Response(serializer.data)
+        return with_cache_headers(Response(serializer.data), **random_content_cache_control(request))
     
 
-# to get one random word for the voice training 
-class TipView(APIView):
-    permission_classes = [AllowAny]
-
-    def get(self, request):
-        tip = Tip.objects.order_by('?').first()
-        
-        if not tip:
-            return Response({'error': 'No tips'}, status=status.HTTP_404_NOT_FOUND)
-        
-        serializer = TipSerializer(tip)
-        return Response(serializer.data)
-    
+# to get one random tip
+# ?category=voice|conversation|general to filter
 class TipView(APIView):
     permission_classes = [AllowAny]  # GET is public
 
     def get(self, request):
-        tip = Tip.objects.order_by('?').first()
+        category = request.query_params.get('category') or None
+        if category and category not in dict(Tip.TIP_TYPES):
+            return Response({'error': 'Unknown category'}, status=status.HTTP_400_BAD_REQUEST)
+
+        tip = tip_index.get_random(category, request.user)
         
         if not tip:
             return Response({'error': 'No tips'}, status=status.HTTP_404_NOT_FOUND)
         
         serializer = TipSerializer(tip)
-        return Response(serializer.data)
+        return with_cache_headers(Response(serializer.data), **random_content_cache_control(request))
 
 
 class TipListView(APIView):
@@ -355,9 +402,17 @@ class TipListView(APIView):
         if not request.user.is_staff:
             return Response({'error': 'Admin only'}, status=status.HTTP_403_FORBIDDEN)
         
+        # count + newest change, a deleted or edited tip changes the ETag
+        version = Tip.objects.aggregate(count=Count('id'), changed=Max('updated_at'))
+        etag = make_etag('tips', version['count'], version['changed'].isoformat() if version['changed'] else '')
+        cache_control = {'private': True, 'no_cache': True}
+        not_modified = conditional_response(request, etag, version['changed'], **cache_control)
+        if not_modified:
+            return not_modified
+
         tips = Tip.objects.all()
         serializer = TipSerializer(tips, many=True)
-        return Response(serializer.data)
+        return with_cache_headers(Response(serializer.data), etag, version['changed'], **cache_control)
     
     def post(self, request):
         if not request.user.is_staff:
@@ -387,8 +442,13 @@ class TipDetailView(APIView):
         if not tip:
             return Response({'error': 'Tip not found'}, status=status.HTTP_404_NOT_FOUND)
         
+        etag = make_etag('tip', tip.id, tip.updated_at.isoformat())
+        cache_control = {'private': True, 'no_cache': True}
+        not_modified = conditional_response(request, etag, tip.updated_at, **cache_control)
+        if not_modified:
+            return not_modified
         serializer = TipSerializer(tip)
-        return Response(serializer.data)
+        return with_cache_headers(Response(serializer.data), etag, tip.updated_at, **cache_control)
     
     def put(self, request, tip_id):
         if not request.user.is_staff:
@@ -418,14 +478,133 @@ class TipDetailView(APIView):
     
 class ProgressAnalyticsView(APIView):
      permission_classes = [IsAuthenticated]
+     CACHE_CONTROL = {'private': True, 'no_cache': True}
      
      def get(self, request):
+        # polling clients get a 304 until a new session changes the progress
+        version = ProgressAnalytics.objects.filter(user=request.user).values_list('id', 'last_updated', 'total_sessions').first()
+        if version:
+            etag = make_etag('progress', version[0], version[1].isoformat(), version[2])
+            not_modified = conditional_response(request, etag, version[1], **self.CACHE_CONTROL)
+            if not_modified:
+                return not_modified
         try:
             Progress_Analytics = ProgressAnalytics.objects.get(user=request.user)
             serializer = ProgressAnalyticsSerializer(Progress_Analytics)
-            return Response(serializer.data)
+            return with_cache_headers(Response(serializer.data), etag, version[1], **self.CACHE_CONTROL)
         except ProgressAnalytics.DoesNotExist:
             return Response(
                 {'error': 'Progress Analytics not found'},
                 status=status.HTTP_404_NOT_FOUND
-            )
\ No newline at end of file
+            )
+
+
+# readiness check for deploys: 200 only when the models are loaded (python manage.py warmup_models)
+class ReadinessView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        required = getattr(settings, 'READINESS_RESOURCES', ['whisper'])
+        # a stuck whisper batch blocks every transcription of this process
+        stalled = whisper_scheduler.stalled(getattr(settings, 'WHISPER_RESULT_TIMEOUT', 300))
+        ready = registry.is_ready(required) and not stalled
+        data = {
+            'ready': ready, 'required': required, 'resources': registry.status(),
+            'whisper_scheduler': {**whisper_scheduler.stats(), 'stalled': stalled},
+        }
+        # load time and per clip latency of the speech recognition backend
+        if registry.is_ready(['whisper']):
+            data['asr'] = registry.get('whisper').stats()
+        return Response(
+            data,
+            status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+
+# hit/miss counters of the analysis cache (just the admin), counters are per server process
+class AnalysisCacheStatsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.is_staff:
+            return Response({'error': 'Admin only'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(analysis_cache.stats())
+
+
+# prometheus scrape endpoint: stage/request latency histograms and p50/p95/p99 of this
+# worker process (labelled with its pid), the analysis job queue and the whisper batch queue
+class MetricsView(APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        # turned off until a token is configured, the metrics are never public
+        token = getattr(settings, 'METRICS_TOKEN', '')
+        if not token:
+            return HttpResponse(status=status.HTTP_404_NOT_FOUND)
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+            return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+        body = render_prometheus({
+            'speakease_analysis_jobs_pending': pending_jobs_count(),
+            'speakease_whisper_queue_depth': whisper_scheduler.queue_depth(),
+            'speakease_whisper_batches': whisper_scheduler.batches,
+            'speakease_whisper_batch_items': whisper_scheduler.items,
+            'speakease_whisper_timeouts': whisper_scheduler.timeouts,
+            'speakease_whisper_busy_seconds': whisper_scheduler.busy_seconds(),
+        })
+        return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# progress chart data from the DailyProgress rollups
+# GET /api/progress/series/?period=day|week|month&start=YYYY-MM-DD&end=YYYY-MM-DD
+class ProgressSeriesView(APIView):
+    permission_classes = [IsAuthenticated]
+    PERIODS = {'day': None, 'week': TruncWeek, 'month': TruncMonth}
+
+    def get(self, request):
+        period = request.query_params.get('period', 'day')
+        if period not in self.PERIODS:
+            return Response({'error': 'period must be day, week or month'}, status=status.HTTP_400_BAD_REQUEST)
+
+        dates = {}
+        for name in ('start', 'end'):
+            value = request.query_params.get(name, '')
+            try:
+                dates[name] = parse_date(value) if value else None
+            except ValueError:
+                # well formed but not a real date, e.g. 2026-02-30
+                dates[name] = None
+            if value and dates[name] is None:
+                return Response({'error': f"{name} must be a date (YYYY-MM-DD)"}, status=status.HTTP_400_BAD_REQUEST)
+
+        end = dates['end'] or timezone.localdate()
+        start = dates['start'] or end - timedelta(days=29)
+        if start > end:
+            return Response({'error': 'start must be before end'}, status=status.HTTP_400_BAD_REQUEST)
+        max_days = getattr(settings, 'PROGRESS_SERIES_MAX_DAYS', 731)
+        if (end - start).days >= max_days:
+            return Response({'error': f"the range can be at most {max_days} days"}, status=status.HTTP_400_BAD_REQUEST)
+
+        rollups = DailyProgress.objects.filter(user=request.user, day__gte=start, day__lte=end)
+        if self.PERIODS[period]:
+            rollups = rollups.annotate(period=self.PERIODS[period]('day'))
+        else:
+            rollups = rollups.annotate(period=F('day'))
+        rows = rollups.order_by().values('period').annotate(
+            sessions=Sum('session_count'), score_total=Sum('score_sum'), best=Max('score_max'), worst=Min('score_min'),
+            seconds=Sum('training_seconds'), wpm_total=Sum('wpm_sum'), wpm_sessions=Sum('wpm_count'),
+        ).order_by('period')
+
+        series = [
+            {
+                'period_start': row['period'],
+                'sessions': row['sessions'],
+                'average_score': round(row['score_total'] / row['sessions'], 2) if row['sessions'] else 0,
+                'best_score': row['best'],
+                'worst_score': row['worst'],
+                'training_time': row['seconds'],
+                'average_wpm': round(row['wpm_total'] / row['wpm_sessions'], 2) if row['wpm_sessions'] else None,
+            }
+            for row in rows
+        ]
+        return Response({'period': period, 'start': start, 'end': end, 'series': series})
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import time
+from urllib.parse import parse_qs
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from .ai_modules.audio_analysis import transcript_text
+from .ai_modules.streaming import StreamingAnalyzer
+from .services import analyze_voice_training, AnalysisError
+
+# Source helper: https://asgi.readthedocs.io/en/latest/specs/www.html#websocket
+# live voice training over a plain ASGI websocket (no channels needed):
+#
+#   ws://<host>/ws/voice/?token=<access token>&training_type=voice&word=&format=s16
+#
+# the client sends binary messages of mono 16kHz pcm (format s16 = int16 little endian,
+# f32 = float32) while the user speaks and {"type": "stop"} at the end. The server sends:
+#   {"type": "ready"}
+#   {"type": "partial", "text", "start", "end"}             text of the segment being spoken
+#   {"type": "transcript", "segment", "text", "start", "end"} text of a segment closed by a pause
+#   {"type": "metrics", "wpm", "pauses_percentage", "repeated_words", ...}
+#   {"type": "result", ...}  the saved TrainingSession, same as POST /api/training/voice/
+#   {"type": "error", "error"}
+
+PCM_FORMATS = {'s16': ('<i2', 32768.0), 'f32': ('<f4', 1.0)}
+
+CLOSE_BAD_REQUEST = 4400
+CLOSE_UNAUTHORIZED = 4401
+
+
+def authenticate(token):
+    auth = JWTAuthentication()
+    return auth.get_user(auth.get_validated_token(token))
+
+
+class VoiceStreamSession:
+    def __init__(self, scope, receive, send):
+        self.scope = scope
+        self.receive = receive
+        self._send = send
+        self._send_lock = asyncio.Lock()
+        params = parse_qs(scope.get('query_string', b'').decode())
+        self.params = {name: values[-1] for name, values in params.items()}
+        self.user = None
+        self.analyzer = StreamingAnalyzer(
+            partial_seconds=getattr(settings, 'STREAM_PARTIAL_SECONDS', 2.0),
+            max_segment_seconds=getattr(settings, 'WHISPER_CHUNK_SECONDS', 30),
+            max_seconds=getattr(settings, 'STREAM_MAX_SECONDS', 600),
+        )
+        self.metrics_interval = getattr(settings, 'STREAM_METRICS_INTERVAL_MS', 250) / 1000
+        self._last_metrics = 0
+        self._tasks = set()
+
+    async def send_json(self, data):
+        async with self._send_lock:
+            await self._send({'type': 'websocket.send', 'text': json.dumps(data)})
+
+    async def close(self, code=1000):
+        async with self._send_lock:
+            await self._send({'type': 'websocket.close', 'code': code})
+
+    async def run(self):
+        message = await self.receive()
+        if message['type'] != 'websocket.connect':
+            return
+
+        pcm_format = PCM_FORMATS.get(self.params.get('format', 's16'))
+        try:
+            self.user = await sync_to_async(authenticate)(self.params.get('token', ''))
+        except APIException:
+            self.user = None
+        # closing before the accept rejects the handshake (http 403)
+        if self.user is None:
+            await self.close(CLOSE_UNAUTHORIZED)
+            return
+        if pcm_format is None:
+            await self.close(CLOSE_BAD_REQUEST)
+            return
+
+        await self._send({'type': 'websocket.accept'})
+        await self.send_json({'type': 'ready', 'sample_rate': self.analyzer.sample_rate})
+
+        connected = True
+        while True:
+            message = await self.receive()
+            if message['type'] == 'websocket.disconnect':
+                connected = False
+                break
+            if message.get('bytes'):
+                await self.add_pcm(message['bytes'], *pcm_format)
+                if self.analyzer.full:
+                    break
+            elif message.get('text'):
+                try:
+                    control = json.loads(message['text'])
+                except ValueError:
+                    control = {}
+                if control.get('type') == 'stop':
+                    break
+
+        # the session is saved even when the client went away without "stop"
+        result = await self.finish()
+        if connected:
+            await self.send_json(result)
+            await self.close()
+
+    async def add_pcm(self, data, dtype, scale):
+        # drop a partial sample at the end of the message
+        usable = len(data) - len(data) % np.dtype(dtype).itemsize
+        samples = np.frombuffer(data[:usable], dtype=dtype).astype(np.float32) / scale
+        jobs = await asyncio.to_thread(self.analyzer.feed, samples)
+        for job in jobs:
+            self.watch(job)
+        if time.monotonic() - self._last_metrics >= self.metrics_interval:
+            await self.send_metrics()
+
+    async def send_metrics(self):
+        self._last_metrics = time.monotonic()
+        await self.send_json({'type': 'metrics', **self.analyzer.metrics()})
+
+    # push the text of a transcription job to the client when whisper returns it
+    def watch(self, job):
+        task = asyncio.ensure_future(self._job_done(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _job_done(self, job):
+        try:
+            result = await asyncio.wait_for(
+                asyncio.wrap_future(job['future']), getattr(settings, 'WHISPER_RESULT_TIMEOUT', 300)
+            )
+            text = transcript_text(result).strip()
+        except Exception as e:
+            print(f"Error transcribing live segment: {e}")
+            text = ''
+        if job['kind'] == 'segment':
+            self.analyzer.add_text(job, text)
+            message = {'type': 'transcript', 'segment': job['index']}
+        else:
+            message = {'type': 'partial'}
+        try:
+            await self.send_json({**message, 'text': text, 'start': job['start'], 'end': job['end']})
+            if job['kind'] == 'segment':
+                await self.send_metrics()
+        except OSError:
+            # the client is gone, the text is still used for the saved session
+            pass
+
+    async def finish(self):
+        for job in await asyncio.to_thread(self.analyzer.finish):
+            self.watch(job)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        text = self.analyzer.text
+        audio = self.analyzer.audio()
+        if not text:
+            return {'type': 'error', 'error': 'No speech detected'}
+        # the duration is measured from the audio, not given by the client
+        duration = max(1, int(round(audio.duration)))
+        try:
+            data = await sync_to_async(analyze_voice_training)(
+                self.user, audio, self.params.get('training_type', 'voice'), duration,
+                self.params.get('word', ''), transcribed_text=text,
+            )
+        except AnalysisError as e:
+            return {'type': 'error', 'error': str(e)}
+        return {'type': 'result', **data}
+
+
+async def voice_stream(scope, receive, send):
+    await VoiceStreamSession(scope, receive, send).run()
+
+
+websocket_routes = {
+    '/ws/voice/': voice_stream,
+}
+
+
+# ASGI app for the websocket connections, unknown paths are rejected
+async def websocket_application(scope, receive, send):
+    handler = websocket_routes.get(scope['path'])
+    if handler is None:
+        await receive()
+        await send({'type': 'websocket.close', 'code': 1000})
+        return
+    await handler(scope, receive, send)